@@ -0,0 +1,117 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+
+"""
+
+Compares the codecs of module testlinkcodec with typical TestLink payloads.
+- works WITHOUT a TestLink Server, requests and responses are only converted
+
+=> requests  : reportTCResult, createTestCase with 30 steps
+=> responses : getTestCase, getTestCasesForTestPlan with 5000 test cases
+
+Usage: python TestLinkCodecBenchmark.py [repeat factor]
+
+Use the faster codec with
+ >>> tls = testlink.TestLinkHelper().connect(testlink.TestlinkAPIClient,
+ ...                              codec=testlink.testlinkcodec.FastCodec())
+"""
+import sys, time, xmlrpclib
+from testlink.testlinkcodec import XmlRpcCodec, FastCodec, \
+FAST_PARSER_AVAILABLE
+
+DEVKEY = 'a' * 32
+
+REQUESTS = [
+    ('tl.reportTCResult', {'devKey' : DEVKEY, 'testcaseid' : '4711',
+        'testplanid' : '12', 'buildid' : '3', 'status' : 'p',
+        'notes' : 'automated run on <host> & co', 'platformname' : 'Linux',
+        'overwrite' : False}, 2000),
+    ('tl.createTestCase', {'devKey' : DEVKEY, 'testcasename' : 'TC login',
+        'testsuiteid' : '4712', 'testprojectid' : '1', 'authorlogin' : 'admin',
+        'summary' : 'check login with valid and invalid users ' * 5,
+        'preconditions' : 'user <admin> exists', 'importance' : 2,
+        'executiontype' : 2, 'order' : 0, 'checkduplicatedname' : 1,
+        'actiononduplicatedname' : 'block',
+        'steps' : [{'step_number' : x, 'actions' : 'action %i <b>bold</b>' % x,
+                    'expected_results' : u'result %i \xe4\xf6\xfc' % x,
+                    'execution_type' : 2} for x in range(1, 31)]}, 500),
+    ]
+
+TESTCASE = {'id' : '4711', 'testcase_id' : '4711', 'tc_external_id' : '15',
+    'name' : 'TC login', 'version' : '3', 'summary' : '<p>check login</p>',
+    'preconditions' : '', 'importance' : '2', 'execution_type' : '2',
+    'author_login' : 'admin', 'creation_ts' : '2014-10-18 10:11:12',
+    'active' : '1', 'is_open' : '1',
+    'steps' : [{'id' : str(x), 'step_number' : str(x),
+                'actions' : '<p>action %i</p>' % x,
+                'expected_results' : '<p>result %i</p>' % x, 'active' : '1',
+                'execution_type' : '2'} for x in range(1, 31)]}
+
+RESPONSES = [
+    ('getTestCase', [TESTCASE], 500),
+    ('getTestCasesForTestPlan', dict([(str(x),
+        [{'tcase_id' : str(x), 'tcversion_id' : str(x + 1), 'version' : '1',
+          'tcase_name' : 'TC-%i' % x, 'external_id' : str(x),
+          'platform_id' : '0', 'platform_name' : '', 'exec_status' : 'p',
+          'execution_type' : '1', 'feature_id' : str(x)}])
+        for x in range(5000)]), 2),
+    ]
+
+def timeIt(func, repeat):
+    start = time.time()
+    for x in xrange(repeat):
+        func()
+    return time.time() - start
+
+def parse(codec, body):
+    (parser, unmarshaller) = codec.getparser()
+    parser.feed(body)
+    parser.close()
+    return unmarshaller.close()
+
+def runBenchmark(factor=1):
+    stock = XmlRpcCodec()
+    fast = FastCodec()
+    print 'cElementTree parser available: %s' % FAST_PARSER_AVAILABLE
+    print '%-35s %10s %10s %8s' % ('payload', 'xmlrpclib', 'fast', 'speedup')
+    for (methodName, args, repeat) in REQUESTS:
+        repeat *= factor
+        assert xmlrpclib.loads(fast.dumps((args,), methodName)) == \
+               xmlrpclib.loads(stock.dumps((args,), methodName))
+        stockTime = timeIt(lambda: stock.dumps((args,), methodName), repeat)
+        fastTime = timeIt(lambda: fast.dumps((args,), methodName), repeat)
+        print '%-35s %9.3fs %9.3fs %7.1fx' % ('request %s x%i' %
+                    (methodName, repeat), stockTime, fastTime,
+                    stockTime / fastTime)
+    for (methodName, response, repeat) in RESPONSES:
+        repeat *= factor
+        body = xmlrpclib.dumps((response,), methodresponse=True)
+        assert parse(fast, body) == parse(stock, body)
+        stockTime = timeIt(lambda: parse(stock, body), repeat)
+        fastTime = timeIt(lambda: parse(fast, body), repeat)
+        print '%-35s %9.3fs %9.3fs %7.1fx' % ('response %s x%i' %
+                    (methodName, repeat), stockTime, fastTime,
+                    stockTime / fastTime)
+
+if __name__ == "__main__":
+    factor = 1
+    if len(sys.argv) > 1:
+        factor = int(sys.argv[1])
+    runBenchmark(factor)
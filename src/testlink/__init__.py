@@ -21,5 +21,6 @@
 from .testlinkerrors import TestLinkError
 from .testlinkapigeneric import TestlinkAPIGeneric
 from .testlinkapi import TestlinkAPIClient
+from .testlinkasync import AsyncTestlinkAPIGeneric, AsyncTestlinkAPIClient
 #from .testlink import TestLink
 from .testlinkhelper import TestLinkHelper
\ No newline at end of file
@@ -33,14 +33,14 @@ class TestLink(TestlinkAPIClient):
 
     __author__ = 'pade (Patrick Dassier), TestLink-API-Python-client developers'
 
-    def __init__(self, server_url, key):
+    def __init__(self, server_url, key, **args):
         """
         Class initialisation
         """
         warnings.warn("""class TestLink is deprecated!
 please use testlinkapigeneric.TestlinkAPIGeneric or testlinkapi.TestlinkAPIClient""", 
         DeprecationWarning)
-        super(TestLink, self).__init__(server_url, key)
+        super(TestLink, self).__init__(server_url, key, **args)
 
     def getTestCaseIDByName(self, testCaseName, testSuiteName, testProjectName):
         """
@@ -49,10 +49,8 @@ please use testlinkapigeneric.TestlinkAPIGeneric or testlinkapi.TestlinkAPIClien
         Return test case id if success 
         or raise TestLinkError exception with error message in case of error
         """    
-        results = super(TestLink, self).getTestCaseIDByName(testCaseName, testSuiteName, testProjectName)
-        if results[0].has_key("message"):
-            raise TestLinkError(results[0]["message"])
-        elif len(results) > 1:
+        results = self.resolver.testCases(testCaseName, testSuiteName, testProjectName)
+        if len(results) > 1:
             raise TestLinkError("(getTestCaseIDByName) - Several case test found. Suite name must not be duplicate for the same project")
         else:
             if results[0]["name"] == testCaseName:
@@ -74,6 +72,9 @@ please use testlinkapigeneric.TestlinkAPIGeneric or testlinkapi.TestlinkAPIClien
             - buildName: the active build.
         Raise a TestLinkError error with the error message in case of trouble
         Return the execution id needs to attach files to test execution
+        
+        Project, plan, build and test case ids are looked up with .resolver,
+        so further results for known names need only the reportTCResult call
         """
         
         # Check parameters
@@ -82,14 +83,18 @@ please use testlinkapigeneric.TestlinkAPIGeneric or testlinkapi.TestlinkAPIClien
                 raise TestLinkError("(reportResult) - Missing key %s in anonymous dictionnary" % data)
 
         # Get project id
-        project = self.getTestProjectByName(kwargs["testProjectName"])
+        project = self.resolver.project(kwargs["testProjectName"])
+        if project is None:
+            raise TestLinkError("(reportResult) - Test project %s does not exists" % kwargs["testProjectName"])
 
         # Check if project is active
         if project['active'] != '1':
             raise TestLinkError("(reportResult) - Test project %s is not active" % kwargs["testProjectName"])
 
         # Check test plan name
-        plan = self.getTestPlanByName(kwargs["testProjectName"], kwargs["testPlanName"])
+        plan = self.resolver.plan(kwargs["testProjectName"], kwargs["testPlanName"])
+        if plan is None:
+            raise TestLinkError("(reportResult) - Test plan %s does not exists for test project %s" % (kwargs["testPlanName"], kwargs["testProjectName"]))
 
         # Check is test plan is open and active
         if plan['is_open'] != '1' or plan['active'] != '1':
@@ -155,17 +160,14 @@ please use testlinkapigeneric.TestlinkAPIGeneric or testlinkapi.TestlinkAPIClien
         Return build corresponding to buildName
         A TestLinkError is raised in case of error
         """
-        plan = self.getTestPlanByName(testProjectName, testPlanName)
-        builds = self.getBuildsForTestPlan(plan['id'])
-
-        # Check if a builds exists
-        if builds == '':
-            raise TestLinkError("(getBuildByName) - Builds %s does not exists for test plan %s" % (buildName, testPlanName))
-
-        # Search the correct build name in the return builds list
-        for build in builds:
-            if build['name'] == buildName:
-                return build
+        plan = self.resolver.plan(testProjectName, testPlanName)
+        if plan is None:
+            raise TestLinkError("(getBuildByName) - Test plan %s does not exists for test project %s" % (testPlanName, testProjectName))
+
+        # Search the correct build name in the builds index of the plan
+        build = self.resolver.build(plan['id'], buildName)
+        if build is not None:
+            return build
         
         # No build found with builName name
         raise TestLinkError("(getBuildByName) - Builds %s does not exists for test plan %s" % (buildName, testPlanName))
@@ -19,8 +19,11 @@
 
 #import xmlrpclib
 
+import time
 from testlinkapigeneric import TestlinkAPIGeneric, TestLinkHelper
-from testlinkerrors import TLArgError
+from testlinkerrors import TestLinkError, TLArgError, TLResponseError
+from .testlinkresolver import NameResolver
+from .testlinkfutures import mapConcurrent
 
 
 class TestlinkAPIClient(TestlinkAPIGeneric):
@@ -40,14 +43,14 @@ class TestlinkAPIClient(TestlinkAPIGeneric):
         TestlinkAPIGeneric. 
     """   
     
-    __slots__ = ['stepsList']
+    __slots__ = ['stepsList', 'resolver']
     __author__ = 'Luiko Czub, Olivier Renault, James Stock, TestLink-API-Python-client developers'
     
-    def __init__(self, server_url, devKey):
+    def __init__(self, server_url, devKey, **args):
         """ call super for init generell slots, init sepcial slots for teststeps
             and define special positional arg settings """ 
-        super(TestlinkAPIClient, self).__init__(server_url, devKey, 
-                                                allow_none=1)
+        args.setdefault('allow_none', 1)
+        super(TestlinkAPIClient, self).__init__(server_url, devKey, **args)
         # allow_none is an argument from xmlrpclib.Server()
         # with set to True, it is possible to set postional args to None, so 
         # alternative optional arguments could be set
@@ -56,6 +59,8 @@ class TestlinkAPIClient(TestlinkAPIGeneric):
         #                             testcaseexternalid=tc_aa_full_ext_id)
         # otherwise xmlrpclib raise an error, that None values are not allowed
         self.stepsList = []
+        # name -> id maps for projects, plans, builds, platforms, test cases
+        self.resolver = NameResolver(self)
         self._changePositionalArgConfig()
         
     def _changePositionalArgConfig(self):
@@ -146,13 +151,13 @@ class TestlinkAPIClient(TestlinkAPIGeneric):
     #                                   
 
     def getProjectIDByNode(self, a_nodeid):
-        """ returns project id , the nodeid belongs to."""
+        """ returns project id , the nodeid belongs to.
         
-        # get node path 
-        node_path = self.getFullPath(int(a_nodeid))[a_nodeid]
-        # get project and id
-        a_project = self.getTestProjectByName(node_path[0])
-        return a_project['id']
+        node paths and project ids are kept by .resolver - use 
+        .resolver.fullPaths(nodeids) to read the paths of many nodes with one 
+        call """
+        
+        return self.resolver.projectIdByNode(a_nodeid)
 
     def copyTCnewVersion(self, origTestCaseId, origVersion=None, **changedAttributes):
         """ creates a new version for test case ORIGTESTCASEID
@@ -419,14 +424,398 @@ class TestlinkAPIClient(TestlinkAPIGeneric):
         return True                
                                         
     def getProjectIDByName(self, projectName):   
-        projects=self.getProjects()
-        result=-1
-        for project in projects:
-            if (project['name'] == projectName): 
-                result = project['id']
-                break
+        """ returns the id of project PROJECTNAME or -1, if it is unknown 
+            - uses the name index .resolver """
+        result = self.resolver.projectId(projectName)
+        if result is None:
+            result = -1
         return result
 
+    def reportTCResults(self, results, testplanid, buildid=None, 
+                        platformid=None, buildname=None, platformname=None,
+                        workers=1, batchSize=None):
+        """ reports the test case results of the iterable RESULTS for test 
+        plan TESTPLANID and returns a list of tuples (result, outcome) in the 
+        order of RESULTS - outcome is the execution id or the TestLinkError 
+        of this result. A failed result does not stop the run.
+        
+        result defines the reportTCResult args of one test case 
+        - dictionary : args like testcaseid or testcaseexternalid, status, 
+                       notes, bugid ... 
+        - tuple      : (testcaseid, status) or (testcaseid, status, notes)
+        
+        BUILDID / BUILDNAME and PLATFORMID / PLATFORMNAME are shared by all 
+        results, names are resolved only once with .resolver. A result could 
+        define its own values.
+        
+        WORKERS   - results are reported in up to WORKERS threads, requires a 
+                    thread safe transport like PooledTransport
+        BATCHSIZE - None: one reportTCResult call per result
+                    number: BATCHSIZE results are send together with one 
+                    system.multicall round trip - see batch()
+        RESULTS is consumed lazy, so it could be a generator.
+        
+        Example:
+         >>> report = tls.reportTCResults(
+         ...                 [{'testcaseid' : tcid1, 'status' : 'p'}, 
+         ...                  (tcid2, 'f', 'timeout')], 
+         ...                 planid, buildname='Build 1', batchSize=100)
+         >>> failed = [x for x in report if isinstance(x[1], TestLinkError)]
+        """
+        self._checkThreadSafe('reportTCResults', workers)
+        context = {'testplanid' : testplanid}
+        if buildid is None and buildname is not None:
+            buildid = self._resolvedId(self.resolver.build(testplanid, 
+                                                           buildname), 
+                                       'build', buildname, testplanid)
+        if platformid is None and platformname is not None:
+            platformid = self._resolvedId(self.resolver.platform(testplanid,
+                                                                 platformname),
+                                          'platform', platformname, testplanid)
+        if buildid is not None:
+            context['buildid'] = buildid
+        if platformid is not None:
+            context['platformid'] = platformid
+        
+        def resultArgs(result):
+            if isinstance(result, dict):
+                args = dict(result)
+            else:
+                args = dict(zip(['testcaseid', 'status', 'notes'], result))
+            for (argName, value) in context.items():
+                args.setdefault(argName, value)
+            return args
+        
+        def reportOne(result):
+            return _executionId(self.reportTCResult(**resultArgs(result)))
+        
+        def reportChunk(chunk):
+            try:
+                with self.batch(len(chunk)) as batch:
+                    for result in chunk:
+                        batch.reportTCResult(**resultArgs(result))
+            except TestLinkError as tl_err:
+                # the round trip failed, so no result has been reported
+                return [tl_err] * len(chunk)
+            return [x.error() or _executionId(x.result()) 
+                    for x in batch.calls]
+        
+        # the worker threads keep the deadline of the calling thread
+        reportOne = self._withCallerDeadline(reportOne)
+        reportChunk = self._withCallerDeadline(reportChunk)
+        if not batchSize:
+            return list(mapConcurrent(reportOne, results, workers))
+        report = []
+        for (chunk, outcomes) in mapConcurrent(reportChunk, 
+                                    _chunks(results, batchSize), workers):
+            report.extend(zip(chunk, outcomes))
+        return report
+
+    def createTestCases(self, specs, testprojectid, authorlogin=None,
+                        testsuiteid=None, checkduplicatedname=1,
+                        actiononduplicatedname='block', workers=1,
+                        batchSize=None):
+        """ creates the test cases of the iterable SPECS in project 
+        TESTPROJECTID and returns a dictionary spec key -> outcome - outcome 
+        is the full external id (like 'NPROAPI-7') or the TestLinkError of 
+        this spec. A failed spec does not stop the run.
+        
+        spec is a dictionary with createTestCase args like testcasename, 
+        testsuiteid, summary, preconditions, importance, execution and 
+        - steps : list of dictionaries like createTestCase or of tuples 
+                  (actions, expected_results[, execution_type]) - missing 
+                  step numbers are set in list order
+        - key   : spec key of the outcome, default (testsuiteid, testcasename)
+                  - specs with duplicate names need an own key
+        
+        AUTHORLOGIN, TESTSUITEID, CHECKDUPLICATEDNAME and 
+        ACTIONONDUPLICATEDNAME are shared by all specs, a spec could define 
+        its own values. Specs with the same name in the same suite are never
+        send at the same time, so TestLink checks each duplicate against the 
+        case created before. A case blocked as duplicate fails with a 
+        TLResponseError.
+        
+        WORKERS   - cases are created in up to WORKERS threads, requires a 
+                    thread safe transport like PooledTransport
+        BATCHSIZE - None: one createTestCase call per spec
+                    number: BATCHSIZE specs are send together with one 
+                    system.multicall round trip - see batch()
+        SPECS is consumed lazy, so it could be a generator. .stepsList is 
+        not used.
+        
+        Example:
+         >>> created = tls.createTestCases(
+         ...     ({'testcasename' : row[0], 'summary' : row[1], 
+         ...       'steps' : [(row[2], row[3])], 'key' : row[4]} 
+         ...      for row in csv.reader(open('catalog.csv'))), 
+         ...     projectid, 'admin', suiteid, workers=8, batchSize=50)
+        """
+        self._checkThreadSafe('createTestCases', workers)
+        project = self.resolver.projectById(testprojectid)
+        if project is None:
+            raise TLArgError('unknown project id %s' % testprojectid)
+        prefix = project['prefix']
+        shared = {'testprojectid' : testprojectid, 
+                  'checkduplicatedname' : checkduplicatedname,
+                  'actiononduplicatedname' : actiononduplicatedname}
+        if authorlogin is not None:
+            shared['authorlogin'] = authorlogin
+        if testsuiteid is not None:
+            shared['testsuiteid'] = testsuiteid
+        
+        def caseArgs(spec):
+            args = dict(spec)
+            args.pop('key', None)
+            for (argName, value) in shared.items():
+                args.setdefault(argName, value)
+            args['steps'] = _testSteps(args.get('steps', []))
+            return args
+        
+        def createOne(spec):
+            args = caseArgs(spec)
+            # the generic method does not touch the shared .stepsList
+            response = super(TestlinkAPIClient, self).createTestCase(**args)
+            return _externalId(response, prefix, args)
+        
+        def createChunk(chunk):
+            try:
+                with self.batch(len(chunk)) as batch:
+                    for spec in chunk:
+                        super(TestlinkAPIClient, self).createTestCase(
+                                                        **caseArgs(spec))
+            except TestLinkError as tl_err:
+                # the round trip failed, so no case has been created
+                return [tl_err] * len(chunk)
+            outcomes = []
+            for batchResult in batch.calls:
+                try:
+                    outcomes.append(_externalId(batchResult.result(), prefix,
+                                                batchResult.argsAPI))
+                except TestLinkError as tl_err:
+                    outcomes.append(tl_err)
+            return outcomes
+        
+        def specKey(spec):
+            if 'key' in spec:
+                return spec['key']
+            return (spec.get('testsuiteid', testsuiteid), 
+                    spec['testcasename'])
+        
+        # the worker threads keep the deadline of the calling thread
+        createOne = self._withCallerDeadline(createOne)
+        createChunk = self._withCallerDeadline(createChunk)
+        created = {}
+        pending = specs
+        while True:
+            heldBack = []
+            uniqueSpecs = _uniqueNames(pending, heldBack, testsuiteid)
+            if not batchSize:
+                for (spec, outcome) in mapConcurrent(createOne, uniqueSpecs, 
+                                                     workers):
+                    created[specKey(spec)] = outcome
+            else:
+                for (chunk, outcomes) in mapConcurrent(createChunk, 
+                                    _chunks(uniqueSpecs, batchSize), workers):
+                    for (spec, outcome) in zip(chunk, outcomes):
+                        created[specKey(spec)] = outcome
+            if not heldBack:
+                return created
+            # duplicate names are created after the first case has been
+            pending = heldBack
+
+    def linkTestCasesToTestPlan(self, testplanid, items, platforms=None, 
+                                testprojectid=None, workers=1, 
+                                batchSize=None):
+        """ links the test case versions of the iterable ITEMS to test plan 
+        TESTPLANID - with each platform id of the list PLATFORMS - and 
+        returns a dictionary with 
+        - 'linked'    : number of linked case versions
+        - 'skipped'   : number of cases, which are already linked 
+        - 'failed'    : list of tuples (item, platformid, TestLinkError)
+        - 'seconds'   : duration of the run
+        - 'perSecond' : linked case versions per second
+        
+        item defines the addTestCaseToTestPlan args of one case version
+        - dictionary : testcaseexternalid, version and optional 
+                       executionorder, urgency, platformid
+        - tuple      : (testcaseexternalid, version)
+        
+        The linked cases of the plan are read once with 
+        getTestCasesForTestPlan. A case already linked with the platform is 
+        skipped, also when another version is linked. 
+        TESTPROJECTID - default is the project with the prefix of the first 
+                        test case external id (like 'NPROAPI-7')
+        WORKERS   - cases are linked in up to WORKERS threads, requires a 
+                    thread safe transport like PooledTransport
+        BATCHSIZE - None: one addTestCaseToTestPlan call per case and 
+                    platform
+                    number: BATCHSIZE calls are send together with one 
+                    system.multicall round trip - see batch()
+        
+        Example - clone the test cases of a plan:
+         >>> linked = tls.getTestCasesForTestPlan(oldplanid, details='simple')
+         >>> items = [('NPROAPI-%s' % x['external_id'], x['version']) 
+         ...          for y in linked.values() for x in y]
+         >>> report = tls.linkTestCasesToTestPlan(newplanid, items, 
+         ...                         platforms=[1, 2], workers=4, batchSize=100)
+         >>> print report['perSecond'], report['failed']
+        """
+        self._checkThreadSafe('linkTestCasesToTestPlan', workers)
+        start = time.time()
+        linked = _linkedCases(self.getTestCasesForTestPlan(
+                                                    testplanid=testplanid))
+        report = {'linked' : 0, 'skipped' : 0, 'failed' : []}
+        project = {'id' : testprojectid}
+        
+        def linkArgs(item, platformid):
+            if isinstance(item, dict):
+                args = dict(item)
+            else:
+                args = dict(zip(['testcaseexternalid', 'version'], item))
+            if project['id'] is None:
+                prefix = args['testcaseexternalid'].rsplit('-', 1)[0]
+                project['id'] = self._resolvedId(
+                                    self.resolver.projectByPrefix(prefix), 
+                                    'project prefix', prefix, testplanid)
+            args['testplanid'] = testplanid
+            args.setdefault('testprojectid', project['id'])
+            if platformid is not None:
+                args['platformid'] = platformid
+            return args
+        
+        def links(items):
+            # (item, platformid, args) of each case version and platform, 
+            # which is not linked yet
+            for item in items:
+                for platformid in (platforms or [None]):
+                    args = linkArgs(item, platformid)
+                    linkKey = (_externalNumber(args['testcaseexternalid']), 
+                               str(args.get('platformid', 0)))
+                    if linkKey in linked:
+                        report['skipped'] += 1
+                        continue
+                    linked.add(linkKey)
+                    yield (item, platformid, args)
+        
+        def linkOne(link):
+            return self.addTestCaseToTestPlan(**link[2])
+        
+        def linkChunk(chunk):
+            try:
+                with self.batch(len(chunk)) as batch:
+                    for link in chunk:
+                        batch.addTestCaseToTestPlan(**link[2])
+            except TestLinkError as tl_err:
+                # the round trip failed, so no case has been linked
+                return [tl_err] * len(chunk)
+            return [x.error() or x.result() for x in batch.calls]
+        
+        # the worker threads keep the deadline of the calling thread
+        linkOne = self._withCallerDeadline(linkOne)
+        linkChunk = self._withCallerDeadline(linkChunk)
+        if not batchSize:
+            outcomes = mapConcurrent(linkOne, links(items), workers)
+        else:
+            outcomes = ((link, outcome) for (chunk, chunkOutcomes) in 
+                        mapConcurrent(linkChunk, _chunks(links(items), 
+                                                         batchSize), workers)
+                        for (link, outcome) in zip(chunk, chunkOutcomes))
+        for (link, outcome) in outcomes:
+            if isinstance(outcome, TestLinkError):
+                report['failed'].append((link[0], link[1], outcome))
+            else:
+                report['linked'] += 1
+        report['seconds'] = time.time() - start
+        report['perSecond'] = report['linked'] / max(report['seconds'], 0.001)
+        return report
+
+    def _resolvedId(self, item, kind, name, testplanid):
+        """ returns the id of ITEM found by NAME or raises TLArgError """
+        if item is None:
+            raise TLArgError('unknown %s %s for test plan %s' % 
+                             (kind, name, testplanid))
+        return item['id']
+
+    def _invalidateCache(self, methodNameAPI, argsAPI):
+        """ drops also the name maps of .resolver, which the writing server 
+        method METHODNAMEAPI called with ARGSAPI makes invalid 
+        internal method - should not be called directly """
+        super(TestlinkAPIClient, self)._invalidateCache(methodNameAPI, argsAPI)
+        self.resolver.invalidateFor(methodNameAPI, argsAPI)
+
+
+def _executionId(response):
+    """ returns the execution id of a reportTCResult RESPONSE """
+    try:
+        return response[0]['id']
+    except (TypeError, KeyError, IndexError):
+        return response
+
+def _externalId(response, prefix, argsAPI):
+    """ returns the full external id of a createTestCase RESPONSE or raises
+        TLResponseError, if the case has not been created (like a blocked 
+        duplicate) """
+    info = response[0].get('additionalInfo') or {}
+    if not info.get('status_ok', 1):
+        raise TLResponseError('createTestCase', argsAPI, 
+                              info.get('msg') or response[0].get('message'))
+    return '%s-%s' % (prefix, info['external_id'])
+
+def _testSteps(steps):
+    """ returns the list of createTestCase step dictionaries for STEPS """
+    testSteps = []
+    for (number, step) in enumerate(steps, 1):
+        if isinstance(step, dict):
+            step = dict(step)
+        else:
+            step = dict(zip(['actions', 'expected_results', 
+                             'execution_type'], step))
+        step.setdefault('step_number', str(number))
+        step['execution_type'] = str(step.get('execution_type', 1))
+        testSteps.append(step)
+    return testSteps
+
+def _uniqueNames(specs, heldBack, testsuiteid):
+    """ yields the test case SPECS, specs with a name already yielded for 
+        the same suite are appended to the list HELDBACK """
+    seen = set()
+    for spec in specs:
+        name = (str(spec.get('testsuiteid', testsuiteid)), 
+                spec['testcasename'])
+        if name in seen:
+            heldBack.append(spec)
+        else:
+            seen.add(name)
+            yield spec
+
+def _linkedCases(response):
+    """ returns a set of tuples (external id number, platform id) for the 
+        getTestCasesForTestPlan RESPONSE """
+    linked = set()
+    for entries in (response or {}).values():
+        # dictionary platform id -> entry or list of entries
+        if isinstance(entries, dict):
+            entries = entries.values()
+        for entry in entries:
+            linked.add((_externalNumber(entry['external_id']), 
+                        str(entry.get('platform_id', 0))))
+    return linked
+
+def _externalNumber(externalId):
+    """ returns the number of a test case EXTERNALID like 'NPROAPI-7' """
+    return str(externalId).rsplit('-', 1)[-1]
+
+def _chunks(iterable, size):
+    """ yields lists with up to SIZE items of ITERABLE """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
     
 if __name__ == "__main__":
     tl_helper = TestLinkHelper()
@@ -17,14 +17,31 @@
 #
 # ------------------------------------------------------------------------
 
+import socket
+import threading
+import time
 import xmlrpclib
+from contextlib import contextmanager
+from urllib import splittype, splithost
 import testlinkerrors
+from .testlinkbatch import TestlinkAPIBatch
+from .testlinkcodec import XmlRpcCodec
+from .testlinkstream import Base64File, StreamedRequest, hasStreamedContent
+from .testlinkretry import RetryPolicy, isReadOnlyMethod
+from .testlinkcoalesce import SingleFlight, requestKey
+from .testlinkcache import ResponseCache, TestCaseVersionCache, \
+NegativeResponse
+from .testlinkfutures import mapConcurrent
 from .testlinkhelper import TestLinkHelper, VERSION
-from .testlinkargs import getMethodsWithPositionalArgs, getArgsForMethod
+from .testlinkargs import getMethodsWithPositionalArgs, getArgsForMethod, \
+getResponseReplacement
 from .testlinkdecorators import decoApiCallAddAttachment,\
 decoApiCallAddDevKey, decoApiCallWithoutArgs, \
-decoMakerApiCallReplaceTLResponseError, decoMakerApiCallWithArgs 
+decoMakerApiCallReplaceTLResponseError, decoMakerApiCallWithArgs, \
+decoMakerApiCallCacheable, decoMakerApiCallInvalidates
 
+# marks an empty streamed response
+_NO_ITEM = object()
 
 class TestlinkAPIGeneric(object): 
     """ client for XML-RPC communication between Python and TestLink 
@@ -39,7 +56,10 @@ class TestlinkAPIGeneric(object):
         like TestlinkAPIClient
     """   
     
-    __slots__ = ['server', 'devKey', '_server_url', '_positionalArgNames']
+    __slots__ = ['server', 'devKey', '_server_url', '_positionalArgNames', 
+                 '_threadState', '_serverOptions', 'retryPolicy', 
+                 'defaultDeadline', 'throttle', 'circuitBreaker',
+                 'singleFlight', 'responseCache', 'testCaseCache']
  
     __version__ = VERSION
     __author__ = 'Luiko Czub, TestLink-API-Python-client developers'
@@ -49,11 +69,53 @@ class TestlinkAPIGeneric(object):
         encoding=args.get('encoding')
         verbose=args.get('verbose',0)
         allow_none=args.get('allow_none',0)
+        codec=args.get('codec')
         self.server = xmlrpclib.Server(server_url, transport, encoding, 
                                        verbose, allow_none)
+        if codec is not None and hasattr(self.server('transport'), 'codec'):
+            # transport parses the responses with the codec 
+            self.server('transport').codec = codec
         self.devKey = devKey
         self._server_url = server_url
+        # needed to build the requests for streamed calls
+        self._serverOptions = {'encoding' : encoding, 'verbose' : verbose,
+                               'allow_none' : allow_none, 'codec' : codec}
         self._positionalArgNames = getMethodsWithPositionalArgs()
+        # repeats read-only calls, which failed with a transient error
+        self.retryPolicy = args.get('retryPolicy')
+        if self.retryPolicy is None:
+            self.retryPolicy = RetryPolicy()
+        # max seconds for one api call including its retries, None means
+        # without limit - see also deadline()
+        self.defaultDeadline = args.get('deadline')
+        # limits the call rate and concurrency, None means no limits
+        self.throttle = args.get('throttle')
+        # fails fast, when the server is down, None means no circuit breaker
+        self.circuitBreaker = args.get('circuitBreaker')
+        # concurrent identical read-only calls share one response, if 
+        # 'coalesce' is True or a SingleFlight shared with other clients
+        self.singleFlight = args.get('coalesce')
+        if self.singleFlight is True:
+            self.singleFlight = SingleFlight()
+        elif not self.singleFlight:
+            self.singleFlight = None
+        # read-only calls are answered from the cache, if 'cache' is True or
+        # a ResponseCache shared with other clients
+        self.responseCache = args.get('cache')
+        if self.responseCache is True:
+            self.responseCache = ResponseCache()
+        elif self.responseCache is False:
+            self.responseCache = None
+        # getTestCase responses of a specific version are reused, if 
+        # 'testCaseCache' is True or a TestCaseVersionCache
+        self.testCaseCache = args.get('testCaseCache')
+        if self.testCaseCache is True:
+            self.testCaseCache = TestCaseVersionCache()
+        elif self.testCaseCache is False:
+            self.testCaseCache = None
+        # settings, which are only valid for the current thread, like an
+        # active batch
+        self._threadState = threading.local()
         
         
         
@@ -89,8 +151,23 @@ class TestlinkAPIGeneric(object):
     #     - to expand parameter list with key/value pairs
     #          'filename', 'filetype', 'content'
     #       from 'attachmentfile' before calling the server method
+    #
+    # Cache behavior for an optional response cache could be declared with
+    #
+    # @decoMakerApiCallCacheable(ttl)
+    #    - responses of this read-only method could be cached TTL seconds
+    # @decoMakerApiCallInvalidates(invalidations)
+    #    - this writing method makes cached responses invalid
+    #      - invalidations : dictionary invalidated method name -> list of 
+    #                        arg names whose values must match 
+    #
+    # Responses replaced with decoMakerApiCallReplaceTLResponseError (like 
+    # empty results) are cached for the shorter negativeTTL of the cache, also
+    # for methods without decoMakerApiCallCacheable. So the writing methods, 
+    # which fill these results, must declare the invalidation too.
 
 
+    @decoMakerApiCallCacheable(60)
     @decoApiCallAddDevKey            
     @decoMakerApiCallWithArgs(['testplanid'])
     def getLatestBuildForTestPlan(self):
@@ -119,17 +196,22 @@ class TestlinkAPIGeneric(object):
     def about(self):
         """ Gives basic information about the API """
 
+    @decoMakerApiCallInvalidates({
+            'getBuildsForTestPlan' : ['testplanid'],
+            'getLatestBuildForTestPlan' : ['testplanid']})
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['testplanid', 'buildname'], 
                               ['buildnotes'])
     def createBuild(self):
         """ Creates a new build for a specific test plan """
 
+    @decoMakerApiCallCacheable(300)
     @decoApiCallAddDevKey            
     @decoMakerApiCallWithArgs()
     def getProjects(self):
         """ Gets a list of all projects """
 
+    @decoMakerApiCallCacheable(300)
     @decoMakerApiCallReplaceTLResponseError()            
     @decoApiCallAddDevKey
     @decoMakerApiCallWithArgs(['testprojectid'])
@@ -138,6 +220,7 @@ class TestlinkAPIGeneric(object):
         
         returns an empty list, if no testplan is assigned """
 
+    @decoMakerApiCallCacheable(300)
     @decoMakerApiCallReplaceTLResponseError()          
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['testplanid'])
@@ -154,6 +237,8 @@ class TestlinkAPIGeneric(object):
         
         returns an empty list, if no build is assigned """
         
+    @decoMakerApiCallInvalidates({'getProjects' : [],
+            'getTestProjectByName' : ['testprojectname']})
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['testprojectname', 'testcaseprefix'],
                               ['notes', 'active', 'public', 'options'])
@@ -188,6 +273,10 @@ class TestlinkAPIGeneric(object):
         server return can be a list or a dictionary 
         - optional arg testprojectname seems to create a dictionary response """
  
+    @decoMakerApiCallInvalidates({'getTestCasesForTestSuite' : [],
+            'getTestSuitesForTestSuite' : [],
+            'getFirstLevelTestSuitesForTestProject' : ['testprojectid'],
+            'getTestCaseIDByName' : ['testcasename']})
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['testcasename', 'testsuiteid', 'testprojectid', 
                                'authorlogin', 'summary', 'steps'], 
@@ -205,6 +294,7 @@ class TestlinkAPIGeneric(object):
                 'expected_results' : "result C", 'execution_type' : 0}]
             """
 
+    @decoMakerApiCallInvalidates({'getTestCasesForTestPlan' : ['testplanid']})
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['testplanid', 'status'], 
                 ['testcaseid', 'testcaseexternalid', 'buildid', 'buildname', 
@@ -289,6 +379,10 @@ class TestlinkAPIGeneric(object):
 #     */
 #   public function addTestCaseToTestPlan($args)
 
+    @decoMakerApiCallInvalidates({
+            'getTestCasesForTestPlan' : ['testplanid'],
+            'getTestSuitesForTestPlan' : ['testplanid'],
+            'getTestCaseIDByName' : []})
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['testprojectid',
                                'testplanid', 'testcaseexternalid', 'version'],
@@ -345,6 +439,8 @@ class TestlinkAPIGeneric(object):
         The attachment file content is Base64 encoded. To save the file to disk 
         in client, Base64 decode the content and write file in binary mode.  """
 
+    @decoMakerApiCallInvalidates({'getTestSuitesForTestSuite' : [],
+            'getFirstLevelTestSuitesForTestProject' : ['testprojectid']})
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['testprojectid', 'testsuitename', 'details'], 
                               ['parentid', 'order', 'checkduplicatedname', 
@@ -352,11 +448,13 @@ class TestlinkAPIGeneric(object):
     def createTestSuite(self):
         """ create a test suite """
 
+    @decoMakerApiCallCacheable(300)
     @decoApiCallAddDevKey            
     @decoMakerApiCallWithArgs(['testprojectname'])
     def getTestProjectByName(self):
         """ Gets info about target test project """
 
+    @decoMakerApiCallCacheable(300)
     @decoApiCallAddDevKey            
     @decoMakerApiCallWithArgs(['testprojectname', 'testplanname'])
     def getTestPlanByName(self):
@@ -372,6 +470,8 @@ class TestlinkAPIGeneric(object):
         otherwise TL (<=1.9.8) returns 
         <ProtocolError for xmlrpc.php: 500 Internal Server Error>"""
 
+    @decoMakerApiCallInvalidates({'getProjectTestPlans' : [],
+            'getTestPlanByName' : ['testprojectname', 'testplanname']})
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['testplanname', 'testprojectname'], 
                               ['note', 'active', 'public'])
@@ -379,6 +479,7 @@ class TestlinkAPIGeneric(object):
         """ create a test plan """
 
 
+    @decoMakerApiCallCacheable(600)
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['nodeid'])
     def getFullPath(self):
@@ -402,6 +503,8 @@ class TestlinkAPIGeneric(object):
 #    */  
 #    public function deleteExecution($args)
 
+    # the plan of the execution is unknown, so all plans are invalidated
+    @decoMakerApiCallInvalidates({'getTestCasesForTestPlan' : []})
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['executionid'])
     def deleteExecution(self):
@@ -425,6 +528,7 @@ class TestlinkAPIGeneric(object):
         
         returns an empty list, if no TestSuite is assigned """
 
+    @decoMakerApiCallCacheable(300)
     @decoMakerApiCallReplaceTLResponseError(3041)            
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['testplanid'])
@@ -730,6 +834,8 @@ class TestlinkAPIGeneric(object):
 #      */
 #     public function getRequirementCustomFieldDesignValue($args)
 
+    @decoMakerApiCallInvalidates({'getTestCase' : ['testcaseexternalid', 
+                                                    'testcaseid']})
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['action', 'steps'], 
                               ['testcaseexternalid', 'testcaseid', 'version'])
@@ -749,6 +855,7 @@ class TestlinkAPIGeneric(object):
                   if all versions are INACTIVE, then latest version will be used. 
         """
 
+    @decoMakerApiCallInvalidates({'getTestCase' : ['testcaseexternalid']})
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['testcaseexternalid', 'steps'], 
                               ['version'])
@@ -807,6 +914,7 @@ class TestlinkAPIGeneric(object):
 #    */    
 #   public function setTestCaseExecutionType($args)
 
+    @decoMakerApiCallInvalidates({'getTestCase' : ['testcaseexternalid']})
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['testcaseexternalid', 'version', 'testprojectid',
                                'executiontype'])
@@ -821,6 +929,7 @@ class TestlinkAPIGeneric(object):
 #    */
 #   public function getExecCountersByBuild($args)
 
+    @decoMakerApiCallInvalidates({'getProjectPlatforms' : []})
     @decoApiCallAddDevKey               
     @decoMakerApiCallWithArgs(['testprojectname', 'platformname'], 
                               ['notes'])
@@ -828,6 +937,7 @@ class TestlinkAPIGeneric(object):
         """ Creates a platform for test project """
 
 
+    @decoMakerApiCallCacheable(300)
     @decoMakerApiCallReplaceTLResponseError(replaceValue={})            
     @decoApiCallAddDevKey
     @decoMakerApiCallWithArgs(['testprojectid'])
@@ -836,11 +946,13 @@ class TestlinkAPIGeneric(object):
         
         returns an empty dictionary, if no platform is assigned """
 
+    @decoMakerApiCallInvalidates({'getTestPlanPlatforms' : ['testplanid']})
     @decoApiCallAddDevKey
     @decoMakerApiCallWithArgs(['testplanid', 'platformname'])
     def addPlatformToTestPlan(self):
         """ Adds a platform to a test plan """
 
+    @decoMakerApiCallInvalidates({'getTestPlanPlatforms' : ['testplanid']})
     @decoApiCallAddDevKey
     @decoMakerApiCallWithArgs(['testplanid', 'platformname'])
     def removePlatformFromTestPlan(self):
@@ -930,6 +1042,7 @@ class TestlinkAPIGeneric(object):
     * ATTENTION: userApiKey will be set to NULL, because is worst that access to user password
     """
 
+    @decoMakerApiCallInvalidates({'getTestCase' : ['testcaseexternalid']})
     @decoApiCallAddDevKey
     @decoMakerApiCallWithArgs(['testcaseexternalid'], 
             ['version', 'testcasename','summary', 'preconditions', 'steps', 
@@ -971,16 +1084,374 @@ class TestlinkAPIGeneric(object):
             dictPos = self._convertPostionalArgs(methodNameAPI, argsPositional)
             # extent optional keys+values with positional keys+vales  
             argsOptional.update(dictPos)
+        # inside a batch, the call is only collected and send later 
+        batch = getattr(self._threadState, 'batch', None)
+        if batch is not None:
+            self._invalidateCache(methodNameAPI, argsOptional)
+            return batch._queueCall(methodNameAPI, argsOptional)
+        deadline = self._callDeadline()
+        if isReadOnlyMethod(methodNameAPI):
+            return self._callServerRead(deadline, methodNameAPI, argsOptional)
+        try:
+            return self._callServerChecked(deadline, methodNameAPI, 
+                                           argsOptional)
+        finally:
+            # also a failed call could have changed something
+            self._invalidateCache(methodNameAPI, argsOptional)
+
+    def callServerIterWithPosArgs(self, methodNameAPI, *argsPositional, 
+                                  **argsOptional):
+        """ streaming variant of callServerWithPosArgs - yields the elements
+        of the response, as soon as they are received, instead of returning 
+        the complete response at once. So the memory usage stays flat, even
+        for responses with 100000 elements.
+        
+        - array response  : yields each element
+        - struct response : yields (key, value) tuples
+        - other response  : yields the response as one element
+        
+        The first element is checked for TestLink error codes like the 
+        response of callServerWithPosArgs. A registered replacement for an
+        error (see decoMakerApiCallReplaceTLResponseError) is yielded the same
+        way as a response. devKey is added, if the api method expects it. 
+        
+        Streaming requires a transport with method iterRequest() like the 
+        default KeepAliveTransport, other transports read the complete 
+        response first. 
+        
+        Until the first element is received, the call is handled like any 
+        other call - the deadline, throttle, circuit breaker and retry policy
+        apply. Afterwards the deadline limits the rest of the stream, but a 
+        connection error while reading it is raised without a retry and is 
+        not counted by the circuit breaker. """
+
+        if argsPositional:
+            dictPos = self._convertPostionalArgs(methodNameAPI, argsPositional)
+            argsOptional.update(dictPos)
+        if not 'devKey' in argsOptional and \
+                        'devKey' in self._apiMethodArgNames(methodNameAPI)[1]:
+            argsOptional['devKey'] = self.devKey
+        deadline = self._callDeadline()
+        (items, first) = self.retryPolicy.callUntil(deadline, methodNameAPI, 
+                        self._callServerUntil, deadline, methodNameAPI, 
+                        argsOptional, self._openServerIter)
+        try:
+            if first is _NO_ITEM:
+                self._checkResponse([], methodNameAPI, argsOptional)
+            if not isinstance(first, tuple):
+                # TestLink error codes are send as first array element, 
+                # struct responses are (key, value) tuples and never errors
+                self._checkResponse([first], methodNameAPI, argsOptional)
+        except testlinkerrors.TLResponseError as tl_err:
+            items.close()
+            (found, replaceValue) = getResponseReplacement(methodNameAPI, 
+                                                           tl_err.code)
+            if not found:
+                raise
+            for item in self._iterResponseItems(replaceValue):
+                yield item
+            return
+        yield first
+        for item in items:
+            if deadline is not None and time.time() >= deadline:
+                items.close()
+                raise testlinkerrors.TLTimeoutError(
+                        'deadline exceeded while streaming %s' % methodNameAPI)
+            yield item
+
+    def iterTestCasesForTestPlan(self, *argsPositional, **argsOptional):
+        """ streaming variant of getTestCasesForTestPlan - same args
+        yields tuples (testcaseid, linked test case) - see 
+        callServerIterWithPosArgs """
+        return self.callServerIterWithPosArgs('getTestCasesForTestPlan', 
+                                              *argsPositional, **argsOptional)
+
+    def iterTestCasesForTestSuite(self, *argsPositional, **argsOptional):
+        """ streaming variant of getTestCasesForTestSuite - same args
+        yields the test cases - see callServerIterWithPosArgs """
+        return self.callServerIterWithPosArgs('getTestCasesForTestSuite', 
+                                              *argsPositional, **argsOptional)
+
+    @contextmanager
+    def deadline(self, seconds):
+        """ context manager, which limits all api calls of the current 
+        thread inside the block to SECONDS in total, including retries and 
+        the send of batched calls. 
+        A call, which exceeds the deadline, raises a TLTimeoutError.
+        
+         >>> with tls.deadline(60):
+         ...     tc = tls.getTestCase(testcaseid=tcid)
+         ...     tls.reportTCResult(tcid, planid, 'build 1', 'p', 'ok')
+        
+        Nested blocks could only shorten the deadline. The client-wide 
+        default for a single call is set with argument 'deadline' at 
+        creation or later with attribute defaultDeadline. 
+        
+        The deadline also limits the calls, which map() or the worker 
+        threads of TestlinkAPIClient.reportTCResults() send for this thread.
+        """
+        with self._absoluteDeadline(time.time() + seconds) as deadline:
+            yield deadline
+
+    @contextmanager
+    def _absoluteDeadline(self, deadline):
+        """ context manager like deadline(), but with the absolute time 
+        DEADLINE (like time.time()) """
+        previous = getattr(self._threadState, 'deadline', None)
+        if previous is not None and previous < deadline:
+            deadline = previous
+        self._threadState.deadline = deadline
+        try:
+            yield deadline
+        finally:
+            self._threadState.deadline = previous
+
+    def batch(self, chunkSize=100):
+        """ returns a TestlinkAPIBatch, which collects api calls and sends 
+        them with 'system.multicall' in chunks of CHUNKSIZE calls.
+        
+        Usage as context manager - the calls are send, when the block is left
+         >>> with tls.batch() as batch:
+         ...     r1 = batch.reportTCResult(tcid1, planid, 'build 1', 'p', 'ok')
+         ...     r2 = batch.reportTCResult(tcid2, planid, 'build 1', 'f', 'nok')
+         >>> r1.result()
+        
+        Inside the block, api methods called in the current thread return 
+        TLBatchResult placeholders. After the block, .result() returns the 
+        checked response or raises the TestLinkError of this call. 
+        """
+        return TestlinkAPIBatch(self, chunkSize)
+    
+    def map(self, methodNameAPI, argsIterable, workers=4, ordered=True, 
+            maxInFlight=None):
+        """ calls api method METHODNAMEAPI for each item of ARGSITERABLE in up
+        to WORKERS threads and yields tuples (item, response)
+        
+        item defines the arguments of one call 
+        - dictionary : optional args  -> methodNameAPI(**item)
+        - tuple      : positional args -> methodNameAPI(*item)
+        - other      : one positional arg -> methodNameAPI(item)
+        
+        ORDERED True  - responses are yielded in the order of ARGSITERABLE
+                False - responses are yielded as soon as they are received 
+        MAXINFLIGHT   - max number of calls send, but not yet yielded 
+                        default is 2 * WORKERS
+        
+        A call, which fails with a TestLinkError (like TLResponseError), does
+        not abort the run - instead of the response the error is yielded. 
+        
+        Example:
+         >>> for (tcid, response) in tls.map('getTestCase', tcids, workers=8):
+         ...     if isinstance(response, TestLinkError): 
+         ...         print tcid, 'failed', response
+        
+        With WORKERS > 1 the client must use a thread safe transport like
+        PooledTransport. 
+        """
+        self._checkThreadSafe('map', workers)
+        apiMethod = getattr(self, methodNameAPI, None)
+        if apiMethod is None:
+            def apiMethod(*argsPositional, **argsOptional):
+                return self.callServerWithPosArgs(methodNameAPI, 
+                                              *argsPositional, **argsOptional)
+        
+        def callApiMethod(item):
+            if isinstance(item, dict):
+                return apiMethod(**item)
+            if isinstance(item, tuple):
+                return apiMethod(*item)
+            return apiMethod(item)
+        
+        return mapConcurrent(self._withCallerDeadline(callApiMethod), 
+                             argsIterable, workers, ordered, maxInFlight)
+
+    def _withCallerDeadline(self, func):
+        """ returns FUNC or a wrapper of FUNC for a worker thread, which 
+        limits the calls of FUNC to the deadline of the current thread """
+        deadline = getattr(self._threadState, 'deadline', None)
+        if deadline is None:
+            return func
+        
+        def callWithDeadline(*args, **kwargs):
+            with self._absoluteDeadline(deadline):
+                return func(*args, **kwargs)
+        return callWithDeadline
+
+    def _checkThreadSafe(self, methodName, workers):
+        """ raises TLArgError, if METHODNAME should use several WORKERS 
+        without a thread safe transport """
+        if workers > 1:
+            transport = self.server('transport')
+            if not getattr(transport, 'threadSafe', False):
+                raise testlinkerrors.TLArgError(
+                    '%s with %i workers requires a thread safe transport '
+                    'like PooledTransport, not %s' % 
+                    (methodName, workers, transport.__class__.__name__))
+
+    def _activateBatch(self, batch):
+        """ collect api calls of the current thread in BATCH """
+        if getattr(self._threadState, 'batch', None) is not None:
+            raise testlinkerrors.TLArgError('nested batches are not supported')
+        self._threadState.batch = batch
+
+    def _deactivateBatch(self, batch):
+        """ stop collecting api calls of the current thread in BATCH """
+        if getattr(self._threadState, 'batch', None) is batch:
+            self._threadState.batch = None
+
+    #
+    #  internal methods for general server calls
+    #                                   
+
+    def _callDeadline(self):
+        """ returns the absolute deadline (like time.time()) for a call 
+        starting now or None, if the call is not limited """
+        deadline = getattr(self._threadState, 'deadline', None)
+        if self.defaultDeadline is not None:
+            callDeadline = time.time() + self.defaultDeadline
+            if deadline is None or callDeadline < deadline:
+                deadline = callDeadline
+        return deadline
+
+    def _callServerRead(self, deadline, methodNameAPI, argsAPI):
+        """ call read-only server method METHODNAMEAPI like 
+        _callServerChecked, but answer from the caches or share the response
+        of an identical running call, if possible
+        internal method - should not be called directly """
+        tcCache = None
+        if methodNameAPI == 'getTestCase':
+            tcCache = self.testCaseCache
+        if tcCache is not None:
+            (found, response) = tcCache.get(self._server_url, argsAPI)
+            if found:
+                return response
+            tcGeneration = tcCache.generation()
+        response = self._callServerCached(deadline, methodNameAPI, argsAPI)
+        if tcCache is not None:
+            tcCache.put(self._server_url, response, tcGeneration)
+        return response
+
+    def _callServerCached(self, deadline, methodNameAPI, argsAPI):
+        """ call read-only server method METHODNAMEAPI like 
+        _callServerChecked, but answer from the response cache or share the 
+        response of an identical running call, if possible
+        internal method - should not be called directly """
+        cache = self.responseCache
+        key = None
+        if cache is not None or self.singleFlight is not None:
+            key = requestKey(self._server_url, methodNameAPI, argsAPI)
+        if key is None:
+            return self._callServerChecked(deadline, methodNameAPI, argsAPI)
+        ttl = negativeTTL = None
+        if cache is not None:
+            ttl = cache.ttlFor(methodNameAPI)
+            negativeTTL = cache.negativeTTLFor(methodNameAPI)
+        if ttl or negativeTTL:
+            (found, response) = cache.get(key)
+            if not found:
+                (found, response) = cache.revalidate(key, 
+                    lambda name, args: self._callServerChecked(deadline, 
+                                                               name, args))
+            if found:
+                if isinstance(response, NegativeResponse):
+                    # the replacement decorator handles it like the original
+                    raise testlinkerrors.TLResponseError(methodNameAPI, 
+                                argsAPI, response.message, response.code)
+                return response
+            generation = cache.generation(methodNameAPI)
+        try:
+            if self.singleFlight is not None:
+                response = self.singleFlight.call(key, deadline, 
+                                    self._callServerChecked, deadline, 
+                                    methodNameAPI, argsAPI)
+            else:
+                response = self._callServerChecked(deadline, methodNameAPI, 
+                                                   argsAPI)
+        except testlinkerrors.TLResponseError as tl_err:
+            if negativeTTL and getResponseReplacement(methodNameAPI, 
+                                                      tl_err.code)[0]:
+                cache.put(key, methodNameAPI, argsAPI, 
+                          NegativeResponse(tl_err.message, tl_err.code), 
+                          negativeTTL, generation)
+            raise
+        if ttl:
+            cache.put(key, methodNameAPI, argsAPI, response, ttl, generation)
+        return response
+
+    def _invalidateCache(self, methodNameAPI, argsAPI):
+        """ drops the cached responses, which the writing server method 
+        METHODNAMEAPI makes invalid
+        internal method - should not be called directly """
+        if self.responseCache is not None:
+            self.responseCache.invalidateFor(methodNameAPI, argsAPI)
+        if self.testCaseCache is not None:
+            self.testCaseCache.invalidateFor(methodNameAPI, argsAPI)
+
+    def _callServerChecked(self, deadline, methodNameAPI, argsAPI):
+        """ call server method METHODNAMEAPI with retries and check the 
+        response
+        internal method - should not be called directly """
         # now, start calling the server with basic error handling
-        response = self._callServer(methodNameAPI, argsOptional)
+        # transient errors are retried as defined in the retry policy
+        response = self.retryPolicy.callUntil(deadline, methodNameAPI, 
+                        self._callServerUntil, deadline, methodNameAPI, 
+                        argsAPI)
         # check if response is not empyt and not includes error code
-        self._checkResponse(response, methodNameAPI, argsOptional) 
+        self._checkResponse(response, methodNameAPI, argsAPI) 
         # seams to be ok, so let give them the data
         return response
 
-    #
-    #  internal methods for general server calls
-    #                                   
+    def _callServerUntil(self, deadline, methodNameAPI, argsAPI=None, 
+                         sendFunc=None):
+        """ call server method METHODNAMEAPI like _callServer, but wait for 
+        the throttle, ask the circuit breaker and raise TLTimeoutError, if
+        the absolute time DEADLINE is exceeded
+        SENDFUNC replaces _callServer, like _openServerIter for streaming
+        The throttle waits outside of the circuit breaker, so a client side
+        wait is never counted as server failure. 
+        internal method - should not be called directly """
+        if deadline is not None and time.time() >= deadline:
+            raise testlinkerrors.TLTimeoutError(
+                        'deadline exceeded before calling %s' % methodNameAPI)
+        if self.throttle is None:
+            return self._callServerGuarded(deadline, methodNameAPI, argsAPI, 
+                                           sendFunc)
+        with self.throttle.limit(methodNameAPI, deadline):
+            return self._callServerGuarded(deadline, methodNameAPI, argsAPI, 
+                                           sendFunc)
+
+    def _callServerGuarded(self, deadline, methodNameAPI, argsAPI=None, 
+                           sendFunc=None):
+        """ call server method METHODNAMEAPI with _callServerWithDeadline, 
+        if the circuit breaker allows it
+        internal method - should not be called directly """
+        if self.circuitBreaker is None:
+            return self._callServerWithDeadline(deadline, methodNameAPI, 
+                                                argsAPI, sendFunc)
+        probeMethod = self.circuitBreaker.probeMethod
+        return self.circuitBreaker.call(methodNameAPI, 
+                self._callServerWithDeadline, 
+                lambda: self._callServerWithDeadline(deadline, probeMethod, 
+                                                     None),
+                deadline, methodNameAPI, argsAPI, sendFunc)
+
+    def _callServerWithDeadline(self, deadline, methodNameAPI, argsAPI, 
+                                sendFunc=None):
+        """ call server method METHODNAMEAPI with _callServer (or SENDFUNC)
+        and limit the transport to the DEADLINE
+        internal method - should not be called directly """
+        if sendFunc is None:
+            sendFunc = self._callServer
+        if deadline is None:
+            return sendFunc(methodNameAPI, argsAPI)
+        transport = self.server('transport')
+        if hasattr(transport, 'setDeadline'):
+            transport.setDeadline(deadline)
+        try:
+            return sendFunc(methodNameAPI, argsAPI)
+        finally:
+            if hasattr(transport, 'setDeadline'):
+                transport.setDeadline(None)
 
     def _callServer(self, methodNameAPI, argsAPI=None):
         """ call server method METHODNAMEAPI with error handling and 
@@ -988,15 +1459,31 @@ class TestlinkAPIGeneric(object):
         internal method - should not be called directly """
         
         response = None
+        # TestLink api methods are in name space 'tl', XML-RPC standard 
+        # methods like 'system.multicall' are called with there full name
+        serverProxy = self.server.tl
+        methodNameXMLRPC = 'tl.%s' % methodNameAPI
+        if methodNameAPI.startswith('system.'):
+            serverProxy = self.server
+            methodNameXMLRPC = methodNameAPI
+        params = ()
+        if argsAPI is not None:
+            params = (argsAPI,)
         try:
-            if argsAPI is None:
-                response = getattr(self.server.tl, methodNameAPI)()
+            if self._serverOptions['codec'] is not None or \
+                                        hasStreamedContent(params):
+                response = self._sendRequest(methodNameXMLRPC, params)
             else:
-                response = getattr(self.server.tl, methodNameAPI)(argsAPI)
+                response = getattr(serverProxy, methodNameAPI)(*params)
+        except socket.timeout, msg:
+            new_msg = 'timeout calling the TestLink Server %s\n%s' %\
+            (self._server_url, msg) 
+            raise testlinkerrors.TLTimeoutError(new_msg)
         except (IOError, xmlrpclib.ProtocolError), msg:
             new_msg = 'problems connecting the TestLink Server %s\n%s' %\
             (self._server_url, msg) 
-            raise testlinkerrors.TLConnectionError(new_msg)
+            raise testlinkerrors.TLConnectionError(new_msg, 
+                                                getattr(msg, 'errcode', None))
         except xmlrpclib.Fault, msg:
             new_msg = 'problems calling the API method %s\n%s' %\
             (methodNameAPI, msg) 
@@ -1005,6 +1492,94 @@ class TestlinkAPIGeneric(object):
         return response
     
         
+    def _openServerIter(self, methodNameAPI, argsAPI):
+        """ starts _callServerIter for server method METHODNAMEAPI and 
+        returns the tuple (items, first) after the first element of the 
+        response is received - first is _NO_ITEM for an empty response
+        internal method - should not be called directly """
+        items = self._callServerIter(methodNameAPI, argsAPI)
+        try:
+            first = items.next()
+        except StopIteration:
+            first = _NO_ITEM
+        return (items, first)
+
+    def _callServerIter(self, methodNameAPI, argsAPI):
+        """ call server method METHODNAMEAPI with error handling like 
+        _callServer and yields the elements of the response
+        internal method - should not be called directly """
+
+        transport = self.server('transport')
+        if not hasattr(transport, 'iterRequest'):
+            # transport could not stream
+            for item in self._iterResponseItems(
+                                self._callServer(methodNameAPI, argsAPI)):
+                yield item
+            return
+
+        (host, handler) = self._serverHostAndHandler()
+        request = self._dumpsRequest('tl.%s' % methodNameAPI, (argsAPI,))
+        try:
+            for item in transport.iterRequest(host, handler, request, 
+                                              self._serverOptions['verbose']):
+                yield item
+        except socket.timeout, msg:
+            new_msg = 'timeout calling the TestLink Server %s\n%s' %\
+            (self._server_url, msg) 
+            raise testlinkerrors.TLTimeoutError(new_msg)
+        except (IOError, xmlrpclib.ProtocolError), msg:
+            new_msg = 'problems connecting the TestLink Server %s\n%s' %\
+            (self._server_url, msg) 
+            raise testlinkerrors.TLConnectionError(new_msg, 
+                                                getattr(msg, 'errcode', None))
+        except xmlrpclib.Fault, msg:
+            new_msg = 'problems calling the API method %s\n%s' %\
+            (methodNameAPI, msg) 
+            raise testlinkerrors.TLAPIError(new_msg)
+
+    def _sendRequest(self, methodNameXMLRPC, params):
+        """ sends the request for METHODNAMEXMLRPC with the tuple PARAMS, 
+        build with the codec, and returns the response like the ServerProxy
+        internal method - should not be called directly """
+        (host, handler) = self._serverHostAndHandler()
+        request = self._dumpsRequest(methodNameXMLRPC, params)
+        response = self.server('transport').request(host, handler, request,
+                                            self._serverOptions['verbose'])
+        if len(response) == 1:
+            response = response[0]
+        return response
+
+    def _dumpsRequest(self, methodNameXMLRPC, params):
+        """ returns the XML-RPC request for METHODNAMEXMLRPC with the tuple 
+        PARAMS, build with the codec or the stock xmlrpclib marshaller 
+        - a StreamedRequest, if PARAMS includes a Base64File as content """
+        codec = self._serverOptions['codec']
+        if codec is None:
+            codec = XmlRpcCodec()
+        dumps = lambda x: codec.dumps(x, methodNameXMLRPC, 
+                                encoding=self._serverOptions['encoding'], 
+                                allow_none=self._serverOptions['allow_none'])
+        if hasStreamedContent(params):
+            return StreamedRequest.build(dumps, params)
+        return dumps(params)
+
+    def _serverHostAndHandler(self):
+        """ returns the tuple (host, handler) of the server url """
+        (host, handler) = splithost(splittype(self._server_url)[1])
+        return (host, handler or '/RPC2')
+
+    @staticmethod
+    def _iterResponseItems(response):
+        """ yields the elements of a complete RESPONSE like a streamed one """
+        if isinstance(response, dict):
+            for item in response.iteritems():
+                yield item
+        elif isinstance(response, list):
+            for item in response:
+                yield item
+        elif response:
+            yield response
+        
     def _convertPostionalArgs(self, methodName, valueList):        
         """ Returns a dictionary with values from VALUELIST and keys for 
             the expected positional argumenst of selfs method METHODNAME 
@@ -1033,17 +1608,35 @@ class TestlinkAPIGeneric(object):
 
         return ret
     
-    def _getAttachmentArgs(self, attachmentfile):
+    def _getAttachmentArgs(self, attachmentfile, streamed=True):
         """ returns dictionary with key/value pairs needed, to transfer 
             ATTACHMENTFILE via the api to into TL
-            ATTACHMENTFILE: python file descriptor pointing to the file """
+            ATTACHMENTFILE: python file descriptor pointing to the file 
+            STREAMED: True - content is a Base64File, which is read and 
+                      encoded chunk by chunk while the request is send, if 
+                      the transport could stream requests, the call is not 
+                      batched and the file is seekable 
+                      False - content is the base64 encoded file """
         import mimetypes
         import base64
         import os.path
-        return {'filename':os.path.basename(attachmentfile.name),
-                'filetype':mimetypes.guess_type(attachmentfile.name)[0],
-                'content':base64.encodestring(attachmentfile.read())
-                }
+        args = {'filename':os.path.basename(attachmentfile.name),
+                'filetype':mimetypes.guess_type(attachmentfile.name)[0]}
+        if streamed and self._streamsRequests():
+            try:
+                args['content'] = Base64File(attachmentfile)
+                return args
+            except IOError:
+                # not seekable - the size is unknown
+                pass
+        args['content'] = base64.encodestring(attachmentfile.read())
+        return args
+
+    def _streamsRequests(self):
+        """ returns True, if a request could be send as StreamedRequest """
+        transport = self.server('transport')
+        return getattr(transport, 'streamsRequests', False) and \
+               getattr(self._threadState, 'batch', None) is None
 
     
     def _checkResponse(self, response, methodNameAPI, argsOptional):
@@ -1144,6 +1737,36 @@ class TestlinkAPIGeneric(object):
                         
         return methDescr
     
+    def transportStats(self):
+        """ returns a copy of the transport counters (connects, reuses, ...)
+            or an empty dictionary, if the transport does not count """
+        
+        return dict(getattr(self.server('transport'), 'stats', {}))
+    
+    def circuitState(self):
+        """ returns the state of the circuit breaker
+        - 'closed'    : calls are send to the server
+        - 'open'      : server failed too often in a row, calls are rejected
+                        with TLCircuitOpenError until the cool-down is over
+        - 'half-open' : the next call probes, if the server is back
+        Without circuit breaker, the state is always 'closed'. """
+        if self.circuitBreaker is None:
+            return 'closed'
+        return self.circuitBreaker.state
+
+    def cacheStats(self):
+        """ returns a copy of the response cache counters (hits, misses, ...)
+            or an empty dictionary, if the client has no response cache """
+        
+        if self.responseCache is None:
+            return {}
+        return dict(self.responseCache.stats)
+
+    def retryStats(self):
+        """ returns a copy of the retry counters per api method """
+        
+        return dict(self.retryPolicy.retries)
+    
     def connectionInfo(self):
         """ print current SERVER URL and DEVKEY settings and servers VERSION """
 
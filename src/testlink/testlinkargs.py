@@ -34,9 +34,38 @@ supported TestLink API methods and there (positional and optional) arguments """
 #  mandatory Args
 _apiMethodsArgs = {}
 
+# hash, where the registered replacements for TestLink error responses are 
+# stored - see decoMakerApiCallReplaceTLResponseError
+#
+# definitions structure is
+# key(apiMethodeName) = { errorCode : replaceValue }
+# errorCode None stands for "Empty Result"
+_apiMethodsReplacements = {}
+
+# hash, where the cache time of read-only api methods, whose responses could 
+# be cached, are stored - see decoMakerApiCallCacheable
+#
+# definitions structure is
+# key(apiMethodeName) = seconds
+_apiMethodsCacheTTL = {}
+
+# hash, where the cached responses are stored, which a writing api method 
+# makes invalid - see decoMakerApiCallInvalidates
+#
+# definitions structure is
+# key(apiMethodeName) = { invalidatedApiMethodName : [argName, ...] }
+# a cached response is only invalid, if its args argName have the same value 
+# as the args of the writing call. An empty list means all responses of the
+# invalidated method.
+_apiMethodsInvalidations = {}
+
 def _resetRegister():
-    " clears all entries in _apiMethodsArgs"
+    """ clears all entries in _apiMethodsArgs, _apiMethodsReplacements, 
+        _apiMethodsCacheTTL and _apiMethodsInvalidations """
     _apiMethodsArgs.clear()
+    _apiMethodsReplacements.clear()
+    _apiMethodsCacheTTL.clear()
+    _apiMethodsInvalidations.clear()
     
 def _getMethodsArgDefinition(methodName):
     """ returns argument definition for api methodName """
@@ -81,6 +110,52 @@ def registerArgNonApi(methodName, argName):
     if not argName in nonApiArgs:
         nonApiArgs.append(argName)
     
+def registerResponseReplacement(methodName, errorCode, replaceValue):
+    """ Update _apiMethodsReplacements[methodName], so that a response with 
+        ERRORCODE is replaced with REPLACEVALUE """ 
+        
+    _apiMethodsReplacements.setdefault(methodName, {})[errorCode] = replaceValue
+
+def getResponseReplacement(methodName, errorCode):
+    """ returns for METHODNAME a tuple (found, replaceValue) 
+        found is False, if no replacement is registered for ERRORCODE """
+    
+    replacements = _apiMethodsReplacements.get(methodName, {})
+    if errorCode in replacements:
+        return (True, replacements[errorCode])
+    return (False, None)
+
+def hasResponseReplacement(methodName):
+    """ returns True, if a response replacement is registered for METHODNAME
+    """
+    
+    return methodName in _apiMethodsReplacements
+
+def registerCacheTTL(methodName, ttl):
+    """ Update _apiMethodsCacheTTL[methodName], so that responses could be 
+        cached TTL seconds """ 
+        
+    _apiMethodsCacheTTL[methodName] = ttl
+
+def getCacheTTL(methodName):
+    """ returns for METHODNAME the registered cache time in seconds or None,
+        if the responses should not be cached """
+    
+    return _apiMethodsCacheTTL.get(methodName)
+
+def registerInvalidation(methodName, invalidatedMethodName, argNames):
+    """ Update _apiMethodsInvalidations[methodName], so that a call of 
+        METHODNAME makes cached responses of INVALIDATEDMETHODNAME invalid, 
+        which args ARGNAMES have the same values """ 
+        
+    _apiMethodsInvalidations.setdefault(methodName, {})[
+                                        invalidatedMethodName] = argNames[:]
+
+def getInvalidations(methodName):
+    """ returns for METHODNAME a dictionary with the invalidated method names 
+        and there arg names, which values must match """
+    
+    return _apiMethodsInvalidations.get(methodName, {})
 
 def getMethodsWithPositionalArgs():
     """ returns a dictionary with method names and there positional args """
@@ -0,0 +1,126 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+from .testlinkapigeneric import TestlinkAPIGeneric
+from .testlinkapi import TestlinkAPIClient
+from .testlinkargs import getArgsForMethod
+from .testlinkerrors import TLArgError
+from .testlinkfutures import TLExecutor
+from .testlinktransport import newPooledTransport
+
+
+class AsyncTestlinkAPIGeneric(object):
+    """ non blocking client for XML-RPC communication between Python and
+        TestLink
+
+        Each TestLink API method, registered with the decorators of the
+        generic client TestlinkAPIGeneric, returns immediately a TLFuture.
+        The call itself is executed by one of WORKERS threads, which share
+        one TestlinkAPIGeneric client with a PooledTransport of WORKERS
+        connections. So up to WORKERS calls are in flight at the same time.
+
+         >>> tla = AsyncTestlinkAPIGeneric(server_url, devKey, workers=32)
+         >>> futures = [tla.getTestCase(testcaseid=x) for x in tcids]
+         >>> testcases = [f.result() for f in futures]
+
+        Response checks and errors are the same as for the generic client,
+        TLFuture.result() raises the TestLinkError of the call.
+
+        Methods, which only describe the client (like whatArgs) or return
+        lazy iterators (like iterTestCasesForTestPlan), are called directly 
+        and return their result. A deadline() block also limits the calls,
+        which are submitted inside the block.
+    """
+
+    # class of the synchronous client, which executes the calls
+    SYNC_CLASS = TestlinkAPIGeneric
+
+    # public methods of the synchronous client, which are not api calls
+    # and should not be executed by a worker thread
+    SYNC_METHODS = ['whatArgs', 'batch', 'map', 'transportStats', 
+                    'retryStats', 'deadline', 'callServerIterWithPosArgs', 
+                    'iterTestCasesForTestPlan', 'iterTestCasesForTestSuite',
+                    'circuitState', 'cacheStats']
+
+    __slots__ = ['client', '_executor']
+
+    def __init__(self, server_url, devKey, workers=8, **args):
+        if args.get('transport') is None:
+            args['transport'] = newPooledTransport(server_url, workers)
+        self.client = self.SYNC_CLASS(server_url, devKey, **args)
+        self._executor = TLExecutor(workers)
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name in self.__slots__:
+            raise AttributeError(name)
+        attr = getattr(self.client, name)
+        if not callable(attr) or name in self.SYNC_METHODS:
+            return attr
+
+        def asyncMethod(*argsPositional, **argsOptional):
+            # the worker keeps the deadline of the submitting thread
+            return self._executor.submit(self.client._withCallerDeadline(attr),
+                                         *argsPositional, **argsOptional)
+        asyncMethod.__name__ = name
+        asyncMethod.__doc__ = attr.__doc__
+        return asyncMethod
+
+    def apiMethodNames(self):
+        """ returns a list with the names of the api methods, registered by 
+            the decorators of the synchronous client """
+        names = []
+        for name in dir(self.SYNC_CLASS):
+            try:
+                getArgsForMethod(name)
+                names.append(name)
+            except TLArgError:
+                # not registered - service method or python internals
+                pass
+        return names
+
+    def submit(self, func, *args, **kwargs):
+        """ executes FUNC(client, *ARGS, **KWARGS) in a worker thread and
+            returns a TLFuture - usable for own service functions """
+        return self._executor.submit(self.client._withCallerDeadline(func), 
+                                     self.client, *args, **kwargs)
+
+    def close(self):
+        """ waits for the pending calls and stops the worker threads """
+        self._executor.shutdown()
+        self.client.server('close')()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class AsyncTestlinkAPIClient(AsyncTestlinkAPIGeneric):
+    """ non blocking variant of TestlinkAPIClient
+
+        API and service methods like copyTCnewVersion or countProjects return
+        a TLFuture. Attention: .initStep() and .appendStep() change the
+        .stepsList of the shared synchronous client and are called directly.
+    """
+
+    SYNC_CLASS = TestlinkAPIClient
+    SYNC_METHODS = AsyncTestlinkAPIGeneric.SYNC_METHODS + \
+                        ['initStep', 'appendStep', 'listProjects']
@@ -0,0 +1,188 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+from .testlinkargs import getResponseReplacement
+from .testlinkerrors import TestLinkError, TLAPIError, TLArgError, \
+TLResponseError
+
+__doc__ = """ This module defines the classes used by TestlinkAPIGeneric.batch()
+to collect api calls and send them with XML-RPC method 'system.multicall' in
+one or a few server round trips.
+
+Example:
+ >>> with tls.batch(chunkSize=50) as batch:
+ ...     r1 = batch.reportTCResult(tcid1, planid, 'build 1', 'p', 'notes 1')
+ ...     r2 = batch.reportTCResult(tcid2, planid, 'build 1', 'f', 'notes 2')
+ >>> r1.result()
+ [{'status': True, 'operation': 'reportTCResult', 'id': '4711', ...}]
+
+Inside the with block, the api methods of the client return TLBatchResult
+placeholders. When the block is left, the collected calls are send and each
+sub result is checked like a single call
+- responses with TestLink error codes are stored as TLResponseError
+- responses with error codes, which the api method replaces with a default
+  value (see decoMakerApiCallReplaceTLResponseError) gets this value
+- XML-RPC faults are stored as TLAPIError
+TLBatchResult.result() returns the response or raises the stored error.
+
+Service methods, which post process the server response (like
+TestlinkAPIClient.getTestCaseIDByName), gets only the placeholder and can not
+post process it.
+"""
+
+class TLBatchResult(object):
+    """ placeholder for the response of a batched api call """
+
+    __slots__ = ['methodNameAPI', 'argsAPI', '_response', '_error', '_done']
+
+    def __init__(self, methodNameAPI, argsAPI):
+        self.methodNameAPI = methodNameAPI
+        self.argsAPI = argsAPI
+        self._response = None
+        self._error = None
+        self._done = False
+
+    def done(self):
+        """ returns True, if the call has been send and the response checked """
+        return self._done
+
+    def failed(self):
+        """ returns True, if the response has been checked with an error """
+        return self._error is not None
+
+    def error(self):
+        """ returns the error of the response or None """
+        return self._error
+
+    def result(self):
+        """ returns the checked response or raises the response error """
+        if not self._done:
+            raise TestLinkError('batched call %s(%s) has not been send' %
+                                (self.methodNameAPI, self.argsAPI))
+        if self._error is not None:
+            raise self._error
+        return self._response
+
+    def _setResponse(self, response):
+        self._response = response
+        self._done = True
+
+    def _setError(self, error):
+        self._error = error
+        self._done = True
+
+    def __repr__(self):
+        state = 'pending'
+        if self._error is not None:
+            state = 'error: %s' % self._error
+        elif self._done:
+            state = 'response: %r' % (self._response,)
+        return '<TLBatchResult %s - %s>' % (self.methodNameAPI, state)
+
+
+class TestlinkAPIBatch(object):
+    """ collects api calls of CLIENT and sends them with 'system.multicall'
+
+        CHUNKSIZE defines the max number of calls send in one round trip.
+
+        Should be created with TestlinkAPIGeneric.batch() and used as context
+        manager. Attribute access is delegated to the client, so the api
+        methods could be called on the batch or on the client itself.
+    """
+
+    def __init__(self, client, chunkSize=100):
+        if chunkSize < 1:
+            raise TLArgError('chunkSize must be >= 1, not %s' % chunkSize)
+        self._client = client
+        self.chunkSize = chunkSize
+        self.calls = []
+        self._pending = []
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def __enter__(self):
+        self._client._activateBatch(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._client._deactivateBatch(self)
+        if exc_type is None:
+            self.send()
+        return False
+
+    def _queueCall(self, methodNameAPI, argsAPI):
+        """ stores the call and returns a TLBatchResult placeholder """
+        batchResult = TLBatchResult(methodNameAPI, argsAPI)
+        self.calls.append(batchResult)
+        self._pending.append(batchResult)
+        return batchResult
+
+    def send(self):
+        """ sends all pending calls in chunks of CHUNKSIZE and checks the sub
+            results. Returns the list of all TLBatchResult placeholders """
+        while self._pending:
+            chunk = self._pending[:self.chunkSize]
+            self._sendChunk(chunk)
+            del self._pending[:len(chunk)]
+        return self.calls
+
+    def _sendChunk(self, chunk):
+        """ sends the calls of CHUNK in one round trip """
+        multicallArgs = [{'methodName' : 'tl.%s' % batchResult.methodNameAPI,
+                          'params' : [batchResult.argsAPI]}
+                         for batchResult in chunk]
+        # the deadline of the client is also valid for the batched calls
+        responses = self._client._callServerUntil(
+                self._client._callDeadline(), 'system.multicall', multicallArgs)
+        if len(responses) != len(chunk):
+            raise TLResponseError('system.multicall', '%i calls' % len(chunk),
+                        'mismatching number of responses %i' % len(responses))
+        for (batchResult, response) in zip(chunk, responses):
+            self._checkSubResponse(batchResult, response)
+
+    def _checkSubResponse(self, batchResult, response):
+        """ checks the multicall RESPONSE for BATCHRESULT like a single call
+            would be checked """
+        methodNameAPI = batchResult.methodNameAPI
+        if isinstance(response, dict) and 'faultCode' in response:
+            new_msg = 'problems calling the API method %s\n<Fault %s: %r>' %\
+                (methodNameAPI, response['faultCode'], response['faultString'])
+            batchResult._setError(TLAPIError(new_msg))
+            return
+
+        # multicall wraps each single response into a list
+        response = response[0]
+        try:
+            self._client._checkResponse(response, methodNameAPI,
+                                        batchResult.argsAPI)
+        except TLResponseError as tl_err:
+            (found, replaceValue) = getResponseReplacement(methodNameAPI,
+                                                           tl_err.code)
+            if not found:
+                batchResult._setError(tl_err)
+                return
+            response = replaceValue
+        batchResult._setResponse(response)
+
+    def results(self):
+        """ returns list with the checked responses, failed calls are
+            represented by their error """
+        return [batchResult.error() or batchResult.result()
+                for batchResult in self.calls]
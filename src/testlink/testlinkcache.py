@@ -0,0 +1,720 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+import copy
+import cPickle
+import glob
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from .testlinkargs import getCacheTTL, getInvalidations, \
+hasResponseReplacement
+from .testlinkerrors import TLResponseError
+
+__doc__ = """ This module defines the response cache, which could be used as
+argument 'cache' of TestlinkAPIGeneric and TestlinkAPIClient
+
+ResponseCache
+   - read-through cache for read-only api methods like getProjects or
+     getBuildsForTestPlan, registered with decoMakerApiCallCacheable(ttl)
+   - entries expire after the ttl of their method and the least recently
+     used entries are dropped, if the cache exceeds maxSize
+   - writing api methods drop the cached responses, they make invalid - see
+     decoMakerApiCallInvalidates
+   - counts hits, misses, evictions and invalidations - see .stats
+   - error responses, which are replaced by decoMakerApiCallReplaceTLResponse-
+     Error (like empty results), are cached for the shorter negativeTTL
+SqliteStore
+   - base for the data stored in a sqlite database file, like the 
+     SqliteResponseCache or the testlinkjournal.ResultJournal
+SqliteResponseCache
+   - ResponseCache stored in a sqlite database file, which is shared by all
+     processes on a host, so that each new process (CI job) reuses the 
+     responses of the previous ones
+   - expired responses, which could be checked with a cheaper api call (like
+     getBuildsForTestPlan with the id of getLatestBuildForTestPlan), are 
+     revalidated instead of read again
+TestCaseVersionCache
+   - permanent cache for getTestCase responses of a specific test case 
+     version, which do not expire
+   - optional stored in a directory, so that following processes could 
+     use it too
+"""
+
+class NegativeResponse(object):
+    """ cached error response, which a replacement decorator handles - see
+        decoMakerApiCallReplaceTLResponseError """
+
+    __slots__ = ['message', 'code']
+
+    def __init__(self, message, code):
+        self.message = message
+        self.code = code
+
+    def __getstate__(self):
+        return (self.message, self.code)
+
+    def __setstate__(self, state):
+        (self.message, self.code) = state
+
+
+class _Entry(object):
+    """ one cached response """
+
+    __slots__ = ['methodName', 'args', 'response', 'expires']
+
+    def __init__(self, methodName, args, response, expires):
+        self.methodName = methodName
+        self.args = args
+        self.response = response
+        self.expires = expires
+
+
+class ResponseCache(object):
+    """ thread safe LRU cache for responses of read-only api methods
+
+        MAXSIZE     - max number of cached responses
+        METHODTTLS  - dictionary api method name -> seconds, which overrides
+                      the registered cache time of the method. 0 or None
+                      disables the cache for this method.
+        NEGATIVETTL - seconds, replaced error responses (like empty results)
+                      are cached - 0 or None disables it
+
+        get() returns a deep copy of the cached response, so that a caller
+        could change it without side effects.
+
+        .stats counts 'hits', 'misses', 'evictions' of least recently used
+        entries, 'expired' entries and 'invalidations' by writing calls
+
+        Example - cache also getTestCase responses for 10 minutes:
+         >>> cache = ResponseCache(maxSize=5000,
+         ...                       methodTTLs={'getTestCase' : 600})
+         >>> tls = TestLinkHelper().connect(TestlinkAPIClient, cache=cache)
+    """
+
+    def __init__(self, maxSize=1000, methodTTLs=None, negativeTTL=30):
+        if maxSize < 1:
+            raise ValueError('maxSize must be >= 1, not %s' % maxSize)
+        self.maxSize = maxSize
+        self.methodTTLs = methodTTLs or {}
+        self.negativeTTL = negativeTTL
+        self.stats = {'hits' : 0, 'misses' : 0, 'evictions' : 0,
+                      'expired' : 0, 'invalidations' : 0}
+        self._entries = OrderedDict()
+        # api method name -> number of invalidations, to detect responses
+        # which were invalidated while they were read from the server
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def ttlFor(self, methodNameAPI):
+        """ returns the cache time in seconds for METHODNAMEAPI or None, if
+            its responses are not cached """
+        if methodNameAPI in self.methodTTLs:
+            return self.methodTTLs[methodNameAPI] or None
+        return getCacheTTL(methodNameAPI)
+
+    def negativeTTLFor(self, methodNameAPI):
+        """ returns the cache time in seconds for replaced error responses of
+            METHODNAMEAPI or None, if they are not cached """
+        if self.methodTTLs.get(methodNameAPI, True) and \
+                                    hasResponseReplacement(methodNameAPI):
+            return self.negativeTTL or None
+        return None
+
+    def get(self, key):
+        """ returns a tuple (found, response) for KEY """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.time():
+                del self._entries[key]
+                self.stats['expired'] += 1
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return (False, None)
+            # mark as most recently used
+            del self._entries[key]
+            self._entries[key] = entry
+            self.stats['hits'] += 1
+        return (True, self._copy(entry.response))
+
+    def generation(self, methodNameAPI):
+        """ returns the invalidation counter of METHODNAMEAPI, which must be
+            passed to put() """
+        with self._lock:
+            return self._generations.get(methodNameAPI, 0)
+
+    def put(self, key, methodNameAPI, args, response, ttl, generation):
+        """ stores RESPONSE of METHODNAMEAPI called with the dictionary ARGS
+            under KEY for TTL seconds - but only, if the method was not
+            invalidated since GENERATION was requested """
+        with self._lock:
+            if self._generations.get(methodNameAPI, 0) != generation:
+                return
+            self._entries.pop(key, None)
+            self._entries[key] = _Entry(methodNameAPI, args,
+                                        self._copy(response), time.time() + ttl)
+            while len(self._entries) > self.maxSize:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def invalidateFor(self, methodNameAPI, args):
+        """ drops the cached responses, which the writing api method
+            METHODNAMEAPI called with the dictionary ARGS makes invalid """
+        for (invalidatedName, argNames) in \
+                                getInvalidations(methodNameAPI).items():
+            # without the matching args, all responses are dropped
+            self.invalidate(invalidatedName,
+                        dict([(x, args[x]) for x in argNames if x in args]))
+
+    def invalidate(self, methodNameAPI, matchArgs=None):
+        """ drops the cached responses of METHODNAMEAPI, which args include
+            all items of the dictionary MATCHARGS - None or {} drops all """
+        with self._lock:
+            self._generations[methodNameAPI] = \
+                                self._generations.get(methodNameAPI, 0) + 1
+            for (key, entry) in self._entries.items():
+                if entry.methodName != methodNameAPI:
+                    continue
+                if matchArgs and not _argsMatch(entry.args, matchArgs):
+                    continue
+                del self._entries[key]
+                self.stats['invalidations'] += 1
+
+    def clear(self):
+        """ drops all cached responses """
+        with self._lock:
+            for methodNameAPI in set([x.methodName
+                                      for x in self._entries.values()]):
+                self._generations[methodNameAPI] = \
+                                self._generations.get(methodNameAPI, 0) + 1
+            self._entries.clear()
+
+    def resetStats(self):
+        """ sets the counters back """
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+    def revalidate(self, key, call):
+        """ returns a tuple (found, response) for an expired KEY, which is 
+            still valid. CALL(methodNameAPI, args) sends the validation call.
+            This cache does not keep expired responses. """
+        return (False, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _copy(self, response):
+        return copy.deepcopy(response)
+
+
+class SqliteStore(object):
+    """ base for classes, which store their data in the sqlite database 
+        file PATH, shared by several threads and processes 
+        
+        TIMEOUT  - seconds to wait for a database lock of another process
+        FILEMODE - permissions of a new database file, like 0600 - None 
+                   uses the umask of the process
+    """
+
+    # PRAGMA synchronous of the connections, None keeps the sqlite default 
+    synchronous = None
+
+    def __init__(self, path, timeout=30.0, fileMode=None):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        dirName = os.path.dirname(path)
+        if dirName and not os.path.isdir(dirName):
+            os.makedirs(dirName)
+        if fileMode is not None and not os.path.exists(path):
+            # created before the first connect - sqlite creates the -wal 
+            # and -shm files with the permissions of the database file
+            os.close(os.open(path, os.O_CREAT | os.O_RDWR, fileMode))
+
+    def _connection(self):
+        """ returns the database connection of the current thread - a 
+            forked process opens its own connection """
+        if getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, 
+                                         isolation_level=None)
+            try:
+                # readers do not block the writer of another process
+                connection.execute('PRAGMA journal_mode=WAL')
+            except sqlite3.DatabaseError:
+                pass
+            if self.synchronous is not None:
+                connection.execute('PRAGMA synchronous=%s' % self.synchronous)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    @contextmanager
+    def _transaction(self):
+        """ locks the database for writing until the block is finished """
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+
+class SqliteResponseCache(ResponseCache, SqliteStore):
+    """ ResponseCache stored in the sqlite database file PATH - thread safe
+        and process safe, so several processes on one host could share it
+
+        MAXSIZE     - max number of cached responses
+        METHODTTLS  - dictionary api method name -> seconds, which overrides
+                      the registered cache time of the method
+        TIMEOUT     - seconds to wait for a database lock of another process
+        NEGATIVETTL - seconds, replaced error responses are cached
+
+        Keys are a hash of the server url, api method and args, so one file 
+        could be used for several TestLink servers. Invalidations of one 
+        process are also seen by the others. Responses are read from the 
+        file each time, so a caller gets always a copy.
+
+        Attention: the args of the cached calls are stored too - they 
+        include the devKey, which is needed to revalidate responses. Protect
+        the file like a credential (file permissions, no shared directory 
+        of other users).
+
+        Expired responses of api methods with a validator in REVALIDATORS are
+        kept and revalidated with a cheaper api call, before the response is
+        read again from the server.
+
+        .stats counts like ResponseCache plus 'revalidated' responses - only
+        for the calls of this process
+
+        Example - CI jobs reuse project, plan and build infos:
+         >>> cache = SqliteResponseCache('/var/tmp/testlink-cache.sqlite')
+         >>> tls = TestLinkHelper().connect(TestlinkAPIClient, cache=cache)
+    """
+
+    # with WAL, a crash could lose the last writes, but not corrupt the file 
+    # - acceptable for a cache
+    synchronous = 'NORMAL'
+
+    # a hit updates the last use time of a response for the LRU eviction only,
+    # if it is older than this fraction of the ttl - so most hits are reads
+    # without a write lock
+    USED_UPDATE_FRACTION = 0.25
+
+    # api method name -> (validator api method, arg names, check function)
+    # check(cachedResponse, validatorResponse) returns True, if the cached
+    # response is still valid
+    REVALIDATORS = {
+        'getBuildsForTestPlan' : ('getLatestBuildForTestPlan', 
+                                  ['devKey', 'testplanid'],
+                                  lambda builds, latest: 
+                                            _sameLatestBuild(builds, latest))
+                    }
+
+    def __init__(self, path, maxSize=100000, methodTTLs=None, timeout=30.0,
+                 negativeTTL=30):
+        super(SqliteResponseCache, self).__init__(maxSize, methodTTLs, 
+                                                  negativeTTL=negativeTTL)
+        # the stored args include the devKey
+        SqliteStore.__init__(self, path, timeout, fileMode=0600)
+        self.stats['revalidated'] = 0
+        with self._transaction() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS responses ('
+                       'key TEXT PRIMARY KEY, method TEXT, args BLOB, '
+                       'response BLOB, expires REAL, used REAL)')
+            db.execute('CREATE INDEX IF NOT EXISTS responses_method '
+                       'ON responses (method)')
+            db.execute('CREATE TABLE IF NOT EXISTS generations ('
+                       'method TEXT PRIMARY KEY, counter INTEGER)')
+
+    def get(self, key):
+        """ returns a tuple (found, response) for KEY """
+        now = time.time()
+        keyHash = _keyHash(key)
+        row = self._connection().execute('SELECT method, response, expires, '
+                    'used FROM responses WHERE key = ?', (keyHash,)).fetchone()
+        if row is not None and row[2] <= now:
+            self._count('expired')
+            # responses with validator are kept for revalidate()
+            if row[0] not in self.REVALIDATORS:
+                with self._transaction() as db:
+                    db.execute('DELETE FROM responses WHERE key = ? AND '
+                               'expires <= ?', (keyHash, now))
+            row = None
+        if row is None:
+            self._count('misses')
+            return (False, None)
+        ttl = self.ttlFor(row[0]) or self.negativeTTL or 0
+        if now - row[3] > ttl * self.USED_UPDATE_FRACTION:
+            with self._transaction() as db:
+                db.execute('UPDATE responses SET used = ? WHERE key = ?', 
+                           (now, keyHash))
+        self._count('hits')
+        return (True, _loads(row[1]))
+
+    def revalidate(self, key, call):
+        """ returns a tuple (found, response) for an expired KEY, which is 
+            still valid. CALL(methodNameAPI, args) sends the validation call.
+            """
+        row = self._connection().execute('SELECT method, args, response '
+                    'FROM responses WHERE key = ?', (_keyHash(key),)).fetchone()
+        if row is None or row[0] not in self.REVALIDATORS:
+            return (False, None)
+        (methodNameAPI, args, response) = (row[0], _loads(row[1]), 
+                                           _loads(row[2]))
+        (validatorName, argNames, check) = self.REVALIDATORS[methodNameAPI]
+        try:
+            validatorResponse = call(validatorName, dict([(x, args[x]) 
+                                             for x in argNames if x in args]))
+        except TLResponseError:
+            return (False, None)
+        if not check(response, validatorResponse):
+            return (False, None)
+        now = time.time()
+        with self._transaction() as db:
+            # no update, if the response was invalidated meanwhile
+            updated = db.execute('UPDATE responses SET expires = ?, used = ? '
+                        'WHERE key = ?', (now + self.ttlFor(methodNameAPI), 
+                                          now, _keyHash(key))).rowcount
+        if not updated:
+            return (False, None)
+        self._count('revalidated')
+        return (True, response)
+
+    def generation(self, methodNameAPI):
+        """ returns the invalidation counter of METHODNAMEAPI, which must be
+            passed to put() """
+        return self._generation(self._connection(), methodNameAPI)
+
+    def put(self, key, methodNameAPI, args, response, ttl, generation):
+        """ stores RESPONSE of METHODNAMEAPI called with the dictionary ARGS
+            under KEY for TTL seconds - but only, if the method was not
+            invalidated since GENERATION was requested """
+        now = time.time()
+        with self._transaction() as db:
+            if self._generation(db, methodNameAPI) != generation:
+                return
+            db.execute('INSERT OR REPLACE INTO responses VALUES '
+                       '(?, ?, ?, ?, ?, ?)', (_keyHash(key), methodNameAPI, 
+                       _dumps(args), _dumps(response), now + ttl, now))
+            tooMany = db.execute('SELECT COUNT(*) FROM responses'
+                                 ).fetchone()[0] - self.maxSize
+            if tooMany > 0:
+                db.execute('DELETE FROM responses WHERE key IN (SELECT key '
+                        'FROM responses ORDER BY used LIMIT ?)', (tooMany,))
+                self._count('evictions', tooMany)
+
+    def invalidate(self, methodNameAPI, matchArgs=None):
+        """ drops the cached responses of METHODNAMEAPI, which args include
+            all items of the dictionary MATCHARGS - None or {} drops all """
+        with self._transaction() as db:
+            self._nextGeneration(db, methodNameAPI)
+            keys = [key for (key, args) in db.execute('SELECT key, args FROM '
+                            'responses WHERE method = ?', (methodNameAPI,))
+                    if not matchArgs or _argsMatch(_loads(args), matchArgs)]
+            for key in keys:
+                db.execute('DELETE FROM responses WHERE key = ?', (key,))
+        self._count('invalidations', len(keys))
+
+    def clear(self):
+        """ drops all cached responses """
+        with self._transaction() as db:
+            for (methodNameAPI,) in db.execute('SELECT DISTINCT method '
+                                               'FROM responses').fetchall():
+                self._nextGeneration(db, methodNameAPI)
+            db.execute('DELETE FROM responses')
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM responses'
+                                          ).fetchone()[0]
+
+    def _generation(self, db, methodNameAPI):
+        row = db.execute('SELECT counter FROM generations WHERE method = ?',
+                         (methodNameAPI,)).fetchone()
+        return row[0] if row else 0
+
+    def _nextGeneration(self, db, methodNameAPI):
+        db.execute('INSERT OR REPLACE INTO generations VALUES (?, ?)', 
+                   (methodNameAPI, self._generation(db, methodNameAPI) + 1))
+
+    def _count(self, name, number=1):
+        with self._lock:
+            self.stats[name] += number
+
+
+class TestCaseVersionCache(object):
+    """ thread safe cache for getTestCase responses, keyed by test case id 
+        (or external id) and version
+
+        A response for a specific version is stored without expiration, cause
+        TestLink creates a new version for changes. Responses for the latest
+        version (getTestCase without arg version) are stored under the 
+        returned version number, so a later call with this version is 
+        answered from the cache. Writing api methods, which change an 
+        existing version like updateTestCase, drop all versions of the test 
+        case - see decoMakerApiCallInvalidates with 'getTestCase'.
+
+        MAXSIZE  - max number of responses kept in memory (LRU)
+        SPILLDIR - None: only memory
+                   directory: each response is also stored as file in this 
+                   directory and read again, if it is not in memory. Several
+                   processes could use the same directory.
+        
+        .stats counts 'hits', 'diskHits', 'misses', 'evictions' and 
+        'invalidations'
+
+        Example - copy thousands of test cases without refetching them:
+         >>> tcCache = TestCaseVersionCache(spillDir='/var/tmp/tl-tccache')
+         >>> tls = TestLinkHelper().connect(TestlinkAPIClient, 
+         ...                                testCaseCache=tcCache)
+         >>> tls.copyTCnewTestCase(tcid, origVersion=2, testsuiteid=suiteid)
+    """
+
+    # response field and arg names, which identify a test case
+    ID_NAMES = [('testcase_id', 'testcaseid'), 
+                ('full_tc_external_id', 'testcaseexternalid')]
+
+    def __init__(self, maxSize=10000, spillDir=None):
+        if maxSize < 1:
+            raise ValueError('maxSize must be >= 1, not %s' % maxSize)
+        self.maxSize = maxSize
+        self.spillDir = spillDir
+        if spillDir is not None and not os.path.isdir(spillDir):
+            os.makedirs(spillDir)
+        self.stats = {'hits' : 0, 'diskHits' : 0, 'misses' : 0, 
+                      'evictions' : 0, 'invalidations' : 0}
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, serverUrl, args):
+        """ returns a tuple (found, response) for a getTestCase call with the
+            dictionary ARGS on SERVERURL. Calls without version are never 
+            found. """
+        keys = self._keysForArgs(serverUrl, args)
+        if not keys:
+            return (False, None)
+        with self._lock:
+            response = self._entries.get(keys[0])
+            if response is not None:
+                del self._entries[keys[0]]
+                self._entries[keys[0]] = response
+                self.stats['hits'] += 1
+                return (True, copy.deepcopy(response))
+        response = self._load(keys[0])
+        with self._lock:
+            if response is None:
+                self.stats['misses'] += 1
+                return (False, None)
+            self.stats['diskHits'] += 1
+            self._store(self._keysForResponse(serverUrl, response), response)
+        return (True, copy.deepcopy(response))
+
+    def generation(self):
+        """ returns the invalidation counter, which must be passed to put() 
+        """
+        with self._lock:
+            return self._generation
+
+    def put(self, serverUrl, response, generation):
+        """ stores the getTestCase RESPONSE from SERVERURL - but only, if no 
+            test case was invalidated since GENERATION was requested """
+        keys = self._keysForResponse(serverUrl, response)
+        if not keys:
+            return
+        with self._lock:
+            if self._generation != generation:
+                return
+            response = copy.deepcopy(response)
+            self._store(keys, response)
+        for key in keys:
+            self._save(key, response)
+
+    def invalidateFor(self, methodNameAPI, args):
+        """ drops all versions of the test case, which the writing api 
+            method METHODNAMEAPI called with the dictionary ARGS changes """
+        if 'getTestCase' not in getInvalidations(methodNameAPI):
+            return
+        self.invalidate(args)
+
+    def invalidate(self, args):
+        """ drops all versions of the test case identified by 'testcaseid' 
+            or 'testcaseexternalid' in the dictionary ARGS - without these 
+            args all test cases are dropped """
+        ids = dict([(argName, str(args[argName])) 
+                    for (fieldName, argName) in self.ID_NAMES 
+                    if args.get(argName) is not None])
+        with self._lock:
+            self._generation += 1
+            for (key, response) in self._entries.items():
+                if not ids or _identifies(response, ids):
+                    del self._entries[key]
+                    self.stats['invalidations'] += 1
+        self._removeFiles(ids)
+
+    def clear(self):
+        """ drops all responses """
+        self.invalidate({})
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, keys, response):
+        """ stores RESPONSE in memory - must be called with acquired _lock """
+        for key in keys:
+            self._entries.pop(key, None)
+            self._entries[key] = response
+        while len(self._entries) > self.maxSize:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _keysForArgs(self, serverUrl, args):
+        version = args.get('version')
+        if version is None:
+            return []
+        return [(serverUrl, argName, str(args[argName]), str(version)) 
+                for (fieldName, argName) in self.ID_NAMES 
+                if args.get(argName) is not None]
+
+    def _keysForResponse(self, serverUrl, response):
+        if not (isinstance(response, list) and len(response) == 1 and 
+                isinstance(response[0], dict)):
+            return []
+        testcase = response[0]
+        version = testcase.get('version')
+        if version is None:
+            return []
+        return [(serverUrl, argName, str(testcase[fieldName]), str(version))
+                for (fieldName, argName) in self.ID_NAMES 
+                if testcase.get(fieldName) is not None]
+
+    def _fileName(self, key):
+        """ returns the file name for KEY in spillDir """
+        (serverUrl, argName, testcaseId, version) = key
+        return os.path.join(self.spillDir, '%s-%s-%s-%s.pickle' % (
+                hashlib.md5(serverUrl).hexdigest()[:12], argName, 
+                _fileSafe(testcaseId), _fileSafe(version)))
+
+    def _load(self, key):
+        if self.spillDir is None:
+            return None
+        return self._loadFile(self._fileName(key))
+
+    def _save(self, key, response):
+        if self.spillDir is None:
+            return
+        fileName = self._fileName(key)
+        # write a temporary file and rename it, so that another process 
+        # never reads a half written file
+        (fd, tmpName) = tempfile.mkstemp(dir=self.spillDir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as cacheFile:
+            cPickle.dump(response, cacheFile, 2)
+        os.rename(tmpName, fileName)
+
+    def _removeFiles(self, ids):
+        """ removes the files of all versions of the test case with IDS """
+        if self.spillDir is None:
+            return
+        if not ids:
+            fileNames = glob.glob(os.path.join(self.spillDir, '*.pickle'))
+        else:
+            fileNames = []
+            for (argName, testcaseId) in ids.items():
+                pattern = '*-%s-%s-*.pickle' % (argName, _fileSafe(testcaseId))
+                fileNames.extend(glob.glob(os.path.join(self.spillDir, 
+                                                        pattern)))
+            # files stored under the other id of the same test case 
+            otherIds = {}
+            for fileName in fileNames:
+                response = self._loadFile(fileName)
+                for (fieldName, argName) in self.ID_NAMES:
+                    if response and response[0].get(fieldName) is not None:
+                        otherIds[argName] = str(response[0][fieldName])
+            for (argName, testcaseId) in otherIds.items():
+                if ids.get(argName) != testcaseId:
+                    pattern = '*-%s-%s-*.pickle' % (argName, 
+                                                    _fileSafe(testcaseId))
+                    fileNames.extend(glob.glob(os.path.join(self.spillDir, 
+                                                            pattern)))
+        for fileName in set(fileNames):
+            try:
+                os.remove(fileName)
+            except OSError:
+                # removed meanwhile by another process
+                pass
+
+    def _loadFile(self, fileName):
+        try:
+            with open(fileName, 'rb') as cacheFile:
+                return cPickle.load(cacheFile)
+        except (IOError, EOFError, cPickle.UnpicklingError):
+            return None
+
+
+def _identifies(response, ids):
+    """ returns True, if the getTestCase RESPONSE belongs to the test case 
+        with one of the IDS (dictionary arg name -> id) """
+    testcase = response[0]
+    for (fieldName, argName) in TestCaseVersionCache.ID_NAMES:
+        if argName in ids and str(testcase.get(fieldName)) == ids[argName]:
+            return True
+    return False
+
+def _fileSafe(value):
+    """ returns VALUE with only characters usable in a file name """
+    return re.sub(r'[^A-Za-z0-9_.]', '_', value)
+
+def _keyHash(key):
+    """ returns the text stored as KEY - a hash, so the file does not show 
+        the args (like the devKey) in the key column """
+    return hashlib.sha256(repr(key)).hexdigest()
+
+def _dumps(value):
+    return sqlite3.Binary(cPickle.dumps(value, 2))
+
+def _loads(value):
+    return cPickle.loads(str(value))
+
+def _sameLatestBuild(builds, latest):
+    """ returns True, if the getLatestBuildForTestPlan response LATEST is
+        the build with the highest id of the getBuildsForTestPlan response 
+        BUILDS - so no build was added """
+    if isinstance(latest, list):
+        latest = latest and latest[0]
+    try:
+        return max([int(x['id']) for x in builds]) == int(latest['id'])
+    except (TypeError, KeyError, ValueError):
+        return False
+
+def _argsMatch(args, matchArgs):
+    """ returns True, if the dictionary ARGS includes all MATCHARGS - values
+        are compared as strings, cause ids are send as int or str """
+    for (name, value) in matchArgs.items():
+        if name in args and str(args[name]) != str(value):
+            return False
+    return True
@@ -0,0 +1,167 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+import threading
+import time
+from .testlinkerrors import TLConnectionError, TLCircuitOpenError
+
+__doc__ = """ This module defines the circuit breaker, which could be used as
+argument 'circuitBreaker' of TestlinkAPIGeneric and TestlinkAPIClient to stop
+calling a TestLink server, which is down
+
+CircuitBreaker
+   - closed    : calls are send to the server
+   - open      : after FAILURETHRESHOLD consecutive connection errors, calls
+                 fail fast with TLCircuitOpenError for COOLDOWN seconds
+   - half-open : after the cool-down, one probe call (sayHello) decides, if
+                 the circuit is closed again or stays open
+"""
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+class CircuitBreaker(object):
+    """ thread safe circuit breaker, could be shared by several clients
+        talking to the same server
+
+        FAILURETHRESHOLD - consecutive failed calls, which open the circuit
+        COOLDOWN         - seconds the circuit stays open before a probe call
+        PROBEMETHOD      - api method without args used as probe call
+        FAILON           - tuple of error classes counted as failed call
+
+        .stats counts how often the circuit was 'opened' and the calls
+        'rejected' while the circuit was open.
+
+        Example - fail fast for 60 seconds after 3 connection errors:
+         >>> breaker = CircuitBreaker(failureThreshold=3, coolDown=60)
+         >>> tls = TestLinkHelper().connect(TestlinkAPIClient,
+         ...                                circuitBreaker=breaker)
+         >>> if tls.circuitState() == 'open':
+         ...     print 'TestLink is down, results are not reported'
+    """
+
+    # api methods without args, which could probe the server
+    PROBE_METHODS = ('sayHello', 'ping')
+
+    def __init__(self, failureThreshold=5, coolDown=30.0,
+                 probeMethod='sayHello', failOn=(TLConnectionError,)):
+        if failureThreshold < 1:
+            raise ValueError('failureThreshold must be >= 1, not %s' %
+                             failureThreshold)
+        self.failureThreshold = failureThreshold
+        self.coolDown = coolDown
+        self.probeMethod = probeMethod
+        self.failOn = failOn
+        self.stats = {'opened' : 0, 'rejected' : 0}
+        self._failures = 0
+        self._openedAt = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """ 'closed', 'open' or 'half-open' """
+        with self._lock:
+            return self._state(time.time())
+
+    def _state(self, now):
+        if self._openedAt is None:
+            return CLOSED
+        if now < self._openedAt + self.coolDown or self._probing:
+            return OPEN
+        return HALF_OPEN
+
+    def call(self, methodNameAPI, func, probe, *args, **kwargs):
+        """ returns FUNC(*ARGS, **KWARGS), which calls api method
+            METHODNAMEAPI, if the circuit is closed
+
+            In state half-open, the callable PROBE sends the probe call
+            first. If METHODNAMEAPI is itself a probe method like sayHello,
+            the call is the probe.
+            raises TLCircuitOpenError, if the circuit is open """
+        isProbe = self._enter(methodNameAPI)
+        if isProbe and methodNameAPI not in self.PROBE_METHODS:
+            self._guard(probe)
+            isProbe = False
+        if isProbe:
+            return self._guard(func, *args, **kwargs)
+        try:
+            result = func(*args, **kwargs)
+        except self.failOn:
+            self._recordFailure()
+            raise
+        self._recordSuccess()
+        return result
+
+    def _enter(self, methodNameAPI):
+        """ returns True, if the caller must send the probe call, or raises
+            TLCircuitOpenError, if the circuit is open """
+        with self._lock:
+            state = self._state(time.time())
+            if state == CLOSED:
+                return False
+            if state == OPEN:
+                self.stats['rejected'] += 1
+                raise TLCircuitOpenError('circuit open, %s not send - '
+                    'server failed %i times in a row' %
+                    (methodNameAPI, self._failures))
+            self._probing = True
+            return True
+
+    def _guard(self, func, *args, **kwargs):
+        """ calls FUNC as probe call - closes the circuit after success or
+            opens it again for a new cool-down """
+        try:
+            result = func(*args, **kwargs)
+        except self.failOn:
+            with self._lock:
+                self._probing = False
+                self._open(time.time())
+            raise
+        except:
+            with self._lock:
+                self._probing = False
+            raise
+        with self._lock:
+            self._probing = False
+            self._failures = 0
+            self._openedAt = None
+        return result
+
+    def _recordFailure(self):
+        with self._lock:
+            self._failures += 1
+            if self._openedAt is None and \
+                            self._failures >= self.failureThreshold:
+                self._open(time.time())
+
+    def _recordSuccess(self):
+        with self._lock:
+            self._failures = 0
+
+    def _open(self, now):
+        self._openedAt = now
+        self.stats['opened'] += 1
+
+    def reset(self):
+        """ closes the circuit """
+        with self._lock:
+            self._failures = 0
+            self._openedAt = None
@@ -0,0 +1,129 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+import copy
+import sys
+import threading
+import time
+from .testlinkerrors import TLTimeoutError
+
+__doc__ = """ This module defines the request coalescing, which could be used
+as argument 'coalesce' of TestlinkAPIGeneric and TestlinkAPIClient
+
+SingleFlight
+   - concurrent identical read-only api calls (same method, same args) share
+     one server round trip, each thread gets its own copy of the response
+   - counts the 'calls' and the 'coalesced' calls, which waited for the
+     response of another thread - see .stats
+requestKey(serverUrl, methodNameAPI, argsAPI)
+   - returns the hashable key of a call or None
+"""
+
+class _Flight(object):
+    """ one running call and its outcome """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.excInfo = None
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    """ thread safe registry of running calls - a thread calling the same
+        key as a running call waits for its result instead of calling
+        again
+
+        Each waiting thread gets a deep copy of the result, so that a
+        caller could change its response without side effects.
+    """
+
+    def __init__(self):
+        self.stats = {'calls' : 0, 'coalesced' : 0}
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def call(self, key, deadline, func, *args, **kwargs):
+        """ returns FUNC(*ARGS, **KWARGS) or the result of a running call
+            with the same KEY, which is also raised, if it fails.
+            A waiting thread raises TLTimeoutError, if the running call does
+            not finish until the absolute time DEADLINE (like time.time()) """
+        with self._lock:
+            self.stats['calls'] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+                self.stats['coalesced'] += 1
+        if not leader:
+            return self._wait(flight, deadline)
+        try:
+            flight.result = func(*args, **kwargs)
+        except:
+            flight.excInfo = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        if flight.waiters:
+            # waiters copy flight.result now, the leader must not change it
+            return copy.deepcopy(flight.result)
+        return flight.result
+
+    def _wait(self, flight, deadline):
+        """ returns the result of FLIGHT, when it is done """
+        if deadline is None:
+            flight.done.wait()
+        else:
+            flight.done.wait(max(deadline - time.time(), 0))
+        if not flight.done.is_set():
+            raise TLTimeoutError('deadline exceeded while waiting for an '
+                                 'identical running call')
+        if flight.excInfo is not None:
+            raise flight.excInfo[0], flight.excInfo[1], flight.excInfo[2]
+        return copy.deepcopy(flight.result)
+
+    def resetStats(self):
+        """ sets the counters back """
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+
+def requestKey(serverUrl, methodNameAPI, argsAPI):
+    """ returns a hashable key for the call of api method METHODNAMEAPI with
+        the dictionary ARGSAPI on SERVERURL - independent of the order of
+        the args - or None, if the args are not hashable """
+    key = (serverUrl, methodNameAPI, _freeze(argsAPI))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+def _freeze(value):
+    """ returns VALUE with dictionaries and lists as sorted tuples """
+    if isinstance(value, dict):
+        return tuple(sorted([(k, _freeze(v)) for (k, v) in value.items()]))
+    if isinstance(value, (list, tuple)):
+        return tuple([_freeze(x) for x in value])
+    return value
@@ -0,0 +1,296 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+import xmlrpclib
+from types import NoneType
+try:
+    from xml.etree import cElementTree as ElementTree
+except ImportError:
+    ElementTree = None
+
+__doc__ = """ This module defines the codecs, which could be used as argument
+'codec' of TestlinkAPIGeneric and TestlinkAPIClient to convert the api calls
+into XML-RPC requests and the XML-RPC responses back into python values
+
+XmlRpcCodec
+   - the stock xmlrpclib marshaller and unmarshaller
+FastCodec
+   - marshaller with a pre-compiled type dispatch, which writes the tags of a
+     value with as few intermediate strings as possible
+   - unmarshaller, which lets the C-accelerated cElementTree parse the
+     complete response and converts the element tree in one pass.
+     Without cElementTree the stock unmarshaller is used.
+
+Responses are parsed with the codec, if the transport supports it, like
+KeepAliveTransport and PooledTransport - see attribute codec
+"""
+
+# True, if FastCodec parses the responses with cElementTree
+FAST_PARSER_AVAILABLE = ElementTree is not None
+
+
+class XmlRpcCodec(object):
+    """ codec using the stock xmlrpclib marshaller and unmarshaller """
+
+    name = 'xmlrpclib'
+
+    def dumps(self, params, methodname, encoding=None, allow_none=False):
+        """ returns the XML-RPC request for calling METHODNAME with the
+            tuple PARAMS """
+        return xmlrpclib.dumps(params, methodname, encoding=encoding,
+                               allow_none=allow_none)
+
+    def getparser(self, use_datetime=0):
+        """ returns a tuple (parser, unmarshaller) for a response
+            - parser.feed(data) and parser.close() parses the response
+            - unmarshaller.close() returns the response values as tuple """
+        return xmlrpclib.getparser(use_datetime)
+
+
+class FastCodec(XmlRpcCodec):
+    """ optimized codec for the dictionary heavy TestLink payloads
+
+        Requests and responses are the same as with XmlRpcCodec. Values of
+        types without fast dispatch (like DateTime or Binary) are marshalled
+        by the stock marshaller.
+    """
+
+    name = 'fast'
+
+    def dumps(self, params, methodname, encoding=None, allow_none=False):
+        """ returns the XML-RPC request for calling METHODNAME with the
+            tuple PARAMS """
+        if not encoding:
+            encoding = "utf-8"
+        marshaller = FastMarshaller(encoding, allow_none)
+        out = []
+        write = out.append
+        if encoding != "utf-8":
+            write("<?xml version='1.0' encoding='%s'?>\n" % str(encoding))
+        else:
+            write("<?xml version='1.0'?>\n")
+        if not isinstance(methodname, str):
+            methodname = methodname.encode(encoding, 'xmlcharrefreplace')
+        write("<methodCall>\n<methodName>")
+        write(methodname)
+        write("</methodName>\n<params>\n")
+        for value in params:
+            write("<param>\n")
+            marshaller.dump(value, write)
+            write("</param>\n")
+        write("</params>\n</methodCall>\n")
+        return ''.join(out)
+
+    def getparser(self, use_datetime=0):
+        """ returns a tuple (parser, unmarshaller) for a response """
+        if not FAST_PARSER_AVAILABLE:
+            return xmlrpclib.getparser(use_datetime)
+        unmarshaller = TreeUnmarshaller(use_datetime)
+        return (TreeParser(unmarshaller), unmarshaller)
+
+
+def _escape(value):
+    """ escapes the xml special chars of VALUE - only if it includes some """
+    if '&' in value or '<' in value or '>' in value:
+        return value.replace("&", "&amp;").replace("<", "&lt;").replace(
+                                                                ">", "&gt;")
+    return value
+
+class FastMarshaller(object):
+    """ XML-RPC marshaller with a pre-compiled type dispatch
+
+        dump(value, write) calls WRITE with the xml strings of VALUE """
+
+    dispatch = {}
+
+    def __init__(self, encoding='utf-8', allow_none=False):
+        self.encoding = encoding
+        self.allow_none = allow_none
+        self.memo = {}
+        self._stock = None
+
+    def dump(self, value, write):
+        try:
+            dumper = self.dispatch[type(value)]
+        except KeyError:
+            return self._dumpOther(value, write)
+        dumper(self, value, write)
+
+    def _dumpOther(self, value, write):
+        """ uses the stock marshaller for types without fast dispatch """
+        if self._stock is None:
+            self._stock = xmlrpclib.Marshaller(self.encoding, self.allow_none)
+            self._stock.memo = self.memo
+        # Marshaller has no public method to dump a single value
+        self._stock._Marshaller__dump(value, write)
+
+    def dump_nil(self, value, write):
+        if not self.allow_none:
+            raise TypeError("cannot marshal None unless allow_none is enabled")
+        write("<value><nil/></value>")
+    dispatch[NoneType] = dump_nil
+
+    def dump_bool(self, value, write):
+        write(value and "<value><boolean>1</boolean></value>\n" or
+                        "<value><boolean>0</boolean></value>\n")
+    dispatch[bool] = dump_bool
+
+    def dump_int(self, value, write):
+        if value > xmlrpclib.MAXINT or value < xmlrpclib.MININT:
+            raise OverflowError("int exceeds XML-RPC limits")
+        write("<value><int>")
+        write(str(int(value)))
+        write("</int></value>\n")
+    dispatch[int] = dump_int
+    dispatch[long] = dump_int
+
+    def dump_double(self, value, write):
+        write("<value><double>")
+        write(repr(value))
+        write("</double></value>\n")
+    dispatch[float] = dump_double
+
+    def dump_string(self, value, write):
+        write("<value><string>")
+        write(_escape(value))
+        write("</string></value>\n")
+    dispatch[str] = dump_string
+
+    def dump_unicode(self, value, write):
+        write("<value><string>")
+        write(_escape(value).encode(self.encoding, 'xmlcharrefreplace'))
+        write("</string></value>\n")
+    dispatch[unicode] = dump_unicode
+
+    def dump_array(self, value, write):
+        i = id(value)
+        if i in self.memo:
+            raise TypeError("cannot marshal recursive sequences")
+        self.memo[i] = None
+        dispatch = self.dispatch
+        write("<value><array><data>\n")
+        for item in value:
+            if type(item) in dispatch:
+                dispatch[type(item)](self, item, write)
+            else:
+                self._dumpOther(item, write)
+        write("</data></array></value>\n")
+        del self.memo[i]
+    dispatch[tuple] = dump_array
+    dispatch[list] = dump_array
+
+    def dump_struct(self, value, write):
+        i = id(value)
+        if i in self.memo:
+            raise TypeError("cannot marshal recursive dictionaries")
+        self.memo[i] = None
+        dispatch = self.dispatch
+        write("<value><struct>\n")
+        for (key, item) in value.iteritems():
+            if type(key) is str:
+                key = _escape(key)
+            elif type(key) is unicode:
+                key = _escape(key).encode(self.encoding, 'xmlcharrefreplace')
+            else:
+                raise TypeError("dictionary key must be string")
+            write("<member>\n<name>")
+            write(key)
+            write("</name>\n")
+            if type(item) in dispatch:
+                dispatch[type(item)](self, item, write)
+            else:
+                self._dumpOther(item, write)
+            write("</member>\n")
+        write("</struct></value>\n")
+        del self.memo[i]
+    dispatch[dict] = dump_struct
+
+
+class TreeParser(object):
+    """ parser, which collects the response in a cElementTree and hands the
+        complete tree over to the TreeUnmarshaller """
+
+    def __init__(self, unmarshaller):
+        self._parser = ElementTree.XMLParser()
+        self._unmarshaller = unmarshaller
+
+    def feed(self, data):
+        self._parser.feed(data)
+
+    def close(self):
+        self._unmarshaller._root = self._parser.close()
+
+class TreeUnmarshaller(object):
+    """ converts the element tree of a response into python values """
+
+    def __init__(self, use_datetime=0):
+        self._use_datetime = use_datetime
+        self._root = None
+
+    def getmethodname(self):
+        return None
+
+    def close(self):
+        """ returns the response values as tuple or raises the Fault """
+        if self._root is None:
+            raise xmlrpclib.ResponseError()
+        fault = self._root.find('fault/value')
+        if fault is not None:
+            raise xmlrpclib.Fault(**self.value(fault))
+        return tuple([self.value(param.find('value'))
+                      for param in self._root.iter('param')])
+
+    def value(self, element):
+        """ returns the python value for a <value> ELEMENT """
+        if len(element) == 0:
+            # <value> without type tag is a string
+            return element.text or ''
+        typed = element[0]
+        tag = typed.tag
+        if tag == 'string':
+            return typed.text or ''
+        if tag == 'struct':
+            struct = {}
+            for member in typed:
+                struct[member.find('name').text or ''] = \
+                                        self.value(member.find('value'))
+            return struct
+        if tag == 'array':
+            return [self.value(item) for item in typed.find('data')]
+        if tag in ('int', 'i4', 'i8'):
+            return int(typed.text)
+        if tag == 'boolean':
+            if typed.text == '1':
+                return True
+            if typed.text == '0':
+                return False
+            raise TypeError("bad boolean value")
+        if tag == 'double':
+            return float(typed.text)
+        if tag == 'nil':
+            return None
+        if tag == 'dateTime.iso8601':
+            if self._use_datetime:
+                return xmlrpclib._datetime_type(typed.text)
+            return xmlrpclib.DateTime(typed.text)
+        if tag == 'base64':
+            binary = xmlrpclib.Binary()
+            binary.decode(typed.text or '')
+            return binary
+        raise xmlrpclib.ResponseError("unknown tag %r" % tag)
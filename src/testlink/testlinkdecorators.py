@@ -18,7 +18,9 @@
 # ------------------------------------------------------------------------
 
 from functools import wraps
-from .testlinkargs import registerMethod, registerArgOptional, registerArgNonApi
+from .testlinkargs import registerMethod, registerArgOptional, \
+registerArgNonApi, registerResponseReplacement, registerCacheTTL, \
+registerInvalidation
 from .testlinkerrors import TLResponseError
 
 __doc__ = """ This internal module defines the decorator functions, which are 
@@ -53,6 +55,15 @@ Additional behavior could be added with
     - to expand parameter list with key/value pairs
          'filename', 'filetype', 'content'
       from 'attachmentfile' before calling the server method
+
+Cache behavior for an optional response cache could be declared with 
+   
+@decoMakerApiCallCacheable(ttl)
+   - responses of this read-only method could be cached TTL seconds
+@decoMakerApiCallInvalidates(invalidations)
+   - this writing method makes cached responses invalid
+     - invalidations : dictionary invalidated method name -> list of arg names
+                       whose values must match 
 """
 
 
@@ -126,6 +137,10 @@ def decoMakerApiCallReplaceTLResponseError(replaceCode=None, replaceValue=[]):
     
     def decoApiCallReplaceTLResponseError(methodAPI):
         """ Decorator to replace an TLResponseError with an empty list """
+        # register the replacement, so that batched calls, which responses 
+        # are checked later, could handle it the same way
+        registerResponseReplacement(methodAPI.__name__, replaceCode, 
+                                    replaceValue)
         @wraps(methodAPI)  
         def wrapperReplaceTLResponseError(self, *argsPositional, **argsOptional):
             response = None
@@ -161,3 +176,32 @@ def decoApiCallAddAttachment(methodAPI):
         return methodAPI(self, *argsPositional, **argsAttachment)
     return wrapperAddAttachment
 
+
+def decoMakerApiCallCacheable(ttl=300):
+    """ creates a decorator, which registers, that responses of a read-only
+        server method could be cached TTL seconds """
+    
+    def decoApiCallCacheable(methodAPI):
+        """ Decorator to register the cache time of a server method """
+        registerCacheTTL(methodAPI.__name__, ttl)
+        return methodAPI
+    return decoApiCallCacheable
+
+def decoMakerApiCallInvalidates(invalidations):
+    """ creates a decorator, which registers the cached responses, which a 
+        writing server method makes invalid
+        
+     INVALIDATIONS is a dictionary with the invalidated method names and a 
+     list of arg names. Only cached responses with the same values for these
+     args as the writing call are invalid. Example for createBuild:
+       {'getBuildsForTestPlan' : ['testplanid']}  
+     An empty list invalidates all cached responses of the method. 
+     """
+
+    def decoApiCallInvalidates(methodAPI):
+        """ Decorator to register the cache invalidations of a server method 
+        """
+        for (invalidatedName, argNames) in invalidations.items():
+            registerInvalidation(methodAPI.__name__, invalidatedName, argNames)
+        return methodAPI
+    return decoApiCallInvalidates
@@ -29,7 +29,26 @@ class TestLinkError(Exception):
 
 class TLConnectionError(TestLinkError):
     """ Connection error 
-    - wrong url? - server not reachable? """
+    - wrong url? - server not reachable? 
+    errcode is the HTTP status of a protocol error, otherwise None """
+    
+    def __init__(self, msg, errcode=None):
+        self.errcode = errcode
+        super(TLConnectionError, self).__init__(msg)
+    
+class TLTimeoutError(TLConnectionError):
+    """ Timeout error 
+    - server does not answer in time? - deadline of the call exceeded? """
+    
+class TLCircuitOpenError(TLConnectionError):
+    """ Circuit open error 
+    - server failed too often in a row, the call is not send """
+    
+class TLPoolTimeoutError(TestLinkError):
+    """ Pool timeout error 
+    - all connections of the client pool are busy, the call is not send. 
+      A client side error, so it is neither retried nor counted by a 
+      circuit breaker as server failure """
     
 class TLAPIError(TestLinkError):
     """ API error 
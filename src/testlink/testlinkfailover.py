@@ -0,0 +1,380 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+import errno
+import httplib
+import re
+import socket
+import threading
+import time
+import xmlrpclib
+from urllib import splittype, splithost
+from .testlinkerrors import TLConnectionError
+from .testlinkretry import isReadOnlyMethod
+from .testlinktransport import newKeepAliveTransport
+
+__doc__ = """ This module defines a transport for several TestLink server
+endpoints (like PHP frontends behind a load balancer using the same
+database), which could be used as argument 'transport' of TestlinkAPIGeneric
+and TestlinkAPIClient
+
+FailoverTransport
+   - spreads read-only api calls round-robin or to the endpoint with the
+     least latency
+   - sends writing api calls always to the same endpoint (sticky), until it
+     fails
+   - repeats a call on the next endpoint, if an endpoint is not reachable
+   - checks endpoints marked as down with sayHello and uses them again
+
+newFailoverTransport(serverUrls) returns a FailoverTransport with a
+keep-alive transport for each url of the list SERVERURLS
+"""
+
+# socket error numbers, which proof that a request has not reached the server
+NOT_SENT_ERRNOS = (errno.ECONNREFUSED, errno.EHOSTUNREACH, errno.ENETUNREACH)
+
+# HTTP status of a proxy or web server, which could not call TestLink
+FAILOVER_HTTP_STATUS = (502, 503, 504)
+
+# errors of an endpoint, which lets a read-only call failover
+FAILOVER_ERRORS = (socket.error, httplib.HTTPException, xmlrpclib.ProtocolError)
+
+# weight of the last request in the average latency of an endpoint
+LATENCY_WEIGHT = 0.3
+
+_METHOD_NAME = re.compile(r'<methodName>([^<]+)</methodName>')
+
+class Endpoint(object):
+    """ one TestLink server URL with its own TRANSPORT and health state """
+
+    def __init__(self, url, transport):
+        self.url = url
+        (self.host, self.handler) = splithost(splittype(url)[1])
+        if not self.handler:
+            self.handler = '/RPC2'
+        self.transport = transport
+        self.healthy = True
+        # time, when the endpoint was marked as down
+        self.downSince = None
+        # average seconds per request, None means not yet measured
+        self.latency = None
+        self.requests = 0
+        self.failures = 0
+
+    def recordLatency(self, seconds):
+        self.requests += 1
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += LATENCY_WEIGHT * (seconds - self.latency)
+
+    def markDown(self):
+        self.failures += 1
+        self.healthy = False
+        self.downSince = time.time()
+
+    def markUp(self):
+        self.healthy = True
+        self.downSince = None
+
+
+class FailoverTransport(object):
+    """ xmlrpclib compatible transport, which sends the requests to one of
+        several ENDPOINTS (list of Endpoint)
+
+        SELECTION - 'round-robin'  : read-only calls use the healthy
+                                     endpoints in turn
+                    'least-latency': read-only calls use the healthy endpoint
+                                     with the smallest average latency
+        RECHECKAFTER - seconds, after which an endpoint marked as down is
+                       checked with sayHello again
+
+        Writing calls (everything except get*, does*, check*, ...) stick to
+        one endpoint and move to the next one only, if the connection was
+        refused, so a write is never send twice. Read-only calls move to the
+        next endpoint for any connection error, timeout or HTTP status 502,
+        503 and 504.
+
+        .stats counts the 'requests', the 'failovers' to another endpoint
+        and the 'healthChecks'. endpointStats() returns the state of each
+        endpoint.
+
+        Example - two PHP frontends, reads go to the fastest:
+         >>> transport = newFailoverTransport(
+         ...     ['http://tl1/lib/api/xmlrpc/v1/xmlrpc.php',
+         ...      'http://tl2/lib/api/xmlrpc/v1/xmlrpc.php'],
+         ...     selection='least-latency')
+         >>> tls = TestLinkHelper().connect(TestlinkAPIClient,
+         ...                                transport=transport)
+    """
+
+    SELECTIONS = ('round-robin', 'least-latency')
+
+    def __init__(self, endpoints, selection='round-robin', recheckAfter=10.0):
+        if not endpoints:
+            raise ValueError('at least one endpoint is required')
+        if selection not in self.SELECTIONS:
+            raise ValueError('selection must be one of %s, not %s' %
+                             (self.SELECTIONS, selection))
+        self.endpoints = list(endpoints)
+        self.selection = selection
+        self.recheckAfter = recheckAfter
+        self.stats = {'requests' : 0, 'failovers' : 0, 'healthChecks' : 0}
+        self._writeEndpoint = self.endpoints[0]
+        self._nextRead = 0
+        self._lock = threading.Lock()
+        # deadline of the current thread - see setDeadline()
+        self._callState = threading.local()
+
+    @property
+    def threadSafe(self):
+        """ True, if all endpoint transports are thread safe """
+        return all([getattr(x.transport, 'threadSafe', False)
+                    for x in self.endpoints])
+
+    @property
+    def streamsRequests(self):
+        """ True, if all endpoint transports could send a StreamedRequest """
+        return all([getattr(x.transport, 'streamsRequests', False)
+                    for x in self.endpoints])
+
+    def _getCodec(self):
+        return self.endpoints[0].transport.codec
+
+    def _setCodec(self, codec):
+        for endpoint in self.endpoints:
+            endpoint.transport.codec = codec
+
+    # codec used by all endpoint transports to parse the responses
+    codec = property(_getCodec, _setCodec)
+
+    def setDeadline(self, deadline):
+        """ limits the requests of the current thread on all endpoints """
+        self._callState.deadline = deadline
+        for endpoint in self.endpoints:
+            if hasattr(endpoint.transport, 'setDeadline'):
+                endpoint.transport.setDeadline(deadline)
+
+    def request(self, host, handler, request_body, verbose=0):
+        """ sends REQUEST_BODY to a selected endpoint and returns the parsed
+            response - HOST and HANDLER of the client are ignored """
+        self._count('requests')
+        readOnly = _isReadOnlyRequest(request_body)
+        tried = []
+        while True:
+            endpoint = self._selectEndpoint(readOnly, tried)
+            start = time.time()
+            try:
+                response = endpoint.transport.request(endpoint.host,
+                                endpoint.handler, request_body, verbose)
+            except FAILOVER_ERRORS, error:
+                self._handleError(endpoint, error, readOnly, tried)
+                continue
+            with self._lock:
+                endpoint.recordLatency(time.time() - start)
+            return response
+
+    def iterRequest(self, host, handler, request_body, verbose=0):
+        """ streams the response of REQUEST_BODY from a selected endpoint
+            - a failover is only possible until the first element is
+              received """
+        self._count('requests')
+        readOnly = _isReadOnlyRequest(request_body)
+        tried = []
+        while True:
+            endpoint = self._selectEndpoint(readOnly, tried)
+            start = time.time()
+            items = self._iterEndpoint(endpoint, request_body, verbose)
+            try:
+                first = items.next()
+            except StopIteration:
+                first = items = None
+            except FAILOVER_ERRORS, error:
+                self._handleError(endpoint, error, readOnly, tried)
+                continue
+            with self._lock:
+                endpoint.recordLatency(time.time() - start)
+            break
+        if items is None:
+            return
+        yield first
+        for item in items:
+            yield item
+
+    def _iterEndpoint(self, endpoint, request_body, verbose):
+        """ yields the response elements from ENDPOINT """
+        if not hasattr(endpoint.transport, 'iterRequest'):
+            response = endpoint.transport.request(endpoint.host,
+                                    endpoint.handler, request_body, verbose)
+            for item in _iterItems(response[0]):
+                yield item
+            return
+        for item in endpoint.transport.iterRequest(endpoint.host,
+                                    endpoint.handler, request_body, verbose):
+            yield item
+
+    def _handleError(self, endpoint, error, readOnly, tried):
+        """ marks ENDPOINT as down and returns, if the request could be
+            repeated on another endpoint, otherwise ERROR is raised again """
+        deadline = getattr(self._callState, 'deadline', None)
+        if deadline is not None and time.time() >= deadline:
+            # the call is out of time, not the endpoint
+            raise
+        if isinstance(error, xmlrpclib.ProtocolError) and \
+                        error.errcode not in FAILOVER_HTTP_STATUS:
+            raise
+        with self._lock:
+            endpoint.markDown()
+        tried.append(endpoint)
+        if not (readOnly or _isNotSentError(error)):
+            raise
+        if len(tried) == len(self.endpoints):
+            raise
+        self._count('failovers')
+
+    def _selectEndpoint(self, readOnly, tried):
+        """ returns the endpoint for the next try of a request """
+        self._recheckEndpoints()
+        with self._lock:
+            candidates = [x for x in self.endpoints
+                          if x.healthy and x not in tried]
+            if not candidates:
+                # all are marked as down - try the one down for longest
+                candidates = sorted([x for x in self.endpoints
+                                     if x not in tried],
+                                    key=lambda x: x.downSince)
+                return candidates[0]
+            if not readOnly:
+                if self._writeEndpoint not in candidates:
+                    self._writeEndpoint = candidates[0]
+                return self._writeEndpoint
+            if self.selection == 'least-latency':
+                return min(candidates, key=lambda x: x.latency or 0.0)
+            endpoint = candidates[self._nextRead % len(candidates)]
+            self._nextRead += 1
+            return endpoint
+
+    def _recheckEndpoints(self):
+        """ checks endpoints, which are down longer than recheckAfter """
+        now = time.time()
+        with self._lock:
+            due = [x for x in self.endpoints if not x.healthy and
+                   now - x.downSince >= self.recheckAfter]
+            for endpoint in due:
+                # other threads do not check it again meanwhile
+                endpoint.downSince = now
+        for endpoint in due:
+            self._checkEndpoint(endpoint)
+
+    def _checkEndpoint(self, endpoint):
+        """ calls sayHello on ENDPOINT and returns True, if it answers """
+        self._count('healthChecks')
+        try:
+            endpoint.transport.request(endpoint.host, endpoint.handler,
+                                       xmlrpclib.dumps((), 'tl.sayHello'))
+        except (FAILOVER_ERRORS + (xmlrpclib.Fault, TLConnectionError)):
+            with self._lock:
+                endpoint.markDown()
+            return False
+        with self._lock:
+            endpoint.markUp()
+        return True
+
+    def checkHealth(self):
+        """ calls sayHello on all endpoints and returns a dictionary
+            url -> True/False """
+        return dict([(x.url, self._checkEndpoint(x)) for x in self.endpoints])
+
+    def endpointStats(self):
+        """ returns a list with a dictionary for each endpoint with keys
+            url, healthy, latency, requests and failures """
+        with self._lock:
+            return [{'url' : x.url, 'healthy' : x.healthy,
+                     'latency' : x.latency, 'requests' : x.requests,
+                     'failures' : x.failures} for x in self.endpoints]
+
+    def close(self):
+        """ closes the connections of all endpoints """
+        for endpoint in self.endpoints:
+            endpoint.transport.close()
+
+    def _count(self, key, value=1):
+        """ increments the counter KEY in .stats - thread safe """
+        with self._lock:
+            self.stats[key] += value
+
+    def resetStats(self):
+        """ sets all counters in .stats back to 0 """
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+
+def _isReadOnlyRequest(request_body):
+    """ returns True, if the api method called with REQUEST_BODY only reads
+        data """
+    # a StreamedRequest starts with its prefix
+    match = _METHOD_NAME.search(getattr(request_body, 'prefix',
+                                        request_body)[:512])
+    if match is None:
+        return False
+    methodNameXMLRPC = match.group(1)
+    if not methodNameXMLRPC.startswith('tl.'):
+        # like system.multicall, which could include writes
+        return False
+    return isReadOnlyMethod(methodNameXMLRPC[3:])
+
+def _isNotSentError(error):
+    """ returns True, if ERROR proofs, that the request has not reached the
+        server """
+    if isinstance(error, socket.gaierror):
+        return True
+    return isinstance(error, socket.error) and \
+                    not isinstance(error, socket.timeout) and \
+                    error.errno in NOT_SENT_ERRNOS
+
+def _iterItems(response):
+    """ yields the elements of a not streamed RESPONSE like iterRequest """
+    if isinstance(response, list):
+        for item in response:
+            yield item
+    elif isinstance(response, dict):
+        for item in response.items():
+            yield item
+    elif response:
+        yield response
+
+def splitServerUrls(serverUrls):
+    """ returns the list of urls defined in SERVERURLS
+        - a list or a string with comma separated urls """
+    if isinstance(serverUrls, basestring):
+        serverUrls = serverUrls.split(',')
+    return [x.strip() for x in serverUrls if x.strip()]
+
+def newFailoverTransport(serverUrls, selection='round-robin',
+                         recheckAfter=10.0,
+                         transportFactory=newKeepAliveTransport,
+                         **transportArgs):
+    """ returns a FailoverTransport for the list SERVERURLS (or a string
+        with comma separated urls). The transport of each endpoint is
+        created with TRANSPORTFACTORY(url, **TRANSPORTARGS) - use
+        newPooledTransport for a thread safe FailoverTransport. """
+    endpoints = [Endpoint(url, transportFactory(url, **transportArgs))
+                 for url in splitServerUrls(serverUrls)]
+    return FailoverTransport(endpoints, selection, recheckAfter)
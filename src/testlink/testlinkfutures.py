@@ -0,0 +1,235 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+import sys
+import threading
+from Queue import Queue
+from .testlinkerrors import TestLinkError
+
+__doc__ = """ This internal module defines a small thread pool and the future
+objects it returns. It is used to run api calls concurrently, without
+depending on packages not included in the python 2 standard library.
+
+TLExecutor(workers)
+   - submit(func, *args, **kwargs) runs FUNC in one of WORKERS threads and
+     returns a TLFuture
+TLFuture
+   - result(timeout) waits for and returns the result of the call or raises
+     the exception of the call
+mapConcurrent(func, items, workers, ordered, maxInFlight)
+   - calls FUNC for each item in WORKERS threads and yields the results as 
+     soon as they are available 
+"""
+
+class TLFutureTimeout(TestLinkError):
+    """ Future error
+    - result is not available within the given timeout """
+
+
+class TLFuture(object):
+    """ result of a call, which is executed in another thread """
+
+    __slots__ = ['_done', '_result', '_excInfo', '_callbacks', '_lock']
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._excInfo = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def done(self):
+        """ returns True, if the call has finished """
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """ waits up to TIMEOUT seconds (default None - without limit) for
+            the call and returns its result or raises its exception """
+        if not self._done.wait(timeout):
+            raise TLFutureTimeout('no result after %s sec' % timeout)
+        if self._excInfo is not None:
+            raise self._excInfo[0], self._excInfo[1], self._excInfo[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        """ waits like result() and returns the exception of the call or None
+        """
+        if not self._done.wait(timeout):
+            raise TLFutureTimeout('no result after %s sec' % timeout)
+        if self._excInfo is not None:
+            return self._excInfo[1]
+        return None
+
+    def addDoneCallback(self, callback):
+        """ calls CALLBACK(future), when the call has finished """
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _setResult(self, result):
+        self._result = result
+        self._finish()
+
+    def _setException(self, excInfo):
+        self._excInfo = excInfo
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._done.set()
+            callbacks = self._callbacks
+            self._callbacks = []
+        for callback in callbacks:
+            callback(self)
+
+
+class TLExecutor(object):
+    """ thread pool, which executes submitted calls in up to WORKERS threads
+
+        Threads are started on demand and run as daemon threads, so a not
+        shutdown executor does not block the end of the python process.
+    """
+
+    def __init__(self, workers=8):
+        if workers < 1:
+            raise ValueError('workers must be >= 1, not %s' % workers)
+        self.workers = workers
+        self._queue = Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, func, *args, **kwargs):
+        """ schedules FUNC(*ARGS, **KWARGS) and returns a TLFuture """
+        future = TLFuture()
+        with self._lock:
+            if self._shutdown:
+                raise TestLinkError('executor has been shutdown')
+            self._queue.put((future, func, args, kwargs))
+            if len(self._threads) < self.workers:
+                self._startWorker()
+        return future
+
+    def _startWorker(self):
+        a_thread = threading.Thread(target=self._work)
+        a_thread.daemon = True
+        a_thread.start()
+        self._threads.append(a_thread)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                # shutdown signal
+                return
+            (future, func, args, kwargs) = item
+            try:
+                future._setResult(func(*args, **kwargs))
+            except:
+                future._setException(sys.exc_info())
+
+    def shutdown(self, wait=True):
+        """ stops the worker threads, after the submitted calls are done """
+        with self._lock:
+            self._shutdown = True
+            threads = self._threads[:]
+        for a_thread in threads:
+            self._queue.put(None)
+        if wait:
+            for a_thread in threads:
+                a_thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+        return False
+
+
+def waitAll(futures, timeout=None):
+    """ waits until all FUTURES are done and returns the list of results.
+        Raises the exception of the first failed future. """
+    return [future.result(timeout) for future in futures]
+
+def mapConcurrent(func, items, workers=4, ordered=True, maxInFlight=None,
+                  catchErrors=(TestLinkError,)):
+    """ calls FUNC(item) for each item of the iterable ITEMS in up to WORKERS
+        threads and yields tuples (item, result) 
+
+        ORDERED True  - results are yielded in the order of ITEMS
+                False - results are yielded as soon as the call is done
+        MAXINFLIGHT   - max number of submitted, but not yet yielded items.
+                        ITEMS is consumed lazy, so it could be a generator.
+                        Default is 2 * WORKERS
+        CATCHERRORS   - exceptions of these classes are yielded as result, 
+                        so one failed item does not abort the whole run.
+                        Other exceptions are raised. 
+    """
+    if maxInFlight is None:
+        maxInFlight = 2 * workers
+    if maxInFlight < 1:
+        raise ValueError('maxInFlight must be >= 1, not %s' % maxInFlight)
+
+    executor = TLExecutor(workers)
+    # sequence numbers of done calls 
+    doneQueue = Queue()
+    # sequence number -> (item, future) of not yet yielded items 
+    pending = {}
+    itemsIter = iter(items)
+    nextSubmit = 0
+    nextYield = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < maxInFlight:
+                try:
+                    item = itemsIter.next()
+                except StopIteration:
+                    exhausted = True
+                    break
+                future = executor.submit(func, item)
+                pending[nextSubmit] = (item, future)
+                future.addDoneCallback(
+                            lambda f, seq=nextSubmit: doneQueue.put(seq))
+                nextSubmit += 1
+            if not pending:
+                break
+            doneSeq = doneQueue.get()
+            if not ordered:
+                nextYield = doneSeq
+            # yield all done items, which are next in order
+            while nextYield in pending and pending[nextYield][1].done():
+                (item, future) = pending.pop(nextYield)
+                yield (item, _futureOutcome(future, catchErrors))
+                if not ordered:
+                    break
+                nextYield += 1
+    finally:
+        executor.shutdown(wait=False)
+
+def _futureOutcome(future, catchErrors):
+    """ returns the result of FUTURE or its exception, if it is an instance 
+        of CATCHERRORS """
+    error = future.exception()
+    if error is not None and isinstance(error, catchErrors):
+        return error
+    return future.result()
@@ -20,6 +20,9 @@
 import os
 from argparse import ArgumentParser
 from version import VERSION
+from .testlinktransport import newKeepAliveTransport
+from .testlinkfailover import newFailoverTransport, splitServerUrls
+from .testlinkcache import SqliteResponseCache
 
 
 class TestLinkHelper(object):
@@ -32,6 +35,9 @@ class TestLinkHelper(object):
        environment variable - TESTLINK_API_PYTHON_DEVKEY
        default value        - 42 
        command line arg     - devKey
+    c) optional sqlite file of a response cache shared by all processes 
+       environment variable - TESTLINK_API_PYTHON_CACHE_FILE
+       default value        - None (no shared cache)
        
     Examples 1 - init TestlinkAPIClient with environment variables 
     - define connection parameters in environment variables 
@@ -47,22 +53,36 @@ class TestLinkHelper(object):
       tl_helper.connect(TestLink) 
       -> returns a TestLink instance
     
+    Examples 3 - several TestLink frontends with failover
+    - define a list of urls or comma separated urls in 
+      TESTLINK_API_PYTHON_SERVER_URL 
+    - TestLinkHelper(['http://tl1/lib/api/xmlrpc/v1/xmlrpc.php',
+                      'http://tl2/lib/api/xmlrpc/v1/xmlrpc.php'])
+      .connect(TestlinkAPIClient)
+      -> returns a TestlinkAPIClient instance using a FailoverTransport
+    
+    Examples 4 - CI jobs reuse the responses of previous jobs
+    - define TESTLINK_API_PYTHON_CACHE_FILE=/var/tmp/testlink-cache.sqlite
+    - TestLinkHelper().connect(TestlinkAPIClient) 
+      -> returns a TestlinkAPIClient instance using a SqliteResponseCache
+    
     Attention: TL 197 changed the URL of XML-RPC 
       from  http://localhost/testlink/lib/api/xmlrpc.php
       to    http://localhost/testlink/lib/api/xmlrpc/v1/xmlrpc.php
     """
 
-    __slots__ = ['_server_url', '_devkey']
+    __slots__ = ['_server_url', '_devkey', '_cache_file']
 
     ENVNAME_SERVER_URL  = 'TESTLINK_API_PYTHON_SERVER_URL'
     ENVNAME_DEVKEY      = 'TESTLINK_API_PYTHON_DEVKEY'
+    ENVNAME_CACHE_FILE  = 'TESTLINK_API_PYTHON_CACHE_FILE'
     DEFAULT_SERVER_URL  = 'http://localhost/testlink/lib/api/xmlrpc.php'
     DEFAULT_DEVKEY      = '42'
     DEFAULT_DESCRIPTION = 'Python XML-RPC client for the TestLink API v%s' \
                             % VERSION
 
-    def __init__(self, server_url=None, devkey=None):
-        """ fill slots _server_url and _devkey
+    def __init__(self, server_url=None, devkey=None, cache_file=None):
+        """ fill slots _server_url, _devkey and _cache_file
         Priority:
         1. init args 
         2. environment variables 
@@ -70,12 +90,14 @@ class TestLinkHelper(object):
         """
         self._server_url = server_url
         self._devkey     = devkey
+        self._cache_file = cache_file
         self._setParamsFromEnv()
         
     def _setParamsFromEnv(self):
         """ fill empty slots _server_url and _devkey from environment variables
         _server_url <- TESTLINK_API_PYTHON_SERVER_URL
         _devkey     <- TESTLINK_API_PYTHON_DEVKEY
+        _cache_file <- TESTLINK_API_PYTHON_CACHE_FILE
         
         If environment variables are not defined, defaults values are set.
         """
@@ -84,6 +106,8 @@ class TestLinkHelper(object):
                                          self.DEFAULT_SERVER_URL)
         if self._devkey == None:
             self._devkey = os.getenv(self.ENVNAME_DEVKEY, self.DEFAULT_DEVKEY)
+        if self._cache_file == None:
+            self._cache_file = os.getenv(self.ENVNAME_CACHE_FILE)
 
     def _createArgparser(self, usage):
         """ returns a parser for command line arguments """
@@ -111,7 +135,24 @@ class TestLinkHelper(object):
         self._devkey     = args.devKey
         
     
-    def connect(self, tl_api_class):
-        """ returns a new instance of TL_API_CLASS """
-        return tl_api_class(self._server_url, self._devkey)
+    def connect(self, tl_api_class, **args):
+        """ returns a new instance of TL_API_CLASS 
+        
+        ARGS are passed as additional init args to TL_API_CLASS. 
+        TestlinkAPIGeneric based classes get a KeepAliveTransport as default 
+        'transport', which reuses the server connection for all calls. 
+        If several server urls are defined, the default is a 
+        FailoverTransport, which spreads the calls over these urls. 
+        With a cache file, the default 'cache' is a SqliteResponseCache. """
+        from .testlinkapigeneric import TestlinkAPIGeneric
+        serverUrls = splitServerUrls(self._server_url)
+        if issubclass(tl_api_class, TestlinkAPIGeneric):
+            if args.get('transport') is None:
+                if len(serverUrls) > 1:
+                    args['transport'] = newFailoverTransport(serverUrls)
+                else:
+                    args['transport'] = newKeepAliveTransport(serverUrls[0])
+            if args.get('cache') is None and self._cache_file:
+                args['cache'] = SqliteResponseCache(self._cache_file)
+        return tl_api_class(serverUrls[0], self._devkey, **args)
         
\ No newline at end of file
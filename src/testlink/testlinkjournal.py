@@ -0,0 +1,415 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+import cPickle
+import errno
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from .testlinkcache import SqliteStore
+from .testlinkerrors import TestLinkError
+
+__doc__ = """ This module defines the write-behind journal, which records
+test results and attachment uploads locally and sends them later, so that a
+run does not lose results, while the TestLink server is down
+
+ResultJournal
+   - sqlite database file with the recorded api calls and their state
+     pending -> sending -> done or failed
+   - each entry has a client generated result id - an id recorded twice is
+     send only once
+WriteBehindReporter
+   - reportTCResult() and uploadExecutionAttachment() record the call in the
+     journal and return immediately the result id
+   - a background thread sends the recorded calls with system.multicall in
+     batches, calls of a failed round trip are send again later
+replayJournal(client, path)
+   - sends the calls left in a journal by crashed processes, also available
+     as command line
+     python -m testlink.testlinkjournal --server_url URL --devKey KEY PATH
+"""
+
+PENDING = 'pending'
+SENDING = 'sending'
+DONE = 'done'
+FAILED = 'failed'
+
+class JournalEntry(object):
+    """ one recorded api call """
+
+    __slots__ = ['resultId', 'methodNameAPI', 'args', 'dependsOn']
+
+    def __init__(self, resultId, methodNameAPI, args, dependsOn):
+        self.resultId = resultId
+        self.methodNameAPI = methodNameAPI
+        self.args = args
+        self.dependsOn = dependsOn
+
+
+class ResultJournal(SqliteStore):
+    """ recorded api calls in the sqlite database file PATH - thread safe and
+        process safe
+
+        An entry could depend on another entry (like an attachment upload on
+        its result), it is send after the other entry is done and gets its
+        outcome (the execution id) as arg 'executionid'.
+
+        Entries, which are claimed for sending by a process, which has
+        crashed (same host) or which has not finished them within STALEAFTER
+        seconds, are claimed again. A crash during the round trip could
+        therefore send these entries twice.
+    """
+
+    def __init__(self, path, timeout=30.0):
+        SqliteStore.__init__(self, path, timeout)
+        with self._transaction() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS journal ('
+                       'seq INTEGER PRIMARY KEY AUTOINCREMENT, '
+                       'resultId TEXT UNIQUE, method TEXT, args BLOB, '
+                       'dependsOn TEXT, state TEXT, owner TEXT, '
+                       'claimed REAL, outcome TEXT, created REAL)')
+            db.execute('CREATE INDEX IF NOT EXISTS journal_state '
+                       'ON journal (method, state)')
+
+    def append(self, resultId, methodNameAPI, args, dependsOn=None):
+        """ records the call of METHODNAMEAPI with the dictionary ARGS as
+            entry RESULTID - returns False, if RESULTID is already recorded
+        """
+        with self._transaction() as db:
+            cursor = db.execute('INSERT OR IGNORE INTO journal (resultId, '
+                        'method, args, dependsOn, state, created) VALUES '
+                        '(?, ?, ?, ?, ?, ?)', (resultId, methodNameAPI,
+                        _dumps(args), dependsOn, PENDING, time.time()))
+            return cursor.rowcount == 1
+
+    def claim(self, methodNameAPI, limit, staleAfter=600.0):
+        """ returns up to LIMIT entries of METHODNAMEAPI, which could be send
+            now, and marks them as sending by this process """
+        now = time.time()
+        entries = []
+        with self._transaction() as db:
+            # entries, which depend on a failed entry, could never be send
+            db.execute('UPDATE journal SET state = ?, outcome = ? '
+                       'WHERE state = ? AND dependsOn IN (SELECT resultId '
+                       'FROM journal WHERE state = ?)',
+                       (FAILED, 'depends on a failed entry', PENDING, FAILED))
+            rows = db.execute('SELECT j.resultId, j.args, j.dependsOn, '
+                    'j.state, j.owner, j.claimed, d.outcome FROM journal j '
+                    'LEFT JOIN journal d ON d.resultId = j.dependsOn '
+                    'WHERE j.method = ? AND j.state IN (?, ?) AND '
+                    '(j.dependsOn IS NULL OR d.state = ?) ORDER BY j.seq',
+                    (methodNameAPI, PENDING, SENDING, DONE))
+            for (resultId, args, dependsOn, state, owner, claimed,
+                 dependsOutcome) in rows:
+                if state == SENDING and \
+                            not _isStale(owner, claimed, now, staleAfter):
+                    continue
+                args = _loads(args)
+                if dependsOn is not None:
+                    args['executionid'] = dependsOutcome
+                entries.append(JournalEntry(resultId, methodNameAPI, args,
+                                            dependsOn))
+                if len(entries) >= limit:
+                    break
+            for entry in entries:
+                db.execute('UPDATE journal SET state = ?, owner = ?, '
+                           'claimed = ? WHERE resultId = ?',
+                           (SENDING, _owner(), now, entry.resultId))
+        return entries
+
+    def complete(self, resultId, outcome):
+        """ marks entry RESULTID as done with OUTCOME (like the execution id)
+        """
+        self._setState(resultId, DONE, outcome)
+
+    def fail(self, resultId, error):
+        """ marks entry RESULTID as failed with ERROR - it is not send again
+        """
+        self._setState(resultId, FAILED, error)
+
+    def release(self, resultIds):
+        """ marks the entries RESULTIDS as pending, so they are send again """
+        with self._transaction() as db:
+            for resultId in resultIds:
+                db.execute('UPDATE journal SET state = ?, owner = NULL, '
+                           'claimed = NULL WHERE resultId = ?',
+                           (PENDING, resultId))
+
+    def entry(self, resultId):
+        """ returns a tuple (state, outcome) for entry RESULTID or None """
+        row = self._connection().execute('SELECT state, outcome FROM journal '
+                                'WHERE resultId = ?', (resultId,)).fetchone()
+        return row and tuple(row)
+
+    def counts(self):
+        """ returns a dictionary state -> number of entries """
+        return dict(self._connection().execute('SELECT state, COUNT(*) FROM '
+                                               'journal GROUP BY state'))
+
+    def purge(self, olderThan=7 * 24 * 3600):
+        """ deletes done entries, which are recorded more than OLDERTHAN
+            seconds ago - a result id of a deleted entry could be recorded
+            again """
+        with self._transaction() as db:
+            return db.execute('DELETE FROM journal WHERE state = ? AND '
+                              'created < ?', (DONE, time.time() - olderThan)
+                              ).rowcount
+
+    def _setState(self, resultId, state, outcome):
+        with self._transaction() as db:
+            db.execute('UPDATE journal SET state = ?, outcome = ? '
+                       'WHERE resultId = ?', (state, str(outcome), resultId))
+
+
+class WriteBehindReporter(object):
+    """ records test results and attachment uploads of the TestlinkAPIClient
+        CLIENT in JOURNAL (ResultJournal or database file name) and sends
+        them in a background thread
+
+        FLUSHINTERVAL - seconds between two sends of the background thread
+        BATCHSIZE     - max number of calls send with one system.multicall
+        STALEAFTER    - seconds, after which calls claimed by another process
+                        are send again
+        START         - False does not start the background thread, calls
+                        are only send with flush()
+
+        The background thread shares CLIENT with the calling thread, so 
+        CLIENT must use a thread safe transport like PooledTransport - else 
+        start() raises TLArgError.
+
+        .stats counts the 'recorded', 'duplicates', 'sent' and 'failed'
+        calls and the 'flushErrors' of failed round trips
+
+        Example:
+         >>> transport = newPooledTransport(server_url, 2)
+         >>> tls = TestLinkHelper().connect(TestlinkAPIClient, 
+         ...                                transport=transport)
+         >>> with WriteBehindReporter(tls, '/var/tmp/tl-journal.sqlite') as wb:
+         ...     resultId = wb.reportTCResult(tcid, planid, 'Build 1', 'p',
+         ...                                  'ok', resultId='nightly-42-7')
+         ...     wb.uploadExecutionAttachment(open('log.txt'), resultId,
+         ...                                  'log', 'test log')
+         >>> wb.outcome(resultId)
+         ('done', '4711')
+    """
+
+    def __init__(self, client, journal, flushInterval=5.0, batchSize=50,
+                 staleAfter=600.0, start=True):
+        if isinstance(journal, basestring):
+            journal = ResultJournal(journal)
+        self.client = client
+        self.journal = journal
+        self.flushInterval = flushInterval
+        self.batchSize = batchSize
+        self.staleAfter = staleAfter
+        self.stats = {'recorded' : 0, 'duplicates' : 0, 'sent' : 0,
+                      'failed' : 0, 'flushErrors' : 0}
+        self._stopped = threading.Event()
+        self._thread = None
+        self._flushLock = threading.Lock()
+        self._statsLock = threading.Lock()
+        if start:
+            self.start()
+
+    def reportTCResult(self, *argsPositional, **argsOptional):
+        """ records a reportTCResult call with the args of the client method
+            and returns its result id
+
+            optional arg resultId - client generated unique id, default is a
+            random uuid. A result id, which is already recorded, is ignored.
+        """
+        resultId = argsOptional.pop('resultId', None) or uuid.uuid4().hex
+        if argsPositional:
+            argsOptional.update(self.client._convertPostionalArgs(
+                                        'reportTCResult', argsPositional))
+        self._record(resultId, 'reportTCResult', argsOptional)
+        return resultId
+
+    def uploadExecutionAttachment(self, attachmentfile, resultId, title=None,
+                                  description=None, **argsOptional):
+        """ records the upload of ATTACHMENTFILE for the execution of the
+            recorded result RESULTID and returns the id of this upload.
+            The file is read immediately.
+
+            optional arg attachmentId - client generated unique id like
+            resultId """
+        attachmentId = argsOptional.pop('attachmentId', None) or \
+                            '%s-attachment-%s' % (resultId, uuid.uuid4().hex)
+        args = self.client._getAttachmentArgs(attachmentfile, streamed=False)
+        if title is not None:
+            args['title'] = title
+        if description is not None:
+            args['description'] = description
+        args.update(argsOptional)
+        self._record(attachmentId, 'uploadExecutionAttachment', args,
+                     resultId)
+        return attachmentId
+
+    def outcome(self, resultId):
+        """ returns a tuple (state, outcome) for RESULTID - outcome is the
+            execution id or the error message """
+        return self.journal.entry(resultId)
+
+    def flush(self):
+        """ sends all recorded calls, which could be send now, and returns
+            the number of send calls. Raises the TestLinkError of a failed
+            round trip - the calls stay in the journal """
+        sent = 0
+        with self._flushLock:
+            for methodNameAPI in ('reportTCResult',
+                                  'uploadExecutionAttachment'):
+                while True:
+                    entries = self.journal.claim(methodNameAPI,
+                                            self.batchSize, self.staleAfter)
+                    if not entries:
+                        break
+                    sent += self._send(entries)
+        return sent
+
+    def start(self):
+        """ starts the background thread - raises TLArgError, if the client
+            transport is not thread safe """
+        if self._thread is None:
+            # the background thread and the calling thread use the client
+            self.client._checkThreadSafe('WriteBehindReporter', 2)
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run,
+                                            name='TestLinkJournalFlusher')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self, flush=True):
+        """ stops the background thread and sends the remaining calls, if
+            FLUSH is True - calls, which could not be send, stay in the
+            journal for replayJournal() """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            self._flushQuietly()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def _record(self, resultId, methodNameAPI, args, dependsOn=None):
+        recorded = self.journal.append(resultId, methodNameAPI, args,
+                                       dependsOn)
+        self._count(recorded and 'recorded' or 'duplicates')
+
+    def _send(self, entries):
+        """ sends ENTRIES with one round trip and returns the number of
+            successful calls """
+        try:
+            with self.client.batch(len(entries)) as batch:
+                for entry in entries:
+                    args = dict(entry.args)
+                    args.setdefault('devKey', self.client.devKey)
+                    self.client.callServerWithPosArgs(entry.methodNameAPI,
+                                                      **args)
+        except TestLinkError:
+            self.journal.release([x.resultId for x in entries])
+            raise
+        sent = 0
+        for (entry, batchResult) in zip(entries, batch.calls):
+            if batchResult.failed():
+                self.journal.fail(entry.resultId, batchResult.error())
+                self._count('failed')
+            else:
+                self.journal.complete(entry.resultId,
+                                      _responseId(batchResult.result()))
+                self._count('sent')
+                sent += 1
+        return sent
+
+    def _run(self):
+        while not self._stopped.wait(self.flushInterval):
+            self._flushQuietly()
+
+    def _flushQuietly(self):
+        try:
+            self.flush()
+        except TestLinkError:
+            # server still down - try again with the next flush
+            self._count('flushErrors')
+
+    def _count(self, name):
+        with self._statsLock:
+            self.stats[name] += 1
+
+
+def replayJournal(client, path, batchSize=50, staleAfter=600.0):
+    """ sends the calls left in the journal file PATH (like from crashed
+        processes) with the TestlinkAPIClient CLIENT and returns a
+        dictionary state -> number of entries """
+    reporter = WriteBehindReporter(client, path, batchSize=batchSize,
+                                   staleAfter=staleAfter, start=False)
+    reporter.flush()
+    return reporter.journal.counts()
+
+def _responseId(response):
+    """ returns the id of a reportTCResult or uploadExecutionAttachment
+        RESPONSE """
+    if isinstance(response, list) and response:
+        response = response[0]
+    try:
+        return response['id']
+    except (TypeError, KeyError):
+        return response
+
+def _owner():
+    return '%s:%i' % (socket.gethostname(), os.getpid())
+
+def _isStale(owner, claimed, now, staleAfter):
+    """ returns True, if the claim of OWNER at time CLAIMED is outdated """
+    if claimed is None or claimed < now - staleAfter:
+        return True
+    (host, pid) = owner.rsplit(':', 1)
+    if host != socket.gethostname() or int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except OSError as os_err:
+        # ESRCH - the process does not exist anymore
+        return os_err.errno == errno.ESRCH
+    return False
+
+def _dumps(value):
+    return sqlite3.Binary(cPickle.dumps(value, 2))
+
+def _loads(value):
+    return cPickle.loads(str(value))
+
+
+if __name__ == "__main__":
+    from testlink import TestlinkAPIClient, TestLinkHelper
+    tl_helper = TestLinkHelper()
+    a_parser = tl_helper._createArgparser(
+                        'sends the calls left in a TestLink result journal')
+    a_parser.add_argument('journal', help='journal database file')
+    args = a_parser.parse_args()
+    tl_helper = TestLinkHelper(args.server_url, args.devKey)
+    print replayJournal(tl_helper.connect(TestlinkAPIClient), args.journal)
@@ -0,0 +1,267 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+import threading
+import time
+from .testlinkargs import getInvalidations
+from .testlinkapigeneric import TestlinkAPIGeneric
+
+__doc__ = """ This module defines the name resolver, which TestlinkAPIClient
+uses as .resolver to find projects, plans, builds, platforms and test cases
+by name and the project of a node
+
+NameResolver
+   - name -> item maps are read lazy with one api call per scope (all
+     projects, plans of one project, builds or platforms of one plan) and
+     then used for all following lookups
+   - a name, which is not found in a map older than reloadAfter seconds,
+     reloads this map once - so a lookup of many unknown names does not 
+     read the same map again and again
+   - writing api methods drop the maps, they make invalid - see
+     decoMakerApiCallInvalidates - refresh() drops them explicit
+   - node paths (getFullPath) are kept, unknown node ids are read together
+     with one getFullPath call
+"""
+
+class NameResolver(object):
+    """ thread safe name -> item index for the TestLink client API
+
+        .stats counts the 'lookups' and the 'calls' send to the server to
+        load the maps
+
+        Example - find the projects of many nodes with one getFullPath call:
+         >>> tls.resolver.fullPaths(tcids)
+         >>> projectIds = [tls.getProjectIDByNode(x) for x in tcids]
+
+        Example - report many results by name with only one call each:
+         >>> tls = TestLinkHelper().connect(TestlinkAPIClient)
+         >>> plan = tls.resolver.plan('NEW_PROJECT_API', 'TestPlan_API A')
+         >>> build = tls.resolver.build(plan['id'], 'Build 1')
+         >>> tcids = [tls.resolver.testCases(x, 'suite A',
+         ...                                 'NEW_PROJECT_API')[0]['id']
+         ...          for x in tcnames]
+    """
+
+    # max number of node ids send with one getFullPath call
+    MAX_NODES_PER_CALL = 1000
+
+    # seconds after reading a map, a missing name does not reload it
+    reloadAfter = 10.0
+
+    def __init__(self, api):
+        self.api = api
+        self.stats = {'lookups' : 0, 'calls' : 0}
+        # (api method name, frozenset of scope args) -> {name : item}
+        self._maps = {}
+        # (api method name, frozenset of scope args) -> time of the last read
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def project(self, projectName):
+        """ returns the project (getProjects) named PROJECTNAME or None """
+        return self._lookup('getProjects', {}, projectName)
+
+    def projectId(self, projectName):
+        """ returns the id of the project named PROJECTNAME or None """
+        project = self.project(projectName)
+        return project and project['id']
+
+    def projectById(self, projectId):
+        """ returns the project (getProjects) with PROJECTID or None - an 
+            unknown id reloads older projects once (see reloadAfter) """
+        return self._findProject('id', projectId)
+
+    def projectByPrefix(self, prefix):
+        """ returns the project (getProjects) with the test case PREFIX or 
+            None - an unknown prefix reloads older projects once (see 
+            reloadAfter) """
+        return self._findProject('prefix', prefix)
+
+    def plan(self, projectName, planName):
+        """ returns the test plan (getProjectTestPlans) named PLANNAME of the
+            project named PROJECTNAME or None """
+        projectId = self.projectId(projectName)
+        if projectId is None:
+            return None
+        return self._lookup('getProjectTestPlans',
+                            {'testprojectid' : projectId}, planName)
+
+    def build(self, planId, buildName):
+        """ returns the build (getBuildsForTestPlan) named BUILDNAME of the
+            test plan with PLANID or None """
+        return self._lookup('getBuildsForTestPlan', {'testplanid' : planId},
+                            buildName)
+
+    def platform(self, planId, platformName):
+        """ returns the platform (getTestPlanPlatforms) named PLATFORMNAME of
+            the test plan with PLANID or None """
+        return self._lookup('getTestPlanPlatforms', {'testplanid' : planId},
+                            platformName)
+
+    def testCases(self, testCaseName, testSuiteName, projectName):
+        """ returns the list of test cases (getTestCaseIDByName) named
+            TESTCASENAME in the test suite TESTSUITENAME of the project
+            PROJECTNAME - found test cases are not searched again """
+        scope = {'testcasename' : testCaseName,
+                 'testsuitename' : testSuiteName,
+                 'testprojectname' : projectName}
+        key = self._key('getTestCaseIDByName', scope)
+        with self._lock:
+            self.stats['lookups'] += 1
+            testCases = self._maps.get(key)
+        if testCases is None:
+            testCases = self._call('getTestCaseIDByName', scope)
+            if type(testCases) == dict:
+                testCases = testCases.values()
+            if testCases:
+                with self._lock:
+                    self._maps[key] = testCases
+        return list(testCases)
+
+    def fullPaths(self, nodeIds):
+        """ returns a dictionary node id -> list of the names of its parents 
+            (getFullPath), starting with the project name, for the list 
+            NODEIDS - unknown node ids are read with one getFullPath call """
+        nodeIds = [str(x) for x in nodeIds]
+        with self._lock:
+            self.stats['lookups'] += 1
+            paths = dict([(x, self._maps.get(self._nodeKey(x))) 
+                          for x in nodeIds])
+        missingIds = [x for x in nodeIds if paths[x] is None]
+        for start in range(0, len(missingIds), self.MAX_NODES_PER_CALL):
+            chunk = [int(x) for x in 
+                     missingIds[start:start + self.MAX_NODES_PER_CALL]]
+            if len(chunk) == 1:
+                # like the single id form of getFullPath
+                chunk = chunk[0]
+            response = self._call('getFullPath', {'nodeid' : chunk})
+            with self._lock:
+                for (nodeId, path) in response.items():
+                    self._maps[self._nodeKey(nodeId)] = path
+                    paths[str(nodeId)] = path
+        return paths
+
+    def fullPath(self, nodeId):
+        """ returns the list of the parent names of NODEID (getFullPath), 
+            starting with the project name """
+        return self.fullPaths([nodeId])[str(nodeId)]
+
+    def projectIdByNode(self, nodeId):
+        """ returns the id of the project, the node NODEID belongs to """
+        projectName = self.fullPath(nodeId)[0]
+        project = self._lookup('getTestProjectByName', 
+                               {'testprojectname' : projectName}, projectName)
+        return project and project['id']
+
+    def invalidateFor(self, methodNameAPI, args):
+        """ drops the maps, which the writing api method METHODNAMEAPI
+            called with the dictionary ARGS makes invalid """
+        for (invalidatedName, argNames) in \
+                                getInvalidations(methodNameAPI).items():
+            self.refresh(invalidatedName,
+                         dict([(x, args[x]) for x in argNames if x in args]))
+
+    def refresh(self, methodNameAPI=None, matchArgs=None):
+        """ drops the maps read with METHODNAMEAPI, which scope includes all
+            items of the dictionary MATCHARGS - without METHODNAMEAPI all
+            maps are dropped, so they are read again with the next lookup
+
+            example - read the builds of plan 4711 again:
+             >>> tls.resolver.refresh('getBuildsForTestPlan',
+             ...                      {'testplanid' : 4711})
+        """
+        with self._lock:
+            for key in self._maps.keys():
+                if methodNameAPI is not None and key[0] != methodNameAPI:
+                    continue
+                if matchArgs and not _scopeMatch(key[1], matchArgs):
+                    continue
+                del self._maps[key]
+                self._loaded.pop(key, None)
+
+    def _lookup(self, methodNameAPI, scope, name):
+        """ returns the item named NAME in the response of METHODNAMEAPI
+            called with the dictionary SCOPE or None """
+        key = self._key(methodNameAPI, scope)
+        with self._lock:
+            self.stats['lookups'] += 1
+            items = self._maps.get(key)
+            loaded = self._loaded.get(key, 0)
+        if items is not None:
+            if name in items:
+                return items[name]
+            if time.time() - loaded < self.reloadAfter:
+                # NAME is missing in a fresh map
+                return None
+        # map not read yet or NAME is missing in an older map - perhaps it
+        # was created meanwhile
+        response = self._call(methodNameAPI, scope) or []
+        if isinstance(response, dict):
+            response = [response]
+        items = dict([(x['name'], x) for x in response])
+        with self._lock:
+            self._maps[key] = items
+            self._loaded[key] = time.time()
+        return items.get(name)
+
+    def _findProject(self, field, value):
+        """ returns the project, which FIELD has VALUE, or None """
+        key = self._key('getProjects', {})
+        with self._lock:
+            items = self._maps.get(key) or {}
+        project = _findItem(items, field, value)
+        if project is None:
+            # None is never a project name, so the projects are read again
+            self._lookup('getProjects', {}, None)
+            with self._lock:
+                project = _findItem(self._maps.get(key) or {}, field, value)
+        return project
+
+    def _call(self, methodNameAPI, scope):
+        """ calls the generic api method METHODNAMEAPI - not an overwritten
+            service method with other args or return values """
+        with self._lock:
+            self.stats['calls'] += 1
+        return getattr(TestlinkAPIGeneric, methodNameAPI)(self.api, **scope)
+
+    def _nodeKey(self, nodeId):
+        return self._key('getFullPath', {'nodeid' : nodeId})
+
+    @staticmethod
+    def _key(methodNameAPI, scope):
+        return (methodNameAPI,
+                frozenset([(k, str(v)) for (k, v) in scope.items()]))
+
+
+def _scopeMatch(scope, matchArgs):
+    """ returns True, if the frozenset SCOPE includes all MATCHARGS - values
+        are compared as strings, cause ids are send as int or str """
+    scopeArgs = dict(scope)
+    for (name, value) in matchArgs.items():
+        if name in scopeArgs and scopeArgs[name] != str(value):
+            return False
+    return True
+
+def _findItem(items, field, value):
+    """ returns the item of the dictionary ITEMS, which FIELD has VALUE, or 
+        None - values are compared as strings """
+    for item in items.values():
+        if str(item.get(field)) == str(value):
+            return item
+    return None
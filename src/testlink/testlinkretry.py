@@ -0,0 +1,154 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+import random
+import threading
+import time
+from .testlinkerrors import TLConnectionError, TLCircuitOpenError
+
+__doc__ = """ This module defines the retry policy, which could be used as
+argument 'retryPolicy' of TestlinkAPIGeneric and TestlinkAPIClient to repeat
+api calls, which failed with a transient error like a 502 from a proxy
+
+RetryPolicy
+   - repeats read-only api calls (like getTestCase) up to maxAttempts times
+     with exponential backoff and jitter
+   - repeats writing api calls (like reportTCResult) only with
+     retryWrites=True or a method override, cause a call, which has reached
+     the server before the connection broke, would be executed twice
+   - counts the retries per api method - see .retries
+NO_RETRY
+   - policy, which never repeats a call
+"""
+
+# api methods starting with these prefixes do not change TestLink data and
+# could be repeated without side effects
+READ_ONLY_METHOD_PREFIXES = ('get', 'does', 'check', 'say', 'ping', 'repeat',
+                             'about', 'testLinkVersion')
+
+def isReadOnlyMethod(methodNameAPI):
+    """ returns True, if api method METHODNAMEAPI only reads data """
+    return methodNameAPI.startswith(READ_ONLY_METHOD_PREFIXES)
+
+
+class RetryPolicy(object):
+    """ defines, which failed api calls are repeated and how long to wait
+        between the attempts
+
+        MAXATTEMPTS     - max number of calls, 1 means no retry
+        BACKOFF         - wait time in seconds before the first retry,
+                          doubled for each further retry
+        BACKOFFMAX      - upper limit for the wait time
+        JITTER          - 0.0 .. 1.0 - the wait time is reduced by a random
+                          part up to this fraction, so that parallel clients
+                          do not retry in lockstep
+        RETRYON         - tuple of retryable error classes
+        RETRYHTTPSTATUS - TLConnectionErrors caused by a HTTP status are only
+                          retried for these status codes. Network errors
+                          without status are always retryable.
+        RETRYWRITES     - True repeats also writing api calls
+        METHODOVERRIDES - dictionary api method name -> dictionary with keys
+                          'retry' (True/False) and/or 'maxAttempts', which
+                          overrides the settings for this method
+
+        Example - repeat also reportTCResult up to 5 times:
+         >>> policy = RetryPolicy(methodOverrides={'reportTCResult' :
+         ...                             {'retry' : True, 'maxAttempts' : 5}})
+         >>> tls = TestLinkHelper().connect(TestlinkAPIClient,
+         ...                                retryPolicy=policy)
+    """
+
+    # function used to wait between the attempts
+    sleep = staticmethod(time.sleep)
+
+    def __init__(self, maxAttempts=3, backoff=0.5, backoffMax=30.0, jitter=0.5,
+                 retryOn=(TLConnectionError,), retryHTTPStatus=(502, 503, 504),
+                 retryWrites=False, methodOverrides=None):
+        if maxAttempts < 1:
+            raise ValueError('maxAttempts must be >= 1, not %s' % maxAttempts)
+        self.maxAttempts = maxAttempts
+        self.backoff = backoff
+        self.backoffMax = backoffMax
+        self.jitter = jitter
+        self.retryOn = retryOn
+        self.retryHTTPStatus = retryHTTPStatus
+        self.retryWrites = retryWrites
+        self.methodOverrides = methodOverrides or {}
+        # api method name -> number of retries
+        self.retries = {}
+        self._statsLock = threading.Lock()
+
+    def call(self, methodNameAPI, func, *args, **kwargs):
+        """ returns FUNC(*ARGS, **KWARGS) and repeats the call for api method
+            METHODNAMEAPI, if it fails with a retryable error """
+        return self.callUntil(None, methodNameAPI, func, *args, **kwargs)
+
+    def callUntil(self, deadline, methodNameAPI, func, *args, **kwargs):
+        """ same as call(), but stops repeating, if the next attempt would 
+            start after the absolute time DEADLINE (like time.time()) """
+        maxAttempts = self.maxAttemptsFor(methodNameAPI)
+        attempt = 1
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except self.retryOn as error:
+                if attempt >= maxAttempts or \
+                            not self.isRetryableError(error):
+                    raise
+                delay = self.backoffDelay(attempt)
+                if deadline is not None and time.time() + delay >= deadline:
+                    raise
+            self._countRetry(methodNameAPI)
+            self.sleep(delay)
+            attempt += 1
+
+    def maxAttemptsFor(self, methodNameAPI):
+        """ returns the max number of calls for api method METHODNAMEAPI """
+        override = self.methodOverrides.get(methodNameAPI, {})
+        retry = override.get('retry',
+                    self.retryWrites or isReadOnlyMethod(methodNameAPI))
+        if not retry:
+            return 1
+        return override.get('maxAttempts', self.maxAttempts)
+
+    def isRetryableError(self, error):
+        """ returns True, if ERROR is a transient error """
+        if not isinstance(error, self.retryOn) or \
+                        isinstance(error, TLCircuitOpenError):
+            # an open circuit would reject the next attempt too
+            return False
+        errcode = getattr(error, 'errcode', None)
+        return errcode is None or errcode in self.retryHTTPStatus
+
+    def backoffDelay(self, attempt):
+        """ returns the wait time in seconds after failed call ATTEMPT """
+        delay = min(self.backoffMax, self.backoff * 2 ** (attempt - 1))
+        return delay - delay * self.jitter * random.random()
+
+    def _countRetry(self, methodNameAPI):
+        with self._statsLock:
+            self.retries[methodNameAPI] = self.retries.get(methodNameAPI, 0) + 1
+
+    def resetStats(self):
+        """ sets the retry counters back """
+        with self._statsLock:
+            self.retries.clear()
+
+# policy, which never repeats a call
+NO_RETRY = RetryPolicy(maxAttempts=1)
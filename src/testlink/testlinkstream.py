@@ -0,0 +1,181 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+import base64
+import os.path
+import uuid
+import xmlrpclib
+
+__doc__ = """ This internal module defines the incremental unmarshaller used
+by TestlinkAPIGeneric.callServerIterWithPosArgs() to stream large responses
+and the streamed request body used to upload large attachments.
+
+IterUnmarshaller is fed by an expat parser chunk by chunk. Each complete
+element of the top level array (or each key/value pair of the top level
+struct) is removed from the unmarshaller stack and could be fetched with
+.popItems(), so the memory usage does not depend on the response size.
+
+Base64File is the 'content' arg of the upload*Attachment methods, when the
+transport could stream requests. StreamedRequest is the request body with
+this content, which is read and base64 encoded chunk by chunk while it is
+send, so the memory usage does not depend on the file size.
+"""
+
+# bytes read from an attachment file at once - must be a multiple of 3, so
+# the encoded chunks could be concatenated
+ATTACHMENT_CHUNK_SIZE = 3 * 32768
+
+class IterUnmarshaller(xmlrpclib.Unmarshaller):
+    """ xmlrpclib Unmarshaller, which hands out the elements of the top level
+        array or struct of the response as soon as they are complete
+
+        .containerType is 'array' or 'struct', when the response is a
+        container, otherwise None
+    """
+
+    def __init__(self, use_datetime=0):
+        xmlrpclib.Unmarshaller.__init__(self, use_datetime)
+        self.containerType = None
+        self._isFault = False
+        self._items = []
+
+    def start(self, tag, attrs):
+        if tag == 'fault':
+            # faults are not streamed, close() raises them as usual
+            self._isFault = True
+        elif not self._marks and tag in ('array', 'struct') and \
+                                                    not self._isFault:
+            self.containerType = tag
+        xmlrpclib.Unmarshaller.start(self, tag, attrs)
+
+    def end(self, tag, join=None):
+        if join is None:
+            xmlrpclib.Unmarshaller.end(self, tag)
+        else:
+            xmlrpclib.Unmarshaller.end(self, tag, join)
+        if len(self._marks) == 1 and not self._isFault:
+            self._moveCompleteItems()
+
+    def _moveCompleteItems(self):
+        """ moves complete elements of the top level container from the
+            stack to the item list """
+        mark = self._marks[0]
+        pending = len(self._stack) - mark
+        if self.containerType == 'array':
+            if pending:
+                self._items.extend(self._stack[mark:])
+                del self._stack[mark:]
+        elif pending >= 2:
+            # struct - member names and values alternate on the stack
+            complete = pending - (pending % 2)
+            members = self._stack[mark:mark + complete]
+            self._items.extend([(xmlrpclib._stringify(members[i]),
+                                 members[i + 1])
+                                for i in range(0, complete, 2)])
+            del self._stack[mark:mark + complete]
+
+    def popItems(self):
+        """ returns and forgets the elements completed since the last call """
+        items = self._items
+        self._items = []
+        return items
+
+
+class Base64File(object):
+    """ base64 encoded content of ATTACHMENTFILE from its current position to
+        its end - the file is read, when the request is send
+
+        Raises IOError, if ATTACHMENTFILE is not seekable (like a pipe).
+    """
+
+    def __init__(self, attachmentfile, chunkSize=ATTACHMENT_CHUNK_SIZE):
+        if chunkSize < 3 or chunkSize % 3:
+            raise ValueError('chunkSize must be a multiple of 3, not %s' %
+                             chunkSize)
+        self.file = attachmentfile
+        self.chunkSize = chunkSize
+        self.start = attachmentfile.tell()
+        attachmentfile.seek(0, os.SEEK_END)
+        self.size = attachmentfile.tell() - self.start
+        attachmentfile.seek(self.start)
+
+    def encodedSize(self):
+        """ returns the length of the base64 encoded content """
+        return 4 * ((self.size + 2) // 3)
+
+    def iterChunks(self):
+        """ yields the encoded content chunk by chunk - each call starts at
+            the beginning, so a request could be send again """
+        self.file.seek(self.start)
+        remaining = self.size
+        while remaining > 0:
+            data = self.file.read(min(self.chunkSize, remaining))
+            if not data:
+                raise IOError('attachment file %s has been truncated' %
+                              getattr(self.file, 'name', self.file))
+            remaining -= len(data)
+            yield base64.b64encode(data)
+
+    def __repr__(self):
+        # error messages include the call args - not the whole content
+        return '<Base64File %s: %i bytes>' % (getattr(self.file, 'name', '?'),
+                                               self.size)
+
+
+class StreamedRequest(object):
+    """ XML-RPC request body with a Base64File CONTENT between the request
+        text PREFIX and SUFFIX
+
+        len() returns the size of the whole body, iterChunks() yields it
+        chunk by chunk.
+    """
+
+    def __init__(self, prefix, content, suffix):
+        self.prefix = prefix
+        self.content = content
+        self.suffix = suffix
+
+    def __len__(self):
+        return len(self.prefix) + self.content.encodedSize() + \
+               len(self.suffix)
+
+    def iterChunks(self):
+        """ yields the request body chunk by chunk """
+        yield self.prefix
+        for chunk in self.content.iterChunks():
+            yield chunk
+        yield self.suffix
+
+    @classmethod
+    def build(cls, dumps, params):
+        """ returns a StreamedRequest for the tuple PARAMS, which first item
+            is a dictionary with a Base64File as 'content' - DUMPS(params)
+            must return the request text for PARAMS """
+        args = params[0]
+        marker = 'BASE64FILE%s' % uuid.uuid4().hex
+        request = dumps((dict(args, content=marker),) + tuple(params[1:]))
+        (prefix, suffix) = request.split(marker)
+        return cls(prefix, args['content'], suffix)
+
+
+def hasStreamedContent(params):
+    """ returns True, if the first item of the tuple PARAMS is a dictionary
+        with a Base64File as 'content' """
+    return bool(params) and isinstance(params[0], dict) and \
+           isinstance(params[0].get('content'), Base64File)
@@ -0,0 +1,303 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from .testlinkerrors import TLTimeoutError, TLArgError
+from .testlinkretry import isReadOnlyMethod
+try:
+    import fcntl
+except ImportError:
+    # no file locks on this platform, only the in process variant is usable
+    fcntl = None
+
+__doc__ = """ This module defines the throttle, which could be used as
+argument 'throttle' of TestlinkAPIGeneric and TestlinkAPIClient to protect
+the TestLink server against too many calls
+
+Throttle
+   - token bucket rate limit (calls per second) and max number of concurrent
+     calls, separately for read-only and writing api methods
+   - one Throttle instance could be shared by several clients in a process
+   - with lockDir, the limits are shared between all processes on this host,
+     which use the same directory (requires fcntl file locks)
+TokenBucket, ConcurrencyLimit
+   - the in process limits
+FileTokenBucket, FileConcurrencyLimit
+   - the cross process limits
+"""
+
+class TokenBucket(object):
+    """ thread safe token bucket - allows RATE calls per second on average
+        and bursts of up to BURST calls """
+
+    # function used to wait for the next token
+    sleep = staticmethod(time.sleep)
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError('rate must be > 0, not %s' % rate)
+        self.rate = float(rate)
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._last = time.time()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        """ takes a token, waits if necessary, and returns the waited seconds
+            raises TLTimeoutError, if no token is available until DEADLINE """
+        waited = 0.0
+        while True:
+            with self._lock:
+                wait = self._take(time.time())
+            if wait <= 0:
+                return waited
+            _checkWait(wait, deadline)
+            self.sleep(wait)
+            waited += wait
+
+    def _take(self, now):
+        """ refills the bucket and takes a token
+            returns 0 or the seconds until the next token is available """
+        self._tokens = min(self.burst,
+                           self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    def release(self):
+        """ tokens are not given back """
+
+
+class ConcurrencyLimit(object):
+    """ thread safe limit for max MAXCONCURRENT calls at the same time """
+
+    def __init__(self, maxConcurrent):
+        if maxConcurrent < 1:
+            raise ValueError('maxConcurrent must be >= 1, not %s' %
+                             maxConcurrent)
+        self.maxConcurrent = maxConcurrent
+        self._inUse = 0
+        self._condition = threading.Condition(threading.Lock())
+
+    def acquire(self, deadline=None):
+        """ waits for a free slot and returns the waited seconds
+            raises TLTimeoutError, if no slot is free until DEADLINE """
+        start = time.time()
+        waited = 0.0
+        with self._condition:
+            while self._inUse >= self.maxConcurrent:
+                if deadline is None:
+                    self._condition.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TLTimeoutError('deadline exceeded while '
+                                'waiting for one of %i concurrent calls' %
+                                self.maxConcurrent)
+                    self._condition.wait(remaining)
+                waited = time.time() - start
+            self._inUse += 1
+        return waited
+
+    def release(self):
+        with self._condition:
+            self._inUse -= 1
+            self._condition.notify()
+
+
+class FileTokenBucket(TokenBucket):
+    """ token bucket, which state is stored in the file PATH, so that all
+        processes using the same file share the RATE """
+
+    def __init__(self, path, rate, burst=1):
+        _checkFileLocks()
+        TokenBucket.__init__(self, rate, burst)
+        self.path = path
+
+    def acquire(self, deadline=None):
+        waited = 0.0
+        while True:
+            with self._lock:
+                wait = self._takeFromFile()
+            if wait <= 0:
+                return waited
+            _checkWait(wait, deadline)
+            self.sleep(wait)
+            waited += wait
+
+    def _takeFromFile(self):
+        """ takes a token under an exclusive lock of the state file """
+        with open(self.path, 'a+') as stateFile:
+            fcntl.flock(stateFile, fcntl.LOCK_EX)
+            try:
+                stateFile.seek(0)
+                state = stateFile.read().split()
+                now = time.time()
+                if len(state) == 2:
+                    (self._tokens, self._last) = map(float, state)
+                else:
+                    (self._tokens, self._last) = (float(self.burst), now)
+                wait = self._take(now)
+                stateFile.seek(0)
+                stateFile.truncate()
+                stateFile.write('%r %r' % (self._tokens, self._last))
+                stateFile.flush()
+            finally:
+                fcntl.flock(stateFile, fcntl.LOCK_UN)
+        return wait
+
+
+class FileConcurrencyLimit(object):
+    """ limit for max MAXCONCURRENT calls at the same time in all processes,
+        which use the same lock file PATH.<n> for each slot """
+
+    # seconds between two tries to lock a slot
+    pollInterval = 0.02
+
+    sleep = staticmethod(time.sleep)
+
+    def __init__(self, path, maxConcurrent):
+        _checkFileLocks()
+        if maxConcurrent < 1:
+            raise ValueError('maxConcurrent must be >= 1, not %s' %
+                             maxConcurrent)
+        self.path = path
+        self.maxConcurrent = maxConcurrent
+        # slot files locked by the current thread
+        self._local = threading.local()
+
+    def acquire(self, deadline=None):
+        """ locks a free slot file and returns the waited seconds
+            raises TLTimeoutError, if no slot is free until DEADLINE """
+        waited = 0.0
+        while True:
+            for slot in range(self.maxConcurrent):
+                slotFile = open('%s.%i' % (self.path, slot), 'a')
+                try:
+                    fcntl.flock(slotFile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except IOError:
+                    slotFile.close()
+                    continue
+                if not hasattr(self._local, 'slotFiles'):
+                    self._local.slotFiles = []
+                self._local.slotFiles.append(slotFile)
+                return waited
+            _checkWait(self.pollInterval, deadline)
+            self.sleep(self.pollInterval)
+            waited += self.pollInterval
+
+    def release(self):
+        slotFile = self._local.slotFiles.pop()
+        fcntl.flock(slotFile, fcntl.LOCK_UN)
+        slotFile.close()
+
+
+class Throttle(object):
+    """ limits the api calls of one or several clients
+
+        READRATE / WRITERATE       - calls per second for read-only / writing
+                                     api methods, None means no limit
+        READBURST / WRITEBURST     - calls allowed at once after a quiet time
+        MAXREADS / MAXWRITES       - max concurrent calls, None means no limit
+        LOCKDIR                    - None: limits are valid for this process
+                                     directory: limits are shared between all
+                                     processes using the same directory
+
+        .stats counts the 'throttled' calls, which had to wait, and the total
+        'waitTime' in seconds.
+
+        Example - 10 writes per second for all CI jobs on this host:
+         >>> throttle = Throttle(writeRate=10, maxWrites=4,
+         ...                     lockDir='/var/tmp/testlink-throttle')
+         >>> tls = TestLinkHelper().connect(TestlinkAPIClient,
+         ...                                throttle=throttle)
+    """
+
+    def __init__(self, readRate=None, writeRate=None, readBurst=1,
+                 writeBurst=1, maxReads=None, maxWrites=None, lockDir=None):
+        self.lockDir = lockDir
+        if lockDir is not None and not os.path.isdir(lockDir):
+            os.makedirs(lockDir)
+        self.limits = {
+            'read'  : self._newLimits('read', readRate, readBurst, maxReads),
+            'write' : self._newLimits('write', writeRate, writeBurst,
+                                      maxWrites)}
+        self.stats = {'throttled' : 0, 'waitTime' : 0.0}
+        self._statsLock = threading.Lock()
+
+    def _newLimits(self, methodClass, rate, burst, maxConcurrent):
+        """ returns the list of limits for METHODCLASS 'read' or 'write' """
+        limits = []
+        if maxConcurrent is not None:
+            if self.lockDir is None:
+                limits.append(ConcurrencyLimit(maxConcurrent))
+            else:
+                limits.append(FileConcurrencyLimit(
+                    os.path.join(self.lockDir, '%s.slot' % methodClass),
+                    maxConcurrent))
+        if rate is not None:
+            if self.lockDir is None:
+                limits.append(TokenBucket(rate, burst))
+            else:
+                limits.append(FileTokenBucket(
+                    os.path.join(self.lockDir, '%s.bucket' % methodClass),
+                    rate, burst))
+        return limits
+
+    @contextmanager
+    def limit(self, methodNameAPI, deadline=None):
+        """ context manager, which waits until api method METHODNAMEAPI could
+            be called and holds its concurrency slot inside the block """
+        methodClass = isReadOnlyMethod(methodNameAPI) and 'read' or 'write'
+        acquired = []
+        waited = 0.0
+        try:
+            for a_limit in self.limits[methodClass]:
+                waited += a_limit.acquire(deadline)
+                acquired.append(a_limit)
+            self._countWait(waited)
+            yield
+        finally:
+            for a_limit in reversed(acquired):
+                a_limit.release()
+
+    def _countWait(self, waited):
+        if waited > 0:
+            with self._statsLock:
+                self.stats['throttled'] += 1
+                self.stats['waitTime'] += waited
+
+
+def _checkWait(wait, deadline):
+    """ raises TLTimeoutError, if waiting WAIT seconds would exceed DEADLINE
+    """
+    if deadline is not None and time.time() + wait > deadline:
+        raise TLTimeoutError('deadline exceeded while waiting for the '
+                             'throttle')
+
+def _checkFileLocks():
+    """ raises TLArgError, if this platform has no fcntl file locks """
+    if fcntl is None:
+        raise TLArgError('lockDir (cross process throttle) requires fcntl '
+                         'file locks, use a Throttle without lockDir')
@@ -0,0 +1,590 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+import httplib
+import socket
+import threading
+import time
+import xmlrpclib
+import zlib
+from urllib import splittype
+from .testlinkerrors import TLPoolTimeoutError
+from .testlinkstream import IterUnmarshaller
+
+__doc__ = """ This module defines xmlrpclib transports, which could be used
+as argument 'transport' of TestlinkAPIGeneric and TestlinkAPIClient
+
+KeepAliveTransport
+   - reuses the HTTP connection to the TestLink server for all calls
+     (HTTP/1.1 keep-alive) instead of connecting the server for each call
+   - reconnects transparently, if the server has closed the connection
+   - counts connects, reuses and reconnects - see .stats
+   - optional compression of requests and responses - see compress
+   - streams large responses element by element - see iterRequest
+   - sends large attachment uploads chunk by chunk - see streamsRequests
+SafeKeepAliveTransport
+   - same for HTTPS connections
+PooledTransport
+   - thread safe transport with a bounded pool of keep-alive connections, so 
+     one client could be shared between several threads
+   - counts additional, how often the pool was exhausted - see .stats
+SafePooledTransport
+   - same for HTTPS connections
+
+newKeepAliveTransport(server_url) and newPooledTransport(server_url) return 
+the matching transport for SERVER_URL
+"""
+
+
+class KeepAliveTransport(xmlrpclib.Transport):
+    """ xmlrpclib Transport, which keeps the HTTP connection to the server
+        open and reuses it for the following calls.
+
+        A request, which fails cause the server has closed the cached
+        connection meanwhile, is send once again with a new connection.
+
+        .stats is a dictionary with counters
+        - requests   : number of send requests
+        - connects   : number of new opened connections
+        - reuses     : number of requests send with an already open connection
+        - reconnects : number of requests repeated cause of a stale connection
+        - bytesSent, bytesSentRaw : request body size send / before 
+                                    compression
+        - bytesReceived, bytesReceivedRaw : response body size received / 
+                                            after decompression
+        
+        CONNECTTIMEOUT and READTIMEOUT limit in seconds, how long a new 
+        connection is established and how long the server may be silent 
+        while a response is read. Default None uses the global socket 
+        default. A socket.timeout is raised, if a limit is exceeded. 
+        setDeadline() limits both additional for the requests of the 
+        current thread. 
+
+        COMPRESS True enables the compression mode
+        - requests a gzip or deflate compressed response from the server
+        - the response is decompressed chunk by chunk while it is parsed
+        - request bodies larger than COMPRESSTHRESHOLD bytes are send gzip 
+          compressed. Default None means, requests are not compressed.
+          Attention: the web server must be able to decompress requests.
+        see .compressionRatio()
+    """
+
+    # one connection for all requests - not usable from several threads
+    threadSafe = False
+
+    # bytes read from the response stream at once 
+    readChunkSize = 16384
+
+    # codec (see testlinkcodec) used to parse the responses, None means the
+    # stock xmlrpclib parser
+    codec = None
+
+    # request bodies could be a StreamedRequest, like uploads of large 
+    # attachments, which are send chunk by chunk 
+    streamsRequests = True
+
+    def __init__(self, use_datetime=0, compress=False, compressThreshold=None,
+                 connectTimeout=None, readTimeout=None):
+        xmlrpclib.Transport.__init__(self, use_datetime)
+        self.compress = compress
+        # stock send_request() requests gzip responses, if this is enabled
+        self.accept_gzip_encoding = compress
+        self.compressThreshold = compressThreshold
+        self.connectTimeout = connectTimeout
+        self.readTimeout = readTimeout
+        # deadline and request state of the current thread
+        self._callState = threading.local()
+        self.stats = {'requests' : 0, 'connects' : 0, 'reuses' : 0,
+                      'reconnects' : 0, 'bytesSent' : 0, 'bytesSentRaw' : 0,
+                      'bytesReceived' : 0, 'bytesReceivedRaw' : 0}
+
+    def request(self, host, handler, request_body, verbose=0):
+        """ send REQUEST_BODY and returns the parsed response
+            the stock request() repeats it once, if the cached connection has
+            gone cold """
+        self._count('requests')
+        self._callState.connected = False
+        return xmlrpclib.Transport.request(self, host, handler, request_body,
+                                           verbose)
+
+    def iterRequest(self, host, handler, request_body, verbose=0):
+        """ send REQUEST_BODY and yields the elements of the top level array 
+            (or the (name, value) pairs of the top level struct) of the 
+            response, as soon as they are parsed. 
+            A scalar response is yielded as one element, if it is not empty
+            (like ''). 
+            
+            If the iteration is stopped before the end of the response, the
+            connection is closed, cause the rest of the response is unread. """
+        # parse_response() returns the unread response
+        self._callState.streamed = True
+        try:
+            response = KeepAliveTransport.request(self, host, handler, 
+                                                  request_body, verbose)
+        finally:
+            self._callState.streamed = False
+        unmarshaller = IterUnmarshaller(self._use_datetime)
+        parser = xmlrpclib.ExpatParser(unmarshaller)
+        complete = False
+        try:
+            for data in self._iterResponseData(response):
+                parser.feed(data)
+                for item in unmarshaller.popItems():
+                    yield item
+            parser.close()
+            complete = True
+        finally:
+            if not complete:
+                self.close()
+        for item in unmarshaller.popItems():
+            yield item
+        # raises a Fault response 
+        result = unmarshaller.close()
+        if unmarshaller.containerType is None and result[0]:
+            yield result[0]
+
+    def make_connection(self, host):
+        """ returns the cached connection for HOST or a new one - like the 
+            stock make_connection(), but with the connection class and 
+            timeouts of this transport """
+        (cachedHost, connection) = self._connection
+        isNew = connection is None or cachedHost != host
+        if isNew:
+            connection = self._newHostConnection(host)
+            self._connection = (host, connection)
+        return self._useConnection(connection, isNew)
+
+    def _newHostConnection(self, host):
+        """ returns a new connection object for HOST """
+        chost, self._extra_headers, x509 = self.get_host_info(host)
+        return self._newConnection(chost, x509)
+
+    def _useConnection(self, connection, isNew):
+        """ counts the use of CONNECTION for the current request and returns
+            it with the timeouts of the current thread """
+        if isNew or connection.sock is None:
+            # also, if the server has closed the socket after the last 
+            # response (Connection: close), httplib opens a new one
+            self._count('connects')
+        else:
+            self._count('reuses')
+        if getattr(self._callState, 'connected', False):
+            # the stock request() repeats the request with a new connection
+            self._count('reconnects')
+        self._callState.connected = True
+        return self._applyTimeouts(connection)
+
+    def _newConnection(self, chost, x509):
+        """ returns a new HTTP connection object for CHOST """
+        return _TimeoutHTTPConnection(chost)
+
+    def setDeadline(self, deadline):
+        """ limits the requests of the current thread until the absolute time
+            DEADLINE (like time.time()), None removes the limit """
+        self._callState.deadline = deadline
+
+    def _applyTimeouts(self, connection):
+        """ sets the connect and read timeout of CONNECTION for the next 
+            request, limited by the deadline of the current thread, and 
+            returns the CONNECTION """
+        connectTimeout = self.connectTimeout
+        readTimeout = self.readTimeout
+        deadline = getattr(self._callState, 'deadline', None)
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise socket.timeout('deadline exceeded')
+            connectTimeout = min(connectTimeout or remaining, remaining)
+            readTimeout = min(readTimeout or remaining, remaining)
+        elif connectTimeout is None and readTimeout is None:
+            if getattr(connection, 'readTimeout', None) is None:
+                # never limited - keep the socket defaults
+                return connection
+        if connectTimeout is None:
+            connectTimeout = socket._GLOBAL_DEFAULT_TIMEOUT
+        if readTimeout is None:
+            readTimeout = socket.getdefaulttimeout()
+        connection.timeout = connectTimeout
+        connection.readTimeout = readTimeout
+        if connection.sock is not None:
+            connection.sock.settimeout(readTimeout)
+        return connection
+
+    def send_request(self, connection, handler, request_body):
+        """ sends the request line and in compression mode the header 
+            Accept-Encoding """
+        if not self.compress:
+            return xmlrpclib.Transport.send_request(self, connection, handler,
+                                                    request_body)
+        connection.putrequest("POST", handler, skip_accept_encoding=True)
+        connection.putheader("Accept-Encoding", "gzip, deflate")
+
+    def send_content(self, connection, request_body):
+        """ sends REQUEST_BODY, gzip compressed if it exceeds the 
+            compressThreshold in compression mode 
+            A StreamedRequest is send uncompressed chunk by chunk. """
+        connection.putheader("Content-Type", "text/xml")
+        self._count('bytesSentRaw', len(request_body))
+        if hasattr(request_body, 'iterChunks'):
+            connection.putheader("Content-Length", str(len(request_body)))
+            connection.endheaders()
+            for chunk in request_body.iterChunks():
+                connection.send(chunk)
+                self._count('bytesSent', len(chunk))
+            return
+        if (self.compress and self.compressThreshold is not None and 
+            len(request_body) > self.compressThreshold):
+            connection.putheader("Content-Encoding", "gzip")
+            request_body = xmlrpclib.gzip_encode(request_body)
+        self._count('bytesSent', len(request_body))
+        connection.putheader("Content-Length", str(len(request_body)))
+        connection.endheaders(request_body)
+
+    def getparser(self):
+        """ returns parser and unmarshaller of the codec """
+        if self.codec is None:
+            return xmlrpclib.Transport.getparser(self)
+        return self.codec.getparser(self._use_datetime)
+
+    def parse_response(self, response):
+        """ reads the response chunk by chunk, decompress gzip or deflate 
+            encoded chunks and feeds them to the parser 
+            For iterRequest() the unread response is returned. """
+        if getattr(self._callState, 'streamed', False):
+            return response
+        p, u = self.getparser()
+        for data in self._iterResponseData(response):
+            p.feed(data)
+        p.close()
+
+        return u.close()
+
+    def _iterResponseData(self, response):
+        """ yields the decompressed body of RESPONSE chunk by chunk """
+        decoder = None
+        if hasattr(response, 'getheader'):
+            decoder = _newDecoder(response.getheader("Content-Encoding", ""))
+
+        while 1:
+            data = response.read(self.readChunkSize)
+            if not data:
+                break
+            self._count('bytesReceived', len(data))
+            if decoder is not None:
+                data = decoder.decompress(data)
+            self._count('bytesReceivedRaw', len(data))
+            if getattr(self, 'verbose', 0):
+                print "body:", repr(data)
+            yield data
+        if decoder is not None:
+            data = decoder.flush()
+            self._count('bytesReceivedRaw', len(data))
+            yield data
+
+    def compressionRatio(self):
+        """ returns a dictionary with the ratio between raw and transferred 
+            bytes for 'sent' requests and 'received' responses 
+            - 1.0 means no compression, 5.0 means 1/5 of the raw size was
+              transferred """
+        ratio = {}
+        for (direction, raw, wire) in [
+                    ('sent', 'bytesSentRaw', 'bytesSent'),
+                    ('received', 'bytesReceivedRaw', 'bytesReceived')]:
+            ratio[direction] = 1.0
+            if self.stats[wire]:
+                ratio[direction] = float(self.stats[raw]) / self.stats[wire]
+        return ratio
+
+    def _count(self, key, value=1):
+        """ increments the counter KEY in .stats """
+        self.stats[key] += value
+
+    def resetStats(self):
+        """ sets all counters in .stats back to 0 """
+        for key in self.stats:
+            self.stats[key] = 0
+
+
+class SafeKeepAliveTransport(KeepAliveTransport):
+    """ KeepAliveTransport for HTTPS connections """
+
+    def __init__(self, use_datetime=0, context=None, compress=False, 
+                 compressThreshold=None, connectTimeout=None, readTimeout=None):
+        KeepAliveTransport.__init__(self, use_datetime, compress, 
+                                    compressThreshold, connectTimeout, 
+                                    readTimeout)
+        self.context = context
+
+    def _newConnection(self, chost, x509):
+        """ returns a new HTTPS connection object for CHOST """
+        return _newHTTPSConnection(chost, x509, self.context)
+
+
+class PooledTransport(KeepAliveTransport):
+    """ thread safe KeepAliveTransport with a bounded pool of connections
+    
+        Each request borrows a connection from the pool and gives it back, 
+        when the response has been parsed. So up to POOLSIZE threads could 
+        call the server concurrently with one client. Further threads wait 
+        until a connection is given back. 
+        
+        POOLTIMEOUT defines, how many seconds a thread waits for a free 
+        connection, before a TLPoolTimeoutError is raised. 
+        Default None means, wait without limit. A deadline of the current 
+        thread (see setDeadline()) limits the wait additional, also with a 
+        TLPoolTimeoutError.
+        
+        .stats extends the KeepAliveTransport counters with
+        - waits    : number of requests, which had to wait for a connection
+        - timeouts : number of requests, which gave up waiting 
+        - maxInUse : max number of connections used at the same time
+    """
+
+    threadSafe = True
+
+    def __init__(self, poolSize=4, poolTimeout=None, use_datetime=0, 
+                 compress=False, compressThreshold=None, connectTimeout=None,
+                 readTimeout=None):
+        KeepAliveTransport.__init__(self, use_datetime, compress, 
+                                    compressThreshold, connectTimeout, 
+                                    readTimeout)
+        if poolSize < 1:
+            raise ValueError('poolSize must be >= 1, not %s' % poolSize)
+        self.poolSize = poolSize
+        self.poolTimeout = poolTimeout
+        self.stats.update({'waits' : 0, 'timeouts' : 0, 'maxInUse' : 0})
+        # idle connections as (host, connection) tuples
+        self._idleConnections = []
+        self._inUse = 0
+        self._poolLock = threading.Condition(threading.Lock())
+        self._statsLock = threading.Lock()
+        # connection borrowed by the current thread 
+        self._local = threading.local()
+
+    def request(self, host, handler, request_body, verbose=0):
+        """ borrows a connection from the pool, sends REQUEST_BODY and 
+            returns the parsed response  """
+        self._acquireConnection()
+        try:
+            return KeepAliveTransport.request(self, host, handler, 
+                                              request_body, verbose)
+        finally:
+            self._releaseConnection()
+
+    def iterRequest(self, host, handler, request_body, verbose=0):
+        """ borrows a connection from the pool for the whole iteration over
+            the elements of the response """
+        self._acquireConnection()
+        try:
+            for item in KeepAliveTransport.iterRequest(self, host, handler,
+                                                       request_body, verbose):
+                yield item
+        finally:
+            self._releaseConnection()
+
+    def _acquireConnection(self):
+        """ waits for a free pool slot and stores an idle connection (if 
+            one exists) as connection of the current thread """
+        with self._poolLock:
+            if self._inUse >= self.poolSize:
+                self._count('waits')
+                self._waitForFreeSlot()
+            self._inUse += 1
+            if self._inUse > self.stats['maxInUse']:
+                self.stats['maxInUse'] = self._inUse
+            if self._idleConnections:
+                self._local.connection = self._idleConnections.pop()
+            else:
+                self._local.connection = (None, None)
+
+    def _waitForFreeSlot(self):
+        """ waits until another thread releases its connection 
+            must be called with acquired ._poolLock """
+        deadline = None
+        if self.poolTimeout is not None:
+            deadline = time.time() + self.poolTimeout
+        callDeadline = getattr(self._callState, 'deadline', None)
+        while self._inUse >= self.poolSize:
+            now = time.time()
+            if callDeadline is not None and now >= callDeadline:
+                self._count('timeouts')
+                # client side wait, not a server failure
+                raise TLPoolTimeoutError('deadline exceeded while waiting '
+                                         'for a free connection')
+            if deadline is not None and now >= deadline:
+                self._count('timeouts')
+                raise TLPoolTimeoutError(
+                    'no free connection in pool (size %s) after %s sec' %
+                    (self.poolSize, self.poolTimeout))
+            limits = [x for x in (deadline, callDeadline) if x is not None]
+            if limits:
+                self._poolLock.wait(min(limits) - now)
+            else:
+                self._poolLock.wait()
+
+    def _releaseConnection(self):
+        """ gives the connection of the current thread back to the pool """
+        connection = self._local.connection
+        self._local.connection = (None, None)
+        with self._poolLock:
+            if connection[1] is not None:
+                self._idleConnections.append(connection)
+            self._inUse -= 1
+            self._poolLock.notify()
+
+    def make_connection(self, host):
+        """ returns the connection of the current thread for HOST or a 
+            new one """
+        (cachedHost, connection) = self._local.connection
+        isNew = connection is None or cachedHost != host
+        if isNew:
+            if connection is not None:
+                # pooled connection for another host is not usable 
+                connection.close()
+            connection = self._newHostConnection(host)
+            self._local.connection = (host, connection)
+        return self._useConnection(connection, isNew)
+
+    def close(self):
+        """ closes the connection of the current thread, or if called 
+            outside of a request, all idle connections of the pool """
+        connection = getattr(self._local, 'connection', (None, None))[1]
+        if connection is not None:
+            self._local.connection = (None, None)
+            connection.close()
+            return
+        with self._poolLock:
+            idleConnections = self._idleConnections
+            self._idleConnections = []
+        for (host, connection) in idleConnections:
+            connection.close()
+
+    def _count(self, key, value=1):
+        """ increments the counter KEY in .stats - thread safe """
+        with self._statsLock:
+            self.stats[key] += value
+
+
+class SafePooledTransport(PooledTransport):
+    """ PooledTransport for HTTPS connections """
+
+    def __init__(self, poolSize=4, poolTimeout=None, use_datetime=0, 
+                 context=None, compress=False, compressThreshold=None, 
+                 connectTimeout=None, readTimeout=None):
+        PooledTransport.__init__(self, poolSize, poolTimeout, use_datetime,
+                                 compress, compressThreshold, connectTimeout,
+                                 readTimeout)
+        self.context = context
+
+    def _newConnection(self, chost, x509):
+        """ returns a new HTTPS connection object for CHOST """
+        return _newHTTPSConnection(chost, x509, self.context)
+
+
+class _TimeoutHTTPConnection(httplib.HTTPConnection):
+    """ HTTPConnection, which uses .timeout only to connect and .readTimeout
+        for the established connection """
+
+    # None - socket timeout is not changed after connecting
+    readTimeout = None
+
+    def connect(self):
+        httplib.HTTPConnection.connect(self)
+        _setReadTimeout(self)
+
+class _TimeoutHTTPSConnection(httplib.HTTPSConnection):
+    """ HTTPSConnection with separate connect and read timeout """
+
+    readTimeout = None
+
+    def connect(self):
+        httplib.HTTPSConnection.connect(self)
+        _setReadTimeout(self)
+
+def _setReadTimeout(connection):
+    """ replaces the connect timeout of the CONNECTION socket with the read
+        timeout, if the transport has set the timeouts """
+    if connection.readTimeout is not None or \
+                connection.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+        connection.sock.settimeout(connection.readTimeout)
+
+def _newHTTPSConnection(chost, x509, context=None):
+    """ returns a new HTTPS connection object for CHOST """
+    if context is None:
+        return _TimeoutHTTPSConnection(chost, None, **(x509 or {}))
+    return _TimeoutHTTPSConnection(chost, None, context=context, 
+                                   **(x509 or {}))
+
+def _newDecoder(contentEncoding):
+    """ returns a zlib decompress object for CONTENTENCODING gzip or deflate
+        or None for other encodings """
+    if contentEncoding == 'gzip':
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if contentEncoding == 'deflate':
+        return _DeflateDecoder()
+    return None
+
+class _DeflateDecoder(object):
+    """ decompress object for Content-Encoding deflate
+        some web servers send raw deflate data without zlib header """
+
+    def __init__(self):
+        self._decoder = zlib.decompressobj()
+        self._first = True
+
+    def decompress(self, data):
+        if self._first:
+            self._first = False
+            try:
+                return self._decoder.decompress(data)
+            except zlib.error:
+                self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decoder.decompress(data)
+
+    def flush(self):
+        return self._decoder.flush()
+
+def newKeepAliveTransport(server_url, use_datetime=0, compress=False, 
+                          compressThreshold=None, connectTimeout=None, 
+                          readTimeout=None):
+    """ returns a KeepAliveTransport or SafeKeepAliveTransport instance,
+        depending on the protocol of SERVER_URL """
+
+    if splittype(server_url)[0] == 'https':
+        return SafeKeepAliveTransport(use_datetime, compress=compress, 
+                                      compressThreshold=compressThreshold,
+                                      connectTimeout=connectTimeout,
+                                      readTimeout=readTimeout)
+    return KeepAliveTransport(use_datetime, compress, compressThreshold,
+                              connectTimeout, readTimeout)
+
+def newPooledTransport(server_url, poolSize=4, poolTimeout=None, 
+                       use_datetime=0, compress=False, compressThreshold=None,
+                       connectTimeout=None, readTimeout=None):
+    """ returns a PooledTransport or SafePooledTransport instance,
+        depending on the protocol of SERVER_URL """
+
+    if splittype(server_url)[0] == 'https':
+        return SafePooledTransport(poolSize, poolTimeout, use_datetime, 
+                                   compress=compress, 
+                                   compressThreshold=compressThreshold,
+                                   connectTimeout=connectTimeout,
+                                   readTimeout=readTimeout)
+    return PooledTransport(poolSize, poolTimeout, use_datetime, compress, 
+                           compressThreshold, connectTimeout, readTimeout)
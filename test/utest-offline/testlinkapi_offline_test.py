@@ -20,9 +20,11 @@
 # this test works WITHOUT an online TestLink Server
 # no calls are send to a TestLink Server
 
-import unittest
+import unittest, threading
 from testlink import TestlinkAPIClient, TestLinkHelper
-from testlink.testlinkerrors import TLArgError
+from testlink.testlinkerrors import TLArgError, TLResponseError, \
+TLConnectionError
+from testlink.testlinktransport import PooledTransport
 
 # scenario_a includes response from a testlink 1.9.3 server
 SCENARIO_A = {'getProjects' : [
@@ -155,8 +157,8 @@ class DummyAPIClient(TestlinkAPIClient):
 
     __slots__ = ['scenario_data', 'callArgs']
     
-    def __init__(self, server_url, devKey):
-        super(DummyAPIClient, self).__init__(server_url, devKey)
+    def __init__(self, server_url, devKey, **args):
+        super(DummyAPIClient, self).__init__(server_url, devKey, **args)
         self.scenario_data = {}
         self.callArgs = None
 
@@ -382,7 +384,308 @@ class TestLinkAPIOfflineTestCase(unittest.TestCase):
         self.assertEqual('V1', self.api.callArgs['preconditions'])
         self.assertEqual('4711', self.api.callArgs['testsuiteid'])
         self.assertEqual('2211', self.api.callArgs['testprojectid'])
-        
+
+
+class DummyReportClient(TestlinkAPIClient):
+    """ Dummy for Simulation TestLinkAPICLient.
+    Overrides _callServer() Method to record the reportTCResult calls and to 
+    return an execution id - test case 999 does not exist
+    """
+
+    __slots__ = ['calls', 'reported', 'lock', 'failMulticall']
+
+    def __init__(self, server_url, devKey, **args):
+        super(DummyReportClient, self).__init__(server_url, devKey, **args)
+        self.calls = []
+        self.reported = []
+        self.lock = threading.Lock()
+        self.failMulticall = False
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        with self.lock:
+            self.calls.append(methodAPI)
+        if methodAPI == 'system.multicall':
+            if self.failMulticall:
+                raise TLConnectionError('connection refused')
+            # multicall wraps each response into a list
+            return [[self._report(x['params'][0])] for x in argsAPI]
+        if methodAPI == 'reportTCResult':
+            return self._report(argsAPI)
+        if methodAPI == 'getBuildsForTestPlan':
+            return [{'id' : '41', 'name' : 'Build 1'}]
+        if methodAPI == 'getTestPlanPlatforms':
+            return [{'id' : '51', 'name' : 'Linux'}]
+
+    def _report(self, argsAPI):
+        if str(argsAPI.get('testcaseid')) == '999':
+            return [{'code' : 5000, 'message' : 'TC ID 999 does not exist'}]
+        with self.lock:
+            self.reported.append(argsAPI)
+        return [{'id' : 'E%s' % argsAPI['testcaseid'], 'status' : True,
+                 'message' : 'Success!', 'operation' : 'reportTCResult'}]
+
+
+class TestLinkAPIReportResultsTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIClient.reportTCResults() - does not 
+    interacts with a TestLink Server. works with DummyReportClient
+    """
+
+    def setUp(self):
+        self.api = TestLinkHelper().connect(DummyReportClient)
+        self.results = [{'testcaseid' : '1', 'status' : 'p'}, 
+                        ('999', 'f'), ('3', 'b', 'blocked by 2')]
+
+    def check_report(self, report):
+        self.assertEqual(self.results, [x[0] for x in report])
+        self.assertEqual('E1', report[0][1])
+        self.assertIsInstance(report[1][1], TLResponseError)
+        self.assertEqual('E3', report[2][1])
+
+    def test_singleCalls(self):
+        report = self.api.reportTCResults(iter(self.results), 22, buildid=41)
+        self.check_report(report)
+        self.assertEqual(['reportTCResult'] * 3, self.api.calls)
+        self.assertEqual({'testcaseid' : '3', 'status' : 'b', 
+                          'notes' : 'blocked by 2', 'testplanid' : 22, 
+                          'buildid' : 41, 'devKey' : self.api.devKey}, 
+                         self.api.reported[1])
+
+    def test_namesResolvedOnce(self):
+        self.api.reportTCResults(self.results, 22, buildname='Build 1', 
+                                 platformname='Linux')
+        self.assertEqual(['getBuildsForTestPlan', 'getTestPlanPlatforms'] + 
+                         ['reportTCResult'] * 3, self.api.calls)
+        self.assertEqual(['51', '51'], 
+                         [x['platformid'] for x in self.api.reported])
+        self.assertRaises(TLArgError, self.api.reportTCResults, 
+                          self.results, 22, buildname='Build 2')
+
+    def test_batches(self):
+        report = self.api.reportTCResults(self.results, 22, buildid=41, 
+                                          batchSize=2)
+        self.check_report(report)
+        self.assertEqual(['system.multicall'] * 2, self.api.calls)
+
+    def test_failedBatchRoundTrip(self):
+        self.api.failMulticall = True
+        self.api.retryPolicy = None
+        report = self.api.reportTCResults(self.results, 22, buildid=41, 
+                                          batchSize=2)
+        self.assertEqual(3, len(report))
+        self.assertTrue(all([isinstance(x[1], TLConnectionError) 
+                             for x in report]))
+
+    def test_workers(self):
+        self.assertRaises(TLArgError, self.api.reportTCResults, 
+                          self.results, 22, workers=2)
+        api = TestLinkHelper().connect(DummyReportClient, 
+                                       transport=PooledTransport(poolSize=4))
+        report = api.reportTCResults(self.results * 10, 22, buildid=41, 
+                                     workers=4, batchSize=3)
+        self.assertEqual(30, len(report))
+        self.assertEqual(20, len(api.reported))
+        self.assertEqual(10, len(api.calls))
+
+
+class DummyCreateClient(TestlinkAPIClient):
+    """ Dummy for Simulation TestLinkAPICLient.
+    Overrides _callServer() Method to create test cases like TestLink - a 
+    duplicate name in a suite is blocked or renamed
+    """
+
+    __slots__ = ['calls', 'created', 'lock']
+
+    def __init__(self, server_url, devKey, **args):
+        super(DummyCreateClient, self).__init__(server_url, devKey, **args)
+        self.calls = []
+        self.created = []
+        self.lock = threading.Lock()
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        with self.lock:
+            self.calls.append(methodAPI)
+        if methodAPI == 'getProjects':
+            return SCENARIO_A['getProjects']
+        if methodAPI == 'system.multicall':
+            # multicall wraps each response into a list
+            return [[self._create(x['params'][0])] for x in argsAPI]
+        return self._create(argsAPI)
+
+    def _create(self, argsAPI):
+        with self.lock:
+            name = argsAPI['testcasename']
+            names = [x['testcasename'] for x in self.created 
+                     if x['testsuiteid'] == argsAPI['testsuiteid']]
+            if name in names:
+                if argsAPI['actiononduplicatedname'] == 'block':
+                    return [{'status' : True, 'additionalInfo' : 
+                             {'status_ok' : 0, 'has_duplicate' : True, 
+                              'msg' : 'duplicate name %s' % name}}]
+                name = '%s (%i)' % (name, names.count(name))
+            self.created.append(dict(argsAPI, testcasename=name))
+            externalId = len(self.created)
+        return [{'id' : str(1000 + externalId), 'status' : True, 
+                 'message' : 'Success!', 'additionalInfo' : 
+                 {'status_ok' : 1, 'external_id' : str(externalId), 
+                  'new_name' : name}}]
+
+
+class TestLinkAPICreateTestCasesTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIClient.createTestCases() - does not 
+    interacts with a TestLink Server. works with DummyCreateClient
+    """
+
+    def setUp(self):
+        self.api = TestLinkHelper().connect(DummyCreateClient)
+        self.specs = [{'testcasename' : 'TC 1', 'summary' : 's1', 
+                       'steps' : [('do A', 'A done'), ('do B', 'B done', 2)],
+                       'importance' : 3},
+                      {'testcasename' : 'TC 2', 'summary' : 's2', 
+                       'key' : 'legacy-2', 'preconditions' : 'none'},
+                      {'testcasename' : 'TC 1', 'summary' : 's3', 
+                       'key' : 'dup'}]
+
+    def test_createAndBlockDuplicate(self):
+        created = self.api.createTestCases(iter(self.specs), 21, 'admin', 
+                                           31)
+        self.assertEqual('NPROAPI-1', created[(31, 'TC 1')])
+        self.assertEqual('NPROAPI-2', created['legacy-2'])
+        self.assertIsInstance(created['dup'], TLResponseError)
+        self.assertIn('duplicate name TC 1', str(created['dup']))
+        self.assertEqual(2, len(self.api.created))
+        self.assertEqual([{'step_number' : '1', 'actions' : 'do A', 
+                           'expected_results' : 'A done', 
+                           'execution_type' : '1'}, 
+                          {'step_number' : '2', 'actions' : 'do B', 
+                           'expected_results' : 'B done', 
+                           'execution_type' : '2'}], 
+                         self.api.created[0]['steps'])
+        self.assertEqual(3, self.api.created[0]['importance'])
+        self.assertNotIn('key', self.api.created[1])
+        self.assertEqual([], self.api.stepsList)
+
+    def test_duplicateGenerateNew(self):
+        created = self.api.createTestCases(self.specs, 21, 'admin', 31, 
+                            actiononduplicatedname='generate_new', 
+                            batchSize=2)
+        self.assertEqual('NPROAPI-3', created['dup'])
+        self.assertEqual('TC 1 (1)', self.api.created[2]['testcasename'])
+        self.assertEqual(['getProjects'] + ['system.multicall'] * 2, 
+                         self.api.calls)
+
+    def test_unknownProject(self):
+        self.assertRaises(TLArgError, self.api.createTestCases, self.specs, 
+                          99, 'admin', 31)
+
+    def test_workers(self):
+        self.assertRaises(TLArgError, self.api.createTestCases, 
+                          self.specs, 21, workers=2)
+        api = TestLinkHelper().connect(DummyCreateClient, 
+                                       transport=PooledTransport(poolSize=4))
+        specs = [{'testcasename' : 'TC %i' % (x % 50), 'testsuiteid' : x % 3,
+                  'summary' : '', 'key' : x} for x in range(300)]
+        created = api.createTestCases(specs, 21, 'admin', workers=4, 
+                                      batchSize=10)
+        self.assertEqual(300, len(created))
+        self.assertEqual(150, len(api.created))
+        self.assertEqual(150, len([x for x in created.values() 
+                                   if isinstance(x, TLResponseError)]))
+
+
+class DummyLinkClient(TestlinkAPIClient):
+    """ Dummy for Simulation TestLinkAPICLient.
+    Overrides _callServer() Method to link test cases like TestLink - NPROAPI-1
+    is already linked without platform and with platform 1 and NPROAPI-9 does
+    not exist
+    """
+
+    __slots__ = ['calls', 'links', 'lock']
+
+    def __init__(self, server_url, devKey, **args):
+        super(DummyLinkClient, self).__init__(server_url, devKey, **args)
+        self.calls = []
+        self.links = []
+        self.lock = threading.Lock()
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        with self.lock:
+            self.calls.append(methodAPI)
+        if methodAPI == 'getProjects':
+            return SCENARIO_A['getProjects']
+        if methodAPI == 'getTestCasesForTestPlan':
+            return {'26' : {'0' : {'tcase_id' : '26', 'external_id' : '1', 
+                                   'platform_id' : '0', 'version' : '1'}, 
+                            '1' : {'tcase_id' : '26', 'external_id' : '1', 
+                                   'platform_id' : '1', 'version' : '1'}}}
+        if methodAPI == 'system.multicall':
+            # multicall wraps each response into a list
+            return [[self._link(x['params'][0])] for x in argsAPI]
+        return self._link(argsAPI)
+
+    def _link(self, argsAPI):
+        if argsAPI['testcaseexternalid'] == 'NPROAPI-9':
+            return [{'code' : 5040, 'message' : 'NPROAPI-9 does not exist'}]
+        with self.lock:
+            self.links.append(argsAPI)
+        return {'operation' : 'addTestCaseToTestPlan', 'status' : True, 
+                'feature_id' : str(len(self.links))}
+
+
+class TestLinkAPILinkTestCasesTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIClient.linkTestCasesToTestPlan() - does not
+    interacts with a TestLink Server. works with DummyLinkClient
+    """
+
+    def setUp(self):
+        self.api = TestLinkHelper().connect(DummyLinkClient)
+        self.items = [('NPROAPI-1', 1), 
+                      {'testcaseexternalid' : 'NPROAPI-2', 'version' : 3, 
+                       'urgency' : 1}, 
+                      ('NPROAPI-9', 1)]
+
+    def test_linkWithoutPlatform(self):
+        report = self.api.linkTestCasesToTestPlan(22, iter(self.items))
+        self.assertEqual(1, report['linked'])
+        self.assertEqual(1, report['skipped'])
+        self.assertEqual([('NPROAPI-9', 1)], 
+                         [x[0] for x in report['failed']])
+        self.assertIsInstance(report['failed'][0][2], TLResponseError)
+        self.assertGreater(report['perSecond'], 0)
+        self.assertEqual({'testcaseexternalid' : 'NPROAPI-2', 'version' : 3, 
+                          'urgency' : 1, 'testplanid' : 22, 
+                          'testprojectid' : '21', 'devKey' : self.api.devKey},
+                         self.api.links[0])
+        self.assertEqual(['getTestCasesForTestPlan', 'getProjects'] + 
+                         ['addTestCaseToTestPlan'] * 2, self.api.calls)
+
+    def test_platformsBatched(self):
+        report = self.api.linkTestCasesToTestPlan(22, self.items * 2, 
+                            platforms=[1, 2], testprojectid=21, batchSize=3)
+        self.assertEqual(3, report['linked'])
+        self.assertEqual(7, report['skipped'])
+        self.assertEqual([1, 2], [x[1] for x in report['failed']])
+        self.assertEqual([('NPROAPI-1', 2), ('NPROAPI-2', 1), 
+                          ('NPROAPI-2', 2)], 
+                         [(x['testcaseexternalid'], x['platformid']) 
+                          for x in self.api.links])
+        self.assertEqual(['getTestCasesForTestPlan', 'system.multicall', 
+                          'system.multicall'], self.api.calls)
+
+    def test_unknownPrefix(self):
+        self.assertRaises(TLArgError, self.api.linkTestCasesToTestPlan, 22,
+                          [('XXX-1', 1)])
+
+    def test_workers(self):
+        self.assertRaises(TLArgError, self.api.linkTestCasesToTestPlan, 
+                          22, self.items, workers=2)
+        api = TestLinkHelper().connect(DummyLinkClient, 
+                                       transport=PooledTransport(poolSize=4))
+        items = [('NPROAPI-%i' % x, 1) for x in range(10, 210)]
+        report = api.linkTestCasesToTestPlan(22, items, platforms=[1, 2], 
+                                    testprojectid=21, workers=4, batchSize=25)
+        self.assertEqual(400, report['linked'])
+        self.assertEqual(400, len(api.links))
+
 
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
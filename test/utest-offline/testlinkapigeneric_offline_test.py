@@ -82,8 +82,8 @@ class DummyAPIGeneric(TestlinkAPIGeneric):
 
     __slots__ = ['scenario_data', 'callArgs']
   
-    def __init__(self, server_url, devKey):
-        super(DummyAPIGeneric, self).__init__(server_url, devKey)
+    def __init__(self, server_url, devKey, **args):
+        super(DummyAPIGeneric, self).__init__(server_url, devKey, **args)
         self._positionalArgNames['DummyMethod'] = ['Uno', 'due', 'tre']
         self.scenario_data = {}
         self.callArgs = None
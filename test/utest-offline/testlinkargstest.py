@@ -34,6 +34,11 @@ class testlinkargsTestCase(unittest.TestCase):
         
         # module under test
         self.mut = testlinkargs
+        # backup the registered api methods, used by other test modules
+        self.backupArgs = self.mut._apiMethodsArgs.copy()
+        self.backupReplacements = self.mut._apiMethodsReplacements.copy()
+        self.backupCacheTTL = self.mut._apiMethodsCacheTTL.copy()
+        self.backupInvalidations = self.mut._apiMethodsInvalidations.copy()
         # reset the args cache
         self.mut._resetRegister()
         # api simulation
@@ -42,6 +47,11 @@ class testlinkargsTestCase(unittest.TestCase):
     def tearDown(self):
         # reset the args cache
         self.mut._resetRegister()
+        # restore the registered api methods
+        self.mut._apiMethodsArgs.update(self.backupArgs)
+        self.mut._apiMethodsReplacements.update(self.backupReplacements)
+        self.mut._apiMethodsCacheTTL.update(self.backupCacheTTL)
+        self.mut._apiMethodsInvalidations.update(self.backupInvalidations)
 
     def test__resetRegister(self):
         self.mut._apiMethodsArgs['BigBird'] = 'not a Small Bird'
@@ -130,6 +140,35 @@ class testlinkargsTestCase(unittest.TestCase):
                                              ['Uno', 'due', 'tre'])
         self.assertEqual(response,  (['quad'], ['cinque']) )
 
+    def test_registerResponseReplacement(self):
+        self.mut.registerResponseReplacement('DummyMethod', 3041, [])
+        self.mut.registerResponseReplacement('DummyMethod', None, {})
+        self.assertEqual((True, []), 
+                         self.mut.getResponseReplacement('DummyMethod', 3041))
+        self.assertEqual((True, {}), 
+                         self.mut.getResponseReplacement('DummyMethod', None))
+        self.assertTrue(self.mut.hasResponseReplacement('DummyMethod'))
+        self.assertFalse(self.mut.hasResponseReplacement('OtherMethod'))
+
+    def test_registerCacheTTL(self):
+        self.mut.registerCacheTTL('DummyMethod', 300)
+        self.assertEqual(300, self.mut.getCacheTTL('DummyMethod'))
+        self.assertIsNone(self.mut.getCacheTTL('OtherMethod'))
+
+    def test_registerInvalidation(self):
+        self.mut.registerInvalidation('DummyMethod', 'getDummies', ['Uno'])
+        self.mut.registerInvalidation('DummyMethod', 'getAllDummies', [])
+        self.assertEqual({'getDummies' : ['Uno'], 'getAllDummies' : []}, 
+                         self.mut.getInvalidations('DummyMethod'))
+        self.assertEqual({}, self.mut.getInvalidations('OtherMethod'))
+
+    def test_getResponseReplacement_unknown(self):
+        self.mut.registerResponseReplacement('DummyMethod', 3041, [])
+        self.assertEqual((False, None), 
+                         self.mut.getResponseReplacement('DummyMethod', 7008))
+        self.assertEqual((False, None), 
+                         self.mut.getResponseReplacement('OtherMethod', 3041))
+
     def test_getArgsForMethod_unknownMethods(self):
         with self.assertRaisesRegexp(testlinkargs.TLArgError, 
                                      'unknownMethod not registered'):
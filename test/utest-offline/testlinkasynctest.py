@@ -0,0 +1,265 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest, threading, time
+from testlink import TestlinkAPIGeneric, TestlinkAPIClient, \
+AsyncTestlinkAPIGeneric, AsyncTestlinkAPIClient, TestLinkHelper
+from testlink.testlinkerrors import TLResponseError, TLArgError
+from testlink.testlinkfutures import TLExecutor, TLFuture, TLFutureTimeout, \
+waitAll, mapConcurrent
+from testlink.testlinktransport import PooledTransport, KeepAliveTransport
+
+class DummyAPIGeneric(TestlinkAPIGeneric):
+    """ Dummy for Simulation TestLinkAPIGeneric.
+    Overrides _callServer() Method to wait for .gate and to count the
+    concurrent calls
+    """
+
+    __slots__ = ['gate', 'inFlight', 'maxInFlight', 'lock']
+
+    def __init__(self, server_url, devKey, **args):
+        super(DummyAPIGeneric, self).__init__(server_url, devKey, **args)
+        self.gate = threading.Event()
+        self.gate.set()
+        self.inFlight = 0
+        self.maxInFlight = 0
+        self.lock = threading.Lock()
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        with self.lock:
+            self.inFlight += 1
+            self.maxInFlight = max(self.maxInFlight, self.inFlight)
+        self.gate.wait(5)
+        with self.lock:
+            self.inFlight -= 1
+        if argsAPI.get('testcaseid') == 'unknown':
+            return [{'message': 'TC ID unknown does not exist!', 'code': 5000}]
+        return [{'method' : methodAPI, 'args' : argsAPI}]
+
+class DummyAPIClient(TestlinkAPIClient):
+    """ Dummy for Simulation TestLinkAPIClient, returns the projects """
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        return [{'name' : 'project A', 'id' : '1'},
+                {'name' : 'project B', 'id' : '2'}]
+
+class DummyAsyncAPIGeneric(AsyncTestlinkAPIGeneric):
+    SYNC_CLASS = DummyAPIGeneric
+
+class DummyAsyncAPIClient(AsyncTestlinkAPIClient):
+    SYNC_CLASS = DummyAPIClient
+
+
+class TestLinkAsyncAPITestCase(unittest.TestCase):
+    """ TestCases for AsyncTestlinkAPIGeneric - does not interacts with a
+    TestLink Server. works with DummyAPIGeneric which simulates slow calls
+    """
+
+    def setUp(self):
+        self.api = DummyAsyncAPIGeneric('http://SERVER-1/xmlrpc.php',
+                                        'DEVKEY-1', workers=4)
+
+    def tearDown(self):
+        self.api.close()
+
+    def test_apiMethodReturnsFuture(self):
+        future = self.api.getTestCase(testcaseid='4711')
+        self.assertIsInstance(future, TLFuture)
+        response = future.result(5)
+        self.assertEqual('getTestCase', response[0]['method'])
+        self.assertEqual({'testcaseid' : '4711', 'devKey' : 'DEVKEY-1'},
+                         response[0]['args'])
+
+    def test_responseErrorRaisedByResult(self):
+        future = self.api.getTestCase(testcaseid='unknown')
+        self.assertRaises(TLResponseError, future.result, 5)
+        self.assertIsInstance(future.exception(), TLResponseError)
+
+    def test_callsInFlightConcurrently(self):
+        self.api.client.gate.clear()
+        futures = [self.api.getTestCase(testcaseid=x) for x in range(10)]
+        self.assertFalse(any([f.done() for f in futures]))
+        self.api.client.gate.set()
+        responses = waitAll(futures, 5)
+        self.assertEqual(10, len(responses))
+        self.assertTrue(1 < self.api.client.maxInFlight <= 4)
+
+    def test_pooledTransport(self):
+        transport = self.api.client.server('transport')
+        self.assertIsInstance(transport, PooledTransport)
+        self.assertEqual(4, transport.poolSize)
+
+    def test_syncMethods(self):
+        self.assertIn('getTestCase(', self.api.whatArgs('getTestCase'))
+        self.assertEqual('DEVKEY-1', self.api.devKey)
+
+    def test_apiMethodNames(self):
+        names = self.api.apiMethodNames()
+        self.assertIn('getTestCase', names)
+        self.assertIn('reportTCResult', names)
+        self.assertNotIn('whatArgs', names)
+
+    def test_submit(self):
+        future = self.api.submit(lambda client, x: (client.devKey, x), 42)
+        self.assertEqual(('DEVKEY-1', 42), future.result(5))
+
+    def test_asyncServiceMethod(self):
+        api = DummyAsyncAPIClient('http://SERVER-1/xmlrpc.php', 'DEVKEY-1')
+        future = api.getProjectIDByName('project B')
+        self.assertEqual('2', future.result(5))
+        self.assertEqual(2, api.countProjects().result(5))
+        api.close()
+
+
+class TestLinkFuturesTestCase(unittest.TestCase):
+    """ TestCases for TLExecutor and TLFuture """
+
+    def test_executorResults(self):
+        with TLExecutor(3) as executor:
+            futures = [executor.submit(pow, x, 2) for x in range(10)]
+            self.assertEqual([x * x for x in range(10)], waitAll(futures))
+
+    def test_executorMaxWorkers(self):
+        executor = TLExecutor(2)
+        gate = threading.Event()
+        for x in range(5):
+            executor.submit(gate.wait, 5)
+        self.assertEqual(2, len(executor._threads))
+        gate.set()
+        executor.shutdown()
+
+    def test_futureTimeout(self):
+        executor = TLExecutor(1)
+        gate = threading.Event()
+        future = executor.submit(gate.wait, 5)
+        self.assertRaises(TLFutureTimeout, future.result, 0.01)
+        gate.set()
+        self.assertTrue(future.result(5))
+        executor.shutdown()
+
+    def test_futureCallback(self):
+        done = []
+        with TLExecutor(1) as executor:
+            future = executor.submit(pow, 2, 3)
+            future.addDoneCallback(lambda f: done.append(f.result()))
+        future.addDoneCallback(lambda f: done.append(f.result()))
+        self.assertEqual([8, 8], done)
+
+    def test_invalidWorkers(self):
+        self.assertRaises(ValueError, TLExecutor, 0)
+
+    def test_mapConcurrentOrdered(self):
+        def a_func(x):
+            time.sleep(0.001 * (10 - x))
+            return x * x
+        response = list(mapConcurrent(a_func, range(10), workers=4))
+        self.assertEqual([(x, x * x) for x in range(10)], response)
+
+    def test_mapConcurrentUnordered(self):
+        gate = threading.Event()
+        def a_func(x):
+            if x == 0:
+                gate.wait(5)
+            else:
+                gate.set()
+            return x
+        response = list(mapConcurrent(a_func, range(2), workers=2, 
+                                      ordered=False))
+        self.assertEqual([(1, 1), (0, 0)], response)
+
+    def test_mapConcurrentMaxInFlight(self):
+        consumed = []
+        def items():
+            for x in range(10):
+                consumed.append(x)
+                yield x
+        results = mapConcurrent(lambda x: x, items(), workers=2, maxInFlight=3)
+        self.assertEqual((0, 0), results.next())
+        self.assertTrue(len(consumed) <= 4)
+        self.assertEqual(range(1, 10), [x[1] for x in results])
+
+    def test_mapConcurrentErrors(self):
+        def a_func(x):
+            if x == 1:
+                raise TLResponseError('DummyMethod', x, 'failed', 4711)
+            return x
+        response = list(mapConcurrent(a_func, range(3)))
+        self.assertEqual(0, response[0][1])
+        self.assertEqual(4711, response[1][1].code)
+        self.assertEqual(2, response[2][1])
+
+    def test_mapConcurrentOtherErrorsRaised(self):
+        def a_func(x):
+            raise KeyError(x)
+        self.assertRaises(KeyError, list, mapConcurrent(a_func, range(3)))
+
+
+class TestLinkAPIMapTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIGeneric.map() - does not interacts with a
+    TestLink Server. works with DummyAPIGeneric 
+    """
+
+    def setUp(self):
+        self.api = TestLinkHelper().connect(DummyAPIGeneric, 
+                                    transport=PooledTransport(poolSize=4))
+
+    def test_map_argTypes(self):
+        items = ['4711', ('4712',), {'testcaseexternalid' : 'P-1'}]
+        self.api._positionalArgNames['getTestCase'] = ['testcaseid']
+        response = list(self.api.map('getTestCase', items))
+        self.assertEqual(items, [x[0] for x in response])
+        self.assertEqual({'testcaseid' : '4711', 'devKey' : self.api.devKey},
+                         response[0][1][0]['args'])
+        self.assertEqual('4712', response[1][1][0]['args']['testcaseid'])
+        self.assertEqual('P-1', 
+                         response[2][1][0]['args']['testcaseexternalid'])
+
+    def test_map_keepsErrors(self):
+        items = [{'testcaseid' : x} for x in ['1', 'unknown', '3']]
+        response = list(self.api.map('getTestCase', items, workers=2))
+        self.assertEqual(3, len(response))
+        self.assertIsInstance(response[1][1], TLResponseError)
+        self.assertEqual('3', response[2][1][0]['args']['testcaseid'])
+
+    def test_map_concurrent(self):
+        self.api.gate.clear()
+        items = [{'testcaseid' : x} for x in range(8)]
+        results = self.api.map('getTestCase', items, workers=4)
+        threading.Timer(0.05, self.api.gate.set).start()
+        self.assertEqual(8, len(list(results)))
+        self.assertEqual(4, self.api.maxInFlight)
+
+    def test_map_notRegisteredMethod(self):
+        response = list(self.api.map('newApiMethod', [{'x' : 1}], workers=1))
+        self.assertEqual('newApiMethod', response[0][1][0]['method'])
+        self.assertEqual({'x' : 1}, response[0][1][0]['args'])
+
+    def test_map_notThreadSafeTransport(self):
+        api = TestLinkHelper().connect(DummyAPIGeneric, 
+                                       transport=KeepAliveTransport())
+        self.assertRaises(TLArgError, api.map, 'getTestCase', [], workers=2)
+        self.assertEqual([], list(api.map('getTestCase', [], workers=1)))
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
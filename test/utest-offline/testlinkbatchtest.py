@@ -0,0 +1,188 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest, threading
+from testlink import TestlinkAPIGeneric, TestLinkHelper
+from testlink.testlinkerrors import TestLinkError, TLArgError, \
+TLResponseError, TLAPIError
+from testlink.testlinkbatch import TLBatchResult
+
+# responses for single calls, key is the method name and the first arg value
+SCENARIO_BATCH = {
+    ('reportTCResult', 'TC-1') : [{'status': True, 'id': '4711',
+                                   'message': 'Success!'}],
+    ('reportTCResult', 'TC-2') : [{'message': 'TC ID 2 does not exist!',
+                                   'code': 5000}],
+    ('getBuildsForTestPlan', 'noBuild') : '',
+    ('getTestPlanPlatforms', 'noPlatform') : [
+                {'message': 'Test plan (noPlatform) has no platforms linked',
+                 'code': 3041}],
+    ('getTestPlanPlatforms', 'badPlan') : [
+                {'message': 'Test plan ID (badPlan) does not exist',
+                 'code': 3000}],
+    }
+
+class DummyAPIBatchGeneric(TestlinkAPIGeneric):
+    """ Dummy for Simulation TestLinkAPIGeneric with system.multicall.
+    Overrides _callServer() Method to return multicall test scenarios
+    """
+
+    __slots__ = ['multicalls', 'singleCalls']
+
+    def __init__(self, server_url, devKey, **args):
+        super(DummyAPIBatchGeneric, self).__init__(server_url, devKey, **args)
+        self.multicalls = []
+        self.singleCalls = []
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        if methodAPI != 'system.multicall':
+            self.singleCalls.append(methodAPI)
+            return 'single call %s' % methodAPI
+        self.multicalls.append(argsAPI)
+        responses = []
+        for a_call in argsAPI:
+            methodName = a_call['methodName'][3:]
+            args = a_call['params'][0]
+            if methodName == 'unknownMethod':
+                responses.append({'faultCode': -32601,
+                    'faultString': 'server error. requested method does not exist'})
+                continue
+            firstArg = args.get('testcaseid', args.get('testplanid'))
+            responses.append([SCENARIO_BATCH[(methodName, firstArg)]])
+        return responses
+
+
+class TestLinkAPIBatchTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIGeneric.batch() - does not interacts with a
+    TestLink Server. works with DummyAPIBatchGeneric which simulates
+    system.multicall
+    """
+
+    def setUp(self):
+        self.api = TestLinkHelper().connect(DummyAPIBatchGeneric)
+
+    def test_batch_returnsPlaceholders(self):
+        with self.api.batch() as batch:
+            response = batch.reportTCResult(testcaseid='TC-1', testplanid='P',
+                                            status='p')
+            self.assertIsInstance(response, TLBatchResult)
+            self.assertFalse(response.done())
+            self.assertEqual([], self.api.multicalls)
+        self.assertTrue(response.done())
+        self.assertEqual(1, len(self.api.multicalls))
+        self.assertEqual('4711', response.result()[0]['id'])
+
+    def test_batch_argsWithDevKey(self):
+        with self.api.batch() as batch:
+            batch.reportTCResult(testcaseid='TC-1', testplanid='P', status='p')
+        a_call = self.api.multicalls[0][0]
+        self.assertEqual('tl.reportTCResult', a_call['methodName'])
+        self.assertEqual({'testcaseid' : 'TC-1', 'testplanid' : 'P',
+                          'status' : 'p', 'devKey' : self.api.devKey},
+                         a_call['params'][0])
+
+    def test_batch_chunkSize(self):
+        with self.api.batch(chunkSize=2) as batch:
+            for x in range(5):
+                batch.reportTCResult(testcaseid='TC-1', testplanid='P',
+                                     status='p')
+        self.assertEqual([2, 2, 1], [len(x) for x in self.api.multicalls])
+        self.assertEqual(5, len(batch.calls))
+        self.assertTrue(all([x.done() for x in batch.calls]))
+
+    def test_batch_invalidChunkSize(self):
+        self.assertRaises(TLArgError, self.api.batch, 0)
+
+    def test_batch_errorCodePerCall(self):
+        with self.api.batch() as batch:
+            ok = batch.reportTCResult(testcaseid='TC-1', testplanid='P',
+                                      status='p')
+            nok = batch.reportTCResult(testcaseid='TC-2', testplanid='P',
+                                       status='p')
+        self.assertFalse(ok.failed())
+        self.assertTrue(nok.failed())
+        self.assertRaises(TLResponseError, nok.result)
+        self.assertEqual(5000, nok.error().code)
+
+    def test_batch_replaceTLResponseError(self):
+        with self.api.batch() as batch:
+            noBuild = batch.getBuildsForTestPlan('noBuild')
+            noPlatform = batch.getTestPlanPlatforms('noPlatform')
+            badPlan = batch.getTestPlanPlatforms('badPlan')
+        self.assertEqual([], noBuild.result())
+        self.assertEqual([], noPlatform.result())
+        self.assertEqual(3000, badPlan.error().code)
+
+    def test_batch_faultPerCall(self):
+        with self.api.batch() as batch:
+            fault = batch.callServerWithPosArgs('unknownMethod')
+        self.assertIsInstance(fault.error(), TLAPIError)
+        self.assertIn('unknownMethod', str(fault.error()))
+
+    def test_batch_results(self):
+        with self.api.batch() as batch:
+            batch.getBuildsForTestPlan('noBuild')
+            batch.getTestPlanPlatforms('badPlan')
+        results = batch.results()
+        self.assertEqual([], results[0])
+        self.assertIsInstance(results[1], TLResponseError)
+
+    def test_batch_exceptionInBlock(self):
+        def a_func(api):
+            with api.batch() as batch:
+                response = batch.getBuildsForTestPlan('noBuild')
+                raise ValueError('stop')
+        self.assertRaises(ValueError, a_func, self.api)
+        self.assertEqual([], self.api.multicalls)
+        # client works again without batch
+        self.assertEqual('single call about', self.api.about())
+
+    def test_batch_notSendResult(self):
+        response = TLBatchResult('getBuildsForTestPlan', {})
+        self.assertRaises(TestLinkError, response.result)
+
+    def test_batch_nested(self):
+        def a_func(api):
+            with api.batch():
+                with api.batch():
+                    pass
+        self.assertRaises(TLArgError, a_func, self.api)
+
+    def test_batch_clientCallsInBlock(self):
+        with self.api.batch():
+            response = self.api.getBuildsForTestPlan('noBuild')
+        self.assertEqual([], response.result())
+
+    def test_batch_otherThreadNotBatched(self):
+        responses = []
+        def a_func(): responses.append(self.api.about())
+        with self.api.batch():
+            a_thread = threading.Thread(target=a_func)
+            a_thread.start()
+            a_thread.join()
+        self.assertEqual(['single call about'], responses)
+        self.assertEqual([], self.api.multicalls)
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,529 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest, time, tempfile, shutil, os
+from testlink import TestlinkAPIGeneric, TestLinkHelper
+from testlink.testlinkargs import getCacheTTL, getInvalidations
+from testlink.testlinkerrors import TLResponseError
+from testlink.testlinkcache import ResponseCache, TestCaseVersionCache, \
+SqliteResponseCache
+from testlink.testlinkcoalesce import requestKey
+
+class DummyAPIGeneric(TestlinkAPIGeneric):
+    """ Dummy for Simulation TestLinkAPIGeneric.
+    Overrides _callServer() Method to record the calls and to return a new
+    response for each call
+    """
+
+    __slots__ = ['calls']
+
+    def __init__(self, server_url, devKey, **args):
+        super(DummyAPIGeneric, self).__init__(server_url, devKey, **args)
+        self.calls = []
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        self.calls.append(methodAPI)
+        if methodAPI == 'system.multicall':
+            return [[{'id' : '1'}] for x in argsAPI]
+        if methodAPI == 'getTestCase':
+            return aTestCase(argsAPI.get('version') or '3')
+        if methodAPI in EMPTY_RESPONSES:
+            return EMPTY_RESPONSES[methodAPI]
+        return [{'method' : methodAPI, 'call' : len(self.calls)}]
+
+# responses of empty projects and suites
+EMPTY_RESPONSES = {
+    'getFirstLevelTestSuitesForTestProject' : [{'code' : 7008, 
+                        'message' : 'Test Project (noSuite) is empty.'}],
+    'getTestSuitesForTestSuite' : '',
+    'getTestCasesForTestPlan' : '',
+    'getTestCasesForTestSuite' : [{'code' : 7000, 
+                        'message' : '(getTestCasesForTestSuite) - Test Suite'
+                        ' ID (4711) does not exist.'}]}
+
+def aTestCase(version, testcaseid='26', externalid='NPROAPI-1'):
+    """ returns a getTestCase response """
+    return [{'testcase_id' : testcaseid, 'full_tc_external_id' : externalid, 
+             'version' : str(version), 'name' : 'TC v%s' % version}]
+
+
+class TestLinkResponseCacheTestCase(unittest.TestCase):
+    """ TestCases for ResponseCache """
+
+    def setUp(self):
+        self.cache = ResponseCache(maxSize=3)
+
+    def put(self, methodName, args, response, ttl=60):
+        key = requestKey('URL', methodName, args)
+        self.cache.put(key, methodName, args, response, ttl, 
+                       self.cache.generation(methodName))
+        return key
+
+    def test_registeredDefaults(self):
+        self.assertEqual(300, getCacheTTL('getBuildsForTestPlan'))
+        self.assertIsNone(getCacheTTL('getTestCase'))
+        self.assertEqual({'getBuildsForTestPlan' : ['testplanid'], 
+                          'getLatestBuildForTestPlan' : ['testplanid']}, 
+                         getInvalidations('createBuild'))
+
+    def test_methodTTLs(self):
+        cache = ResponseCache(methodTTLs={'getTestCase' : 600, 
+                                          'getProjects' : 0})
+        self.assertEqual(600, cache.ttlFor('getTestCase'))
+        self.assertIsNone(cache.ttlFor('getProjects'))
+        self.assertEqual(300, cache.ttlFor('getTestPlanByName'))
+
+    def test_hitReturnsCopy(self):
+        key = self.put('getProjects', {}, [{'id' : '1'}])
+        (found, response) = self.cache.get(key)
+        self.assertTrue(found)
+        response.append('changed')
+        self.assertEqual((True, [{'id' : '1'}]), self.cache.get(key))
+        self.assertEqual(2, self.cache.stats['hits'])
+
+    def test_putStoresCopy(self):
+        response = [{'id' : '1'}]
+        key = self.put('getProjects', {}, response)
+        response[0]['id'] = 'changed'
+        self.assertEqual((True, [{'id' : '1'}]), self.cache.get(key))
+
+    def test_expired(self):
+        key = self.put('getProjects', {}, [], ttl=0.01)
+        time.sleep(0.02)
+        self.assertEqual((False, None), self.cache.get(key))
+        self.assertEqual(1, self.cache.stats['expired'])
+        self.assertEqual(1, self.cache.stats['misses'])
+
+    def test_lruEviction(self):
+        keys = [self.put('getBuildsForTestPlan', {'testplanid' : x}, [x]) 
+                for x in range(3)]
+        self.cache.get(keys[0])
+        self.put('getBuildsForTestPlan', {'testplanid' : 3}, [3])
+        self.assertEqual(3, len(self.cache))
+        self.assertFalse(self.cache.get(keys[1])[0])
+        self.assertTrue(self.cache.get(keys[0])[0])
+        self.assertEqual(1, self.cache.stats['evictions'])
+
+    def test_invalidateMatchingArgs(self):
+        key1 = self.put('getBuildsForTestPlan', {'testplanid' : '1'}, [])
+        key2 = self.put('getBuildsForTestPlan', {'testplanid' : '2'}, [])
+        self.cache.invalidateFor('createBuild', {'testplanid' : 1, 
+                                                 'buildname' : 'B'})
+        self.assertFalse(self.cache.get(key1)[0])
+        self.assertTrue(self.cache.get(key2)[0])
+
+    def test_invalidateWithoutMatchingArgs(self):
+        key1 = self.put('getProjectPlatforms', {'testprojectid' : '1'}, [])
+        key2 = self.put('getProjectPlatforms', {'testprojectid' : '2'}, [])
+        self.cache.invalidateFor('createPlatform', {'testprojectname' : 'P', 
+                                                    'platformname' : 'X'})
+        self.assertEqual(0, len(self.cache))
+
+    def test_putAfterInvalidationIgnored(self):
+        generation = self.cache.generation('getProjects')
+        self.cache.invalidate('getProjects')
+        key = requestKey('URL', 'getProjects', {})
+        self.cache.put(key, 'getProjects', {}, ['old'], 60, generation)
+        self.assertEqual(0, len(self.cache))
+
+
+class TestLinkAPICacheTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIGeneric with response cache - does not 
+    interacts with a TestLink Server. works with DummyAPIGeneric
+    """
+
+    def setUp(self):
+        self.api = TestLinkHelper().connect(DummyAPIGeneric, cache=True)
+
+    def test_defaultWithoutCache(self):
+        api = TestLinkHelper().connect(DummyAPIGeneric)
+        api.getProjects()
+        api.getProjects()
+        self.assertEqual(2, len(api.calls))
+        self.assertEqual({}, api.cacheStats())
+
+    def test_readThrough(self):
+        response1 = self.api.getBuildsForTestPlan('4711')
+        response2 = self.api.getBuildsForTestPlan(testplanid='4711')
+        self.assertEqual(response1, response2)
+        self.assertEqual(['getBuildsForTestPlan'], self.api.calls)
+        self.assertEqual(1, self.api.cacheStats()['hits'])
+
+    def test_notCacheableMethod(self):
+        self.api.getTestCase(testcaseid='1')
+        self.api.getTestCase(testcaseid='1')
+        self.assertEqual(2, len(self.api.calls))
+
+    def test_writeInvalidates(self):
+        self.api.getBuildsForTestPlan('4711')
+        self.api.getBuildsForTestPlan('4712')
+        self.api.createBuild('4711', 'build 2')
+        self.api.getBuildsForTestPlan('4711')
+        self.api.getBuildsForTestPlan('4712')
+        self.assertEqual(['getBuildsForTestPlan', 'getBuildsForTestPlan', 
+                          'createBuild', 'getBuildsForTestPlan'], 
+                         self.api.calls)
+
+    def test_batchedWriteInvalidates(self):
+        self.api.getTestPlanPlatforms('4711')
+        with self.api.batch() as batch:
+            batch.addPlatformToTestPlan('4711', 'Linux')
+        self.api.getTestPlanPlatforms('4711')
+        self.assertEqual(['getTestPlanPlatforms', 'system.multicall', 
+                          'getTestPlanPlatforms'], self.api.calls)
+
+    def test_clear(self):
+        self.api.getTestProjectByName('P')
+        self.api.responseCache.clear()
+        self.api.getTestProjectByName('P')
+        self.assertEqual(2, len(self.api.calls))
+
+    def test_negativeCaching(self):
+        self.assertEqual([], self.api.getFirstLevelTestSuitesForTestProject(21))
+        self.assertEqual([], self.api.getFirstLevelTestSuitesForTestProject(21))
+        self.assertEqual([], self.api.getTestSuitesForTestSuite(23))
+        self.assertEqual([], self.api.getTestSuitesForTestSuite(23))
+        self.assertEqual(['getFirstLevelTestSuitesForTestProject', 
+                          'getTestSuitesForTestSuite'], self.api.calls)
+
+    def test_negativeCachingNotForOtherErrors(self):
+        for x in range(2):
+            self.assertRaises(TLResponseError, 
+                              self.api.getTestCasesForTestSuite, 4711)
+        self.assertEqual(['getTestCasesForTestSuite'] * 2, self.api.calls)
+
+    def test_negativeTTL(self):
+        api = TestLinkHelper().connect(DummyAPIGeneric, 
+                                       cache=ResponseCache(negativeTTL=0))
+        api.getTestSuitesForTestSuite(23)
+        api.getTestSuitesForTestSuite(23)
+        self.assertEqual(2, len(api.calls))
+        self.assertEqual(30, ResponseCache().negativeTTLFor(
+                                    'getFirstLevelTestSuitesForTestProject'))
+        self.assertIsNone(ResponseCache().negativeTTLFor('getProjects'))
+
+    def test_createInvalidatesNegative(self):
+        self.api.getFirstLevelTestSuitesForTestProject(21)
+        self.api.createTestSuite(21, 'suite A', 'details')
+        self.api.getFirstLevelTestSuitesForTestProject(21)
+        self.assertEqual(['getFirstLevelTestSuitesForTestProject', 
+                          'createTestSuite', 
+                          'getFirstLevelTestSuitesForTestProject'], 
+                         self.api.calls)
+
+    def test_reportInvalidatesNegative(self):
+        self.api.getTestCasesForTestPlan(31, executestatus='f')
+        self.api.reportTCResult(31, 'f', testcaseid=61)
+        self.api.getTestCasesForTestPlan(31, executestatus='f')
+        self.api.reportTCResult(32, 'f', testcaseid=62)
+        self.api.getTestCasesForTestPlan(31, executestatus='f')
+        self.assertEqual(['getTestCasesForTestPlan', 'reportTCResult', 
+                          'getTestCasesForTestPlan', 'reportTCResult'], 
+                         self.api.calls)
+
+    def test_deleteExecutionInvalidatesNegative(self):
+        self.api.getTestCasesForTestPlan(31, executed=1)
+        self.api.getTestCasesForTestPlan(32, executed=1)
+        self.api.deleteExecution(71)
+        self.api.getTestCasesForTestPlan(31, executed=1)
+        self.api.getTestCasesForTestPlan(32, executed=1)
+        self.assertEqual(['getTestCasesForTestPlan'] * 2 + 
+                         ['deleteExecution'] + 
+                         ['getTestCasesForTestPlan'] * 2, self.api.calls)
+
+    def test_negativeInSqliteCache(self):
+        tmpDir = tempfile.mkdtemp()
+        try:
+            cache = SqliteResponseCache(os.path.join(tmpDir, 'c.sqlite'))
+            api = TestLinkHelper().connect(DummyAPIGeneric, cache=cache)
+            api.getFirstLevelTestSuitesForTestProject(21)
+            self.assertEqual([], api.getFirstLevelTestSuitesForTestProject(21))
+            self.assertEqual(1, len(api.calls))
+        finally:
+            shutil.rmtree(tmpDir)
+
+
+class TestLinkSqliteResponseCacheTestCase(unittest.TestCase):
+    """ TestCases for SqliteResponseCache - two instances with the same file
+    simulate two processes
+    """
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpDir, 'sub', 'cache.sqlite')
+        self.cache = SqliteResponseCache(self.path, maxSize=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def put(self, cache, key, methodName, args, response, ttl=60):
+        cache.put(key, methodName, args, response, ttl, 
+                  cache.generation(methodName))
+
+    def test_sharedByProcesses(self):
+        self.put(self.cache, ('URL', 'getProjects', ()), 'getProjects', {}, 
+                 [{'id' : '1'}])
+        process2 = SqliteResponseCache(self.path)
+        self.assertEqual((True, [{'id' : '1'}]), 
+                         process2.get(('URL', 'getProjects', ())))
+        self.assertEqual((False, None), 
+                         process2.get(('URL2', 'getProjects', ())))
+        self.assertEqual({'hits' : 1, 'misses' : 1}, 
+                         dict([(x, process2.stats[x]) 
+                               for x in ('hits', 'misses')]))
+
+    def test_expired(self):
+        self.put(self.cache, 'k1', 'getProjects', {}, [], ttl=-1)
+        self.assertEqual((False, None), self.cache.get('k1'))
+        self.assertEqual(1, self.cache.stats['expired'])
+        self.assertEqual(0, len(self.cache))
+
+    def test_maxSize(self):
+        for x in range(5):
+            self.put(self.cache, 'k%i' % x, 'getProjects', {}, [x])
+        self.assertEqual(3, len(self.cache))
+        self.assertEqual(2, self.cache.stats['evictions'])
+        self.assertFalse(self.cache.get('k0')[0])
+
+    def test_hitWithoutWrite(self):
+        self.put(self.cache, 'k1', 'getProjects', {}, [1], ttl=60)
+        db = self.cache._connection()
+        changes = db.total_changes
+        self.assertEqual((True, [1]), self.cache.get('k1'))
+        self.assertEqual(changes, db.total_changes)
+        # synchronous NORMAL
+        self.assertEqual(1, db.execute('PRAGMA synchronous').fetchone()[0])
+
+    def test_hitUpdatesOldUseTime(self):
+        self.put(self.cache, 'k1', 'getProjects', {}, [1], ttl=60)
+        db = self.cache._connection()
+        db.execute('UPDATE responses SET used = ?', (time.time() - 100000,))
+        self.cache.get('k1')
+        used = db.execute('SELECT used FROM responses').fetchone()[0]
+        self.assertTrue(time.time() - used < 5)
+
+    def test_invalidateByOtherProcess(self):
+        self.put(self.cache, 'k1', 'getBuildsForTestPlan', 
+                 {'testplanid' : 7}, [])
+        self.put(self.cache, 'k2', 'getBuildsForTestPlan', 
+                 {'testplanid' : 8}, [])
+        generation = self.cache.generation('getBuildsForTestPlan')
+        process2 = SqliteResponseCache(self.path)
+        process2.invalidateFor('createBuild', {'testplanid' : '7'})
+        self.assertFalse(self.cache.get('k1')[0])
+        self.assertTrue(self.cache.get('k2')[0])
+        # responses read before the invalidation are not stored
+        self.cache.put('k1', 'getBuildsForTestPlan', {'testplanid' : 7}, [], 
+                       60, generation)
+        self.assertFalse(self.cache.get('k1')[0])
+
+    def test_revalidate(self):
+        builds = [{'id' : '3'}, {'id' : '5'}]
+        self.put(self.cache, 'k1', 'getBuildsForTestPlan', 
+                 {'testplanid' : 7, 'devKey' : 'KEY', 'active' : 1}, builds,
+                 ttl=-1)
+        calls = []
+        def validate(methodName, args):
+            calls.append((methodName, args))
+            return {'id' : '5', 'name' : 'b5'}
+        self.assertFalse(self.cache.get('k1')[0])
+        self.assertEqual((True, builds), self.cache.revalidate('k1', validate))
+        self.assertEqual([('getLatestBuildForTestPlan', 
+                           {'testplanid' : 7, 'devKey' : 'KEY'})], calls)
+        self.assertEqual((True, builds), self.cache.get('k1'))
+
+    def test_fileHidesKeys(self):
+        self.put(self.cache, ('URL', 'getProjects', (('devKey', 'SECRET'),)),
+                 'getProjects', {'devKey' : 'SECRET'}, [], ttl=60)
+        keys = [x[0] for x in self.cache._connection().execute(
+                                                'SELECT key FROM responses')]
+        self.assertEqual(1, len(keys))
+        self.assertNotIn('SECRET', keys[0])
+
+    def test_filesOnlyForOwner(self):
+        oldUmask = os.umask(022)
+        try:
+            path = os.path.join(self.tmpDir, 'private.sqlite')
+            cache = SqliteResponseCache(path)
+            self.put(cache, 'k1', 'getProjects', {'devKey' : 'SECRET'}, [])
+        finally:
+            os.umask(oldUmask)
+        # the connection is still open, so -wal and -shm exist
+        for fileName in (path, path + '-wal', path + '-shm'):
+            self.assertEqual(0600, os.stat(fileName).st_mode & 0777)
+
+    def test_revalidateNewBuild(self):
+        self.put(self.cache, 'k1', 'getBuildsForTestPlan', 
+                 {'testplanid' : 7}, [{'id' : '3'}], ttl=-1)
+        self.assertEqual((False, None), self.cache.revalidate('k1', 
+                                        lambda name, args: {'id' : '4'}))
+        self.assertEqual(0, self.cache.stats['revalidated'])
+
+
+class TestLinkAPISqliteCacheTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIGeneric with sqlite response cache - does not
+    interacts with a TestLink Server. works with DummyAPIGeneric
+    """
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpDir, 'cache.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def connect(self):
+        return TestLinkHelper().connect(DummyAPIGeneric, 
+                                        cache=SqliteResponseCache(self.path))
+
+    def test_nextProcessUsesCache(self):
+        self.connect().getProjects()
+        api2 = self.connect()
+        self.assertEqual([{'method' : 'getProjects', 'call' : 1}], 
+                         api2.getProjects())
+        self.assertEqual([], api2.calls)
+
+    def test_revalidatedAfterExpiration(self):
+        api = TestLinkHelper().connect(DummyAPIGeneric, 
+            cache=SqliteResponseCache(self.path, 
+                                      methodTTLs={'getBuildsForTestPlan': -1}))
+        api.getBuildsForTestPlan(7)
+        api.getBuildsForTestPlan(7)
+        # validation fails - dummy returns a response without build id
+        self.assertEqual(['getBuildsForTestPlan', 'getLatestBuildForTestPlan',
+                          'getBuildsForTestPlan'], api.calls)
+
+
+class TestLinkTestCaseVersionCacheTestCase(unittest.TestCase):
+    """ TestCases for TestCaseVersionCache """
+
+    def setUp(self):
+        self.spillDir = tempfile.mkdtemp()
+        self.cache = TestCaseVersionCache(maxSize=4)
+
+    def tearDown(self):
+        shutil.rmtree(self.spillDir)
+
+    def put(self, cache, response):
+        cache.put('URL', response, cache.generation())
+
+    def test_getByIdOrExternalId(self):
+        self.put(self.cache, aTestCase(2))
+        self.assertEqual((True, aTestCase(2)), self.cache.get('URL', 
+                                    {'testcaseid' : 26, 'version' : 2}))
+        self.assertEqual((True, aTestCase(2)), self.cache.get('URL', 
+                    {'testcaseexternalid' : 'NPROAPI-1', 'version' : '2'}))
+        self.assertEqual(2, self.cache.stats['hits'])
+
+    def test_latestVersionNotFound(self):
+        self.put(self.cache, aTestCase(2))
+        self.assertEqual((False, None), 
+                         self.cache.get('URL', {'testcaseid' : '26'}))
+        self.assertFalse(self.cache.get('URL', 
+                            {'testcaseid' : '26', 'version' : 1})[0])
+        self.assertFalse(self.cache.get('OTHER-URL', 
+                            {'testcaseid' : '26', 'version' : 2})[0])
+
+    def test_returnsCopy(self):
+        self.put(self.cache, aTestCase(2))
+        response = self.cache.get('URL', {'testcaseid' : 26, 'version' : 2})[1]
+        response[0]['testprojectid'] = '4711'
+        self.assertEqual(aTestCase(2), self.cache.get('URL', 
+                                    {'testcaseid' : 26, 'version' : 2})[1])
+
+    def test_maxSize(self):
+        for version in range(1, 4):
+            self.put(self.cache, aTestCase(version))
+        # two keys per version
+        self.assertEqual(4, len(self.cache))
+        self.assertEqual(2, self.cache.stats['evictions'])
+
+    def test_invalidateAllVersions(self):
+        self.put(self.cache, aTestCase(1))
+        self.put(self.cache, aTestCase(1, '27', 'NPROAPI-2'))
+        self.cache.invalidateFor('updateTestCase', 
+                                 {'testcaseexternalid' : 'NPROAPI-1'})
+        self.assertFalse(self.cache.get('URL', 
+                            {'testcaseid' : '26', 'version' : 1})[0])
+        self.assertTrue(self.cache.get('URL', 
+                            {'testcaseid' : '27', 'version' : 1})[0])
+
+    def test_putAfterInvalidationIgnored(self):
+        generation = self.cache.generation()
+        self.cache.invalidate({'testcaseid' : '26'})
+        self.cache.put('URL', aTestCase(1), generation)
+        self.assertEqual(0, len(self.cache))
+
+    def test_spillDirSharedByProcesses(self):
+        process1 = TestCaseVersionCache(spillDir=self.spillDir)
+        process2 = TestCaseVersionCache(spillDir=self.spillDir)
+        self.put(process1, aTestCase(2))
+        self.assertEqual((True, aTestCase(2)), process2.get('URL', 
+                    {'testcaseexternalid' : 'NPROAPI-1', 'version' : 2}))
+        self.assertEqual(1, process2.stats['diskHits'])
+        process2.invalidate({'testcaseexternalid' : 'NPROAPI-1'})
+        self.assertEqual([], os.listdir(self.spillDir))
+        process3 = TestCaseVersionCache(spillDir=self.spillDir)
+        self.assertFalse(process3.get('URL', 
+                            {'testcaseid' : '26', 'version' : 2})[0])
+
+
+class TestLinkAPITestCaseCacheTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIGeneric with test case version cache - does 
+    not interacts with a TestLink Server. works with DummyAPIGeneric
+    """
+
+    def setUp(self):
+        self.api = TestLinkHelper().connect(DummyAPIGeneric, 
+                                            testCaseCache=True)
+
+    def test_versionedCallsCached(self):
+        self.api.getTestCase(testcaseid='26', version=2)
+        response = self.api.getTestCase(testcaseexternalid='NPROAPI-1', 
+                                        version=2)
+        self.assertEqual(aTestCase(2), response)
+        self.assertEqual(['getTestCase'], self.api.calls)
+
+    def test_latestCallFillsCache(self):
+        self.api.getTestCase(testcaseid='26')
+        self.api.getTestCase(testcaseid='26')
+        self.api.getTestCase(testcaseid='26', version=3)
+        self.assertEqual(['getTestCase'] * 2, self.api.calls)
+
+    def test_latestCallWithResponseCacheTTL(self):
+        api = TestLinkHelper().connect(DummyAPIGeneric, testCaseCache=True,
+                cache=ResponseCache(methodTTLs={'getTestCase' : 60}))
+        api.getTestCase(testcaseid='26')
+        api.getTestCase(testcaseid='26')
+        self.assertEqual(['getTestCase'], api.calls)
+
+    def test_updateInvalidates(self):
+        self.api.getTestCase(testcaseid='26', version=2)
+        self.api.updateTestCase('NPROAPI-1', version=2, summary='new')
+        self.api.getTestCase(testcaseid='26', version=2)
+        self.assertEqual(['getTestCase', 'updateTestCase', 'getTestCase'], 
+                         self.api.calls)
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
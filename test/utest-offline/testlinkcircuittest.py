@@ -0,0 +1,209 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest, time
+from testlink import TestlinkAPIGeneric, TestLinkHelper
+from testlink.testlinkerrors import TLConnectionError, TLCircuitOpenError, \
+TLResponseError, TLPoolTimeoutError
+from testlink.testlinkcircuit import CircuitBreaker
+from testlink.testlinkretry import RetryPolicy
+
+def refused():
+    return TLConnectionError('connection refused')
+
+class DummyAPIGeneric(TestlinkAPIGeneric):
+    """ Dummy for Simulation TestLinkAPIGeneric.
+    Overrides _callServer() Method to raise the errors defined in .failures
+    and to record the called api methods, _callServerIter() streams the 
+    response of _callServer()
+    """
+
+    __slots__ = ['failures', 'calls']
+
+    def __init__(self, server_url, devKey, **args):
+        super(DummyAPIGeneric, self).__init__(server_url, devKey, **args)
+        self.failures = []
+        self.calls = []
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        self.calls.append(methodAPI)
+        if self.failures:
+            raise self.failures.pop(0)
+        return [{'method' : methodAPI}]
+
+    def _callServerIter(self, methodAPI, argsAPI=None):
+        for item in self._callServer(methodAPI, argsAPI):
+            yield item
+
+
+class TestLinkCircuitBreakerTestCase(unittest.TestCase):
+    """ TestCases for CircuitBreaker """
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(failureThreshold=2, coolDown=0.05)
+        self.probes = []
+
+    def failingFunc(self, *failures):
+        failures = list(failures)
+        def a_func():
+            if failures:
+                raise failures.pop(0)
+            return 'ok'
+        return a_func
+
+    def probe(self):
+        self.probes.append('sayHello')
+
+    def test_opensAfterConsecutiveFailures(self):
+        a_func = self.failingFunc(refused(), refused())
+        for x in range(2):
+            self.assertRaises(TLConnectionError, self.breaker.call, 
+                              'getProjects', a_func, self.probe)
+        self.assertEqual('open', self.breaker.state)
+        self.assertRaises(TLCircuitOpenError, self.breaker.call, 
+                          'getProjects', a_func, self.probe)
+        self.assertEqual({'opened' : 1, 'rejected' : 1}, self.breaker.stats)
+
+    def test_successResetsFailureCount(self):
+        self.assertRaises(TLConnectionError, self.breaker.call, 
+                          'getProjects', self.failingFunc(refused()), 
+                          self.probe)
+        self.breaker.call('getProjects', lambda: 'ok', self.probe)
+        self.assertRaises(TLConnectionError, self.breaker.call, 
+                          'getProjects', self.failingFunc(refused()), 
+                          self.probe)
+        self.assertEqual('closed', self.breaker.state)
+
+    def test_otherErrorsNotCounted(self):
+        for x in range(3):
+            a_func = self.failingFunc(TLResponseError('getProjects', {}, 
+                                                      'nok', 5000))
+            self.assertRaises(TLResponseError, self.breaker.call, 
+                              'getProjects', a_func, self.probe)
+        self.assertEqual('closed', self.breaker.state)
+
+    def test_halfOpenProbeCloses(self):
+        self.breaker.failureThreshold = 1
+        self.assertRaises(TLConnectionError, self.breaker.call, 
+                          'getProjects', self.failingFunc(refused()), 
+                          self.probe)
+        time.sleep(0.06)
+        self.assertEqual('half-open', self.breaker.state)
+        self.assertEqual('ok', self.breaker.call('getProjects', lambda: 'ok',
+                                                 self.probe))
+        self.assertEqual(['sayHello'], self.probes)
+        self.assertEqual('closed', self.breaker.state)
+
+    def test_halfOpenProbeFailureReopens(self):
+        self.breaker.failureThreshold = 1
+        self.assertRaises(TLConnectionError, self.breaker.call, 
+                          'getProjects', self.failingFunc(refused()), 
+                          self.probe)
+        time.sleep(0.06)
+        self.assertRaises(TLConnectionError, self.breaker.call, 
+                          'getProjects', lambda: 'ok', 
+                          self.failingFunc(refused()))
+        self.assertEqual('open', self.breaker.state)
+        self.assertEqual(2, self.breaker.stats['opened'])
+
+    def test_probeMethodIsItsOwnProbe(self):
+        self.breaker.failureThreshold = 1
+        self.assertRaises(TLConnectionError, self.breaker.call, 
+                          'getProjects', self.failingFunc(refused()), 
+                          self.probe)
+        time.sleep(0.06)
+        self.assertEqual('ok', self.breaker.call('ping', lambda: 'ok',
+                                                 self.probe))
+        self.assertEqual([], self.probes)
+        self.assertEqual('closed', self.breaker.state)
+
+    def test_reset(self):
+        self.breaker.failureThreshold = 1
+        self.assertRaises(TLConnectionError, self.breaker.call, 
+                          'getProjects', self.failingFunc(refused()), 
+                          self.probe)
+        self.breaker.reset()
+        self.assertEqual('closed', self.breaker.state)
+
+    def test_invalidThreshold(self):
+        self.assertRaises(ValueError, CircuitBreaker, 0)
+
+
+class TestLinkAPICircuitTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIGeneric with circuit breaker - does not 
+    interacts with a TestLink Server. works with DummyAPIGeneric
+    """
+
+    def setUp(self):
+        policy = RetryPolicy(maxAttempts=5, jitter=0.0)
+        policy.sleep = lambda delay: None
+        self.api = TestLinkHelper().connect(DummyAPIGeneric, 
+                        retryPolicy=policy, 
+                        circuitBreaker=CircuitBreaker(3, coolDown=0.05))
+
+    def test_stateWithoutBreaker(self):
+        api = TestLinkHelper().connect(DummyAPIGeneric)
+        self.assertEqual('closed', api.circuitState())
+
+    def test_retriesStopWhenCircuitOpens(self):
+        self.api.failures = [refused() for x in range(5)]
+        self.assertRaises(TLCircuitOpenError, self.api.getProjects)
+        self.assertEqual(['getProjects'] * 3, self.api.calls)
+        self.assertEqual('open', self.api.circuitState())
+
+    def test_circuitOpenIsConnectionError(self):
+        self.assertTrue(issubclass(TLCircuitOpenError, TLConnectionError))
+        self.assertFalse(RetryPolicy().isRetryableError(
+                                            TLCircuitOpenError('open')))
+
+    def test_poolExhaustionNotCounted(self):
+        # a busy client pool says nothing about the server health
+        self.api.failures = [TLPoolTimeoutError('no free connection') 
+                             for x in range(5)]
+        for x in range(5):
+            self.assertRaises(TLPoolTimeoutError, self.api.getProjects)
+        self.assertEqual(['getProjects'] * 5, self.api.calls)
+        self.assertEqual('closed', self.api.circuitState())
+
+    def test_streamedCallsCounted(self):
+        self.api.failures = [refused() for x in range(5)]
+        items = self.api.callServerIterWithPosArgs('getProjects')
+        self.assertRaises(TLCircuitOpenError, list, items)
+        self.assertEqual(['getProjects'] * 3, self.api.calls)
+        self.assertEqual('open', self.api.circuitState())
+        items = self.api.iterTestCasesForTestSuite(testsuiteid='4711')
+        self.assertRaises(TLCircuitOpenError, list, items)
+        self.assertEqual(3, len(self.api.calls))
+
+    def test_probeWithSayHello(self):
+        self.api.failures = [refused() for x in range(3)]
+        self.assertRaises(TLCircuitOpenError, self.api.getProjects)
+        time.sleep(0.06)
+        self.assertEqual('half-open', self.api.circuitState())
+        self.api.getProjects()
+        self.assertEqual(['sayHello', 'getProjects'], self.api.calls[3:])
+        self.assertEqual('closed', self.api.circuitState())
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,176 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest, threading, time
+from testlink import TestlinkAPIGeneric, TestLinkHelper
+from testlink.testlinkerrors import TLResponseError, TLTimeoutError
+from testlink.testlinkcoalesce import SingleFlight, requestKey
+from testlink.testlinktransport import PooledTransport
+
+class DummyAPIGeneric(TestlinkAPIGeneric):
+    """ Dummy for Simulation TestLinkAPIGeneric.
+    Overrides _callServer() Method to wait for .gate, to count the calls and
+    to return .response
+    """
+
+    __slots__ = ['gate', 'calls', 'response']
+
+    def __init__(self, server_url, devKey, **args):
+        super(DummyAPIGeneric, self).__init__(server_url, devKey, **args)
+        self.gate = threading.Event()
+        self.calls = []
+        self.response = None
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        self.calls.append(methodAPI)
+        self.gate.wait(5)
+        if self.response is not None:
+            return self.response
+        return [{'method' : methodAPI, 'args' : argsAPI}]
+
+
+class TestLinkSingleFlightTestCase(unittest.TestCase):
+    """ TestCases for SingleFlight and requestKey """
+
+    def test_requestKeyIgnoresOrder(self):
+        key1 = requestKey('URL', 'getTestPlanByName', 
+                    {'devKey' : 'KEY', 'testprojectname' : 'P', 
+                     'testplanname' : 'TP', 'ids' : [1, {'a' : 1, 'b' : 2}]})
+        key2 = requestKey('URL', 'getTestPlanByName', 
+                    {'ids' : [1, {'b' : 2, 'a' : 1}], 'testplanname' : 'TP',
+                     'testprojectname' : 'P', 'devKey' : 'KEY'})
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(key1, requestKey('URL', 'getTestPlanByName', 
+                    {'devKey' : 'KEY', 'testprojectname' : 'P'}))
+
+    def test_requestKeyNotHashable(self):
+        self.assertIsNone(requestKey('URL', 'getProjects', 
+                                     {'x' : set([1])}))
+
+    def test_errorShared(self):
+        flight = SingleFlight()
+        gate = threading.Event()
+        errors = []
+        def a_func():
+            gate.wait(5)
+            raise TLResponseError('getProjects', {}, 'nok', 5000)
+        def a_call():
+            try:
+                flight.call('KEY', None, a_func)
+            except TLResponseError as error:
+                errors.append(error)
+        threads = [threading.Thread(target=a_call) for x in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        gate.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(3, len(errors))
+        self.assertEqual({'calls' : 3, 'coalesced' : 2}, flight.stats)
+
+    def test_eachCallerGetsOwnResponse(self):
+        flight = SingleFlight()
+        gate = threading.Event()
+        results = []
+        def a_func():
+            gate.wait(5)
+            return [{'id' : '1', 'testprojectid' : None}]
+        def a_call():
+            response = flight.call('KEY', None, a_func)
+            response[0]['testprojectid'] = len(results)
+            results.append(response)
+        threads = [threading.Thread(target=a_call) for x in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        gate.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(2, flight.stats['coalesced'])
+        self.assertEqual([0, 1, 2], 
+                         sorted(r[0]['testprojectid'] for r in results))
+
+    def test_waitLimitedByDeadline(self):
+        flight = SingleFlight()
+        gate = threading.Event()
+        leader = threading.Thread(target=flight.call, 
+                                  args=('KEY', None, gate.wait, 5))
+        leader.start()
+        time.sleep(0.02)
+        self.assertRaises(TLTimeoutError, flight.call, 'KEY', 
+                          time.time() + 0.05, gate.wait, 5)
+        gate.set()
+        leader.join()
+
+
+class TestLinkAPICoalesceTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIGeneric with coalesce - does not interacts
+    with a TestLink Server. works with DummyAPIGeneric
+    """
+
+    def setUp(self):
+        self.api = TestLinkHelper().connect(DummyAPIGeneric, coalesce=True,
+                                        transport=PooledTransport(poolSize=8))
+
+    def runParallel(self, methodName, items):
+        results = self.api.map(methodName, items, workers=len(items))
+        threading.Timer(0.05, self.api.gate.set).start()
+        return list(results)
+
+    def test_identicalReadsCoalesced(self):
+        results = self.runParallel('getTestPlanByName', [('P', 'TP')] * 5)
+        self.assertEqual(['getTestPlanByName'], self.api.calls)
+        responses = [response for (item, response) in results]
+        for response in responses[1:]:
+            self.assertEqual(responses[0], response)
+            self.assertIsNot(responses[0], response)
+        self.assertEqual(4, self.api.singleFlight.stats['coalesced'])
+
+    def test_differentArgsNotCoalesced(self):
+        self.runParallel('getTestPlanByName', [('P', 'TP1'), ('P', 'TP2')])
+        self.assertEqual(2, len(self.api.calls))
+
+    def test_writesNotCoalesced(self):
+        self.runParallel('createBuild', [('4711', 'build 1')] * 3)
+        self.assertEqual(3, len(self.api.calls))
+
+    def test_errorCheckedOnce(self):
+        self.api.response = [{'code' : 7011, 'message' : 'unknown plan'}]
+        results = self.runParallel('getTestPlanByName', [('P', 'TP')] * 3)
+        self.assertEqual(1, len(self.api.calls))
+        for (item, response) in results:
+            self.assertIsInstance(response, TLResponseError)
+
+    def test_defaultWithoutCoalesce(self):
+        api = TestLinkHelper().connect(DummyAPIGeneric)
+        self.assertIsNone(api.singleFlight)
+
+    def test_sharedSingleFlight(self):
+        flight = SingleFlight()
+        api = TestLinkHelper().connect(DummyAPIGeneric, coalesce=flight)
+        self.assertIs(flight, api.singleFlight)
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,163 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest, xmlrpclib, datetime
+from testlink import TestlinkAPIGeneric, TestLinkHelper
+from testlink.testlinkerrors import TLAPIError
+from testlink.testlinkcodec import XmlRpcCodec, FastCodec, \
+FAST_PARSER_AVAILABLE
+from testlink.testlinktransport import KeepAliveTransport
+
+# request args like createTestCase with steps
+ARGS_WITH_STEPS = {'devKey' : 'DEVKEY-1', 'testcasename' : 'TC <new> & co',
+    'testsuiteid' : '4711', 'testprojectid' : 1, 'authorlogin' : 'admin',
+    'summary' : u'Zusammenfassung mit \xe4\xf6\xfc',
+    'steps' : [{'step_number' : x, 'actions' : 'action %i' % x,
+                'expected_results' : 'result %i' % x, 'execution_type' : 1}
+               for x in range(1, 4)]}
+
+# values with all XML-RPC types
+ALL_TYPES = [0, -17, 2 ** 31 - 1, True, False, 1.5, 'text', '', u'€',
+             [], {}, ['a', ['b']], {'a' : {'b' : None}},
+             xmlrpclib.DateTime('20141018T10:11:12'),
+             xmlrpclib.Binary('\x00binary\xff')]
+
+def parseWith(codec, body, use_datetime=0):
+    (parser, unmarshaller) = codec.getparser(use_datetime)
+    parser.feed(body)
+    parser.close()
+    return unmarshaller.close()
+
+
+class TestLinkCodecTestCase(unittest.TestCase):
+    """ TestCases for XmlRpcCodec and FastCodec """
+
+    def setUp(self):
+        self.codec = FastCodec()
+
+    def test_dumpsLikeStock(self):
+        request = self.codec.dumps((ARGS_WITH_STEPS,), 'tl.createTestCase')
+        self.assertEqual(((ARGS_WITH_STEPS,), 'tl.createTestCase'),
+                         xmlrpclib.loads(request))
+
+    def test_dumpsAllTypes(self):
+        request = self.codec.dumps((ALL_TYPES,), 'tl.x', allow_none=True)
+        self.assertEqual(xmlrpclib.loads(xmlrpclib.dumps((ALL_TYPES,), 'tl.x',
+                                                    allow_none=True)),
+                         xmlrpclib.loads(request))
+
+    def test_dumpsEncoding(self):
+        request = self.codec.dumps((u'\xe4',), u'tl.x', encoding='iso-8859-1')
+        self.assertTrue(request.startswith(
+                            "<?xml version='1.0' encoding='iso-8859-1'?>"))
+        self.assertEqual(((u'\xe4',), 'tl.x'), xmlrpclib.loads(request))
+
+    def test_dumpsErrors(self):
+        self.assertRaises(TypeError, self.codec.dumps, (None,), 'tl.x')
+        self.assertRaises(OverflowError, self.codec.dumps, (2 ** 40,), 'tl.x')
+        self.assertRaises(TypeError, self.codec.dumps, ({1 : 'a'},), 'tl.x')
+        recursive = []
+        recursive.append(recursive)
+        self.assertRaises(TypeError, self.codec.dumps, (recursive,), 'tl.x')
+
+    def test_parseLikeStock(self):
+        for value in (ALL_TYPES, [ARGS_WITH_STEPS], 'Hello!', ''):
+            body = xmlrpclib.dumps((value,), methodresponse=True,
+                                   allow_none=True)
+            self.assertEqual(parseWith(XmlRpcCodec(), body),
+                             parseWith(self.codec, body))
+
+    def test_parseUseDatetime(self):
+        body = xmlrpclib.dumps((xmlrpclib.DateTime('20141018T10:11:12'),),
+                               methodresponse=True)
+        self.assertEqual((datetime.datetime(2014, 10, 18, 10, 11, 12),),
+                         parseWith(self.codec, body, use_datetime=1))
+
+    def test_parseImplicitString(self):
+        body = "<?xml version='1.0'?><methodResponse><params><param>" \
+               "<value>no type tag</value></param></params></methodResponse>"
+        self.assertEqual(('no type tag',), parseWith(self.codec, body))
+
+    def test_parseFault(self):
+        body = xmlrpclib.dumps(xmlrpclib.Fault(-32601, 'unknown method'),
+                               methodresponse=True)
+        self.assertRaises(xmlrpclib.Fault, parseWith, self.codec, body)
+
+    def test_fastParserAvailable(self):
+        self.assertTrue(FAST_PARSER_AVAILABLE)
+
+
+class DummyCodecTransport(KeepAliveTransport):
+    """ Dummy for Simulation KeepAliveTransport.
+    Overrides single_request() to record the request and to parse RESPONSE
+    with the parser of the codec
+    """
+
+    def __init__(self, response):
+        KeepAliveTransport.__init__(self)
+        self.response = response
+        self.requests = []
+
+    def single_request(self, host, handler, request_body, verbose=0):
+        self.requests.append((host, handler, request_body))
+        (parser, unmarshaller) = self.getparser()
+        parser.feed(self.response)
+        parser.close()
+        return unmarshaller.close()
+
+
+class TestLinkAPICodecTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIGeneric with argument codec """
+
+    def connect(self, response, codec):
+        transport = DummyCodecTransport(xmlrpclib.dumps(response,
+                                                        methodresponse=True))
+        return TestLinkHelper().connect(TestlinkAPIGeneric,
+                                        transport=transport, codec=codec)
+
+    def test_callWithCodec(self):
+        codec = FastCodec()
+        api = self.connect(([{'id' : '4711', 'status' : True}],), codec)
+        self.assertIs(codec, api.server('transport').codec)
+        response = api.reportTCResult('P-1', 'p', testcaseid='TC-1')
+        self.assertEqual([{'id' : '4711', 'status' : True}], response)
+        (host, handler, request) = api.server('transport').requests[0]
+        (args, methodName) = xmlrpclib.loads(request)
+        self.assertEqual('tl.reportTCResult', methodName)
+        self.assertEqual('TC-1', args[0]['testcaseid'])
+
+    def test_systemCallWithCodec(self):
+        api = self.connect((['a', 'b'],), FastCodec())
+        response = api._callServer('system.listMethods')
+        self.assertEqual(['a', 'b'], response)
+        (host, handler, request) = api.server('transport').requests[0]
+        self.assertEqual(((), 'system.listMethods'), xmlrpclib.loads(request))
+
+    def test_faultWithCodec(self):
+        api = self.connect(xmlrpclib.Fault(-32601, 'unknown method'),
+                           FastCodec())
+        self.assertRaises(TLAPIError, api.about)
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
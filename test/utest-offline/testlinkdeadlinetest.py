@@ -0,0 +1,230 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest, socket, time, xmlrpclib
+from testlink import TestlinkAPIGeneric, TestLinkHelper
+from testlink.testlinkerrors import TLConnectionError, TLTimeoutError, \
+TLPoolTimeoutError
+from testlink.testlinkretry import RetryPolicy
+from testlink.testlinktransport import KeepAliveTransport, PooledTransport
+
+class DummyConnection(object):
+    """ Dummy for a httplib connection, just knows its socket state """
+
+    def __init__(self, chost):
+        self.chost = chost
+        self.sock = None
+        self.timeout = socket._GLOBAL_DEFAULT_TIMEOUT
+
+    def close(self):
+        self.sock = None
+
+class DummyDeadlineTransport(KeepAliveTransport):
+    """ Dummy for Simulation KeepAliveTransport.
+    Overrides _newConnection() to create dummy connections and records the
+    deadlines set by the client
+    """
+
+    def __init__(self, **args):
+        KeepAliveTransport.__init__(self, **args)
+        self.deadlines = []
+
+    def _newConnection(self, chost, x509):
+        return DummyConnection(chost)
+
+    def setDeadline(self, deadline):
+        self.deadlines.append(deadline)
+        KeepAliveTransport.setDeadline(self, deadline)
+
+class DummyAPIGeneric(TestlinkAPIGeneric):
+    """ Dummy for Simulation TestLinkAPIGeneric.
+    Overrides _callServer() Method to wait .delay seconds and to raise the
+    errors defined in .failures, _callServerIter() streams the response 
+    three times
+    """
+
+    __slots__ = ['failures', 'delay', 'calls']
+
+    def __init__(self, server_url, devKey, **args):
+        super(DummyAPIGeneric, self).__init__(server_url, devKey, **args)
+        self.failures = []
+        self.delay = 0
+        self.calls = []
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        self.calls.append(methodAPI)
+        time.sleep(self.delay)
+        if self.failures:
+            raise self.failures.pop(0)
+        if methodAPI == 'system.multicall':
+            return [['ok'] for x in argsAPI]
+        return [{'method' : methodAPI}]
+
+    def _callServerIter(self, methodAPI, argsAPI=None):
+        for item in self._callServer(methodAPI, argsAPI) * 3:
+            yield item
+
+
+class TestLinkTransportTimeoutTestCase(unittest.TestCase):
+    """ TestCases for connect and read timeouts of KeepAliveTransport """
+
+    def test_timeoutsNotConfigured(self):
+        transport = DummyDeadlineTransport()
+        connection = transport.make_connection('SERVER-1')
+        self.assertIs(socket._GLOBAL_DEFAULT_TIMEOUT, connection.timeout)
+        self.assertFalse(hasattr(connection, 'readTimeout'))
+
+    def test_connectAndReadTimeout(self):
+        transport = DummyDeadlineTransport(connectTimeout=5, readTimeout=30)
+        connection = transport.make_connection('SERVER-1')
+        self.assertEqual((5, 30), (connection.timeout, connection.readTimeout))
+
+    def test_deadlineLimitsTimeouts(self):
+        transport = DummyDeadlineTransport(connectTimeout=5, readTimeout=30)
+        transport.setDeadline(time.time() + 2)
+        connection = transport.make_connection('SERVER-1')
+        self.assertTrue(connection.timeout <= 2)
+        self.assertTrue(connection.readTimeout <= 2)
+
+    def test_deadlineExceeded(self):
+        transport = DummyDeadlineTransport()
+        transport.setDeadline(time.time() - 1)
+        self.assertRaises(socket.timeout, transport.make_connection,
+                          'SERVER-1')
+
+    def test_readTimeoutSilentServer(self):
+        # server accepts the connection, but never answers
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        server_url = 'http://127.0.0.1:%i/xmlrpc.php' % server.getsockname()[1]
+        transport = KeepAliveTransport(connectTimeout=1, readTimeout=0.1)
+        api = TestlinkAPIGeneric(server_url, 'DEVKEY', transport=transport,
+                                 retryPolicy=RetryPolicy(maxAttempts=1))
+        start = time.time()
+        self.assertRaises(TLTimeoutError, api.about)
+        self.assertTrue(time.time() - start < 1)
+        server.close()
+
+    def test_pooledWaitLimitedByDeadline(self):
+        transport = PooledTransport(poolSize=1)
+        transport._acquireConnection()
+        transport.setDeadline(time.time() + 0.05)
+        self.assertRaises(TLPoolTimeoutError, transport._acquireConnection)
+        self.assertEqual(1, transport.stats['timeouts'])
+
+
+class TestLinkAPIDeadlineTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIGeneric deadlines - does not interacts with a
+    TestLink Server. works with DummyAPIGeneric
+    """
+
+    def setUp(self):
+        self.api = TestLinkHelper().connect(DummyAPIGeneric,
+                                    transport=DummyDeadlineTransport(),
+                                    retryPolicy=RetryPolicy(jitter=0.0))
+
+    def test_noDeadline(self):
+        self.api.about()
+        self.assertEqual([], self.api.server('transport').deadlines)
+
+    def test_defaultDeadlinePassedToTransport(self):
+        self.api.defaultDeadline = 10
+        self.api.about()
+        (deadline, reset) = self.api.server('transport').deadlines
+        self.assertTrue(time.time() < deadline <= time.time() + 10)
+        self.assertIsNone(reset)
+
+    def test_deadlineBlock(self):
+        with self.api.deadline(0.05):
+            self.api.about()
+            time.sleep(0.06)
+            self.assertRaises(TLTimeoutError, self.api.about)
+        self.assertEqual(['about'], self.api.calls)
+        # outside the block the calls are not limited
+        self.api.about()
+
+    def test_nestedDeadlineOnlyShortens(self):
+        with self.api.deadline(1) as outer:
+            with self.api.deadline(60) as inner:
+                self.assertEqual(outer, inner)
+            with self.api.deadline(0.5) as inner:
+                self.assertTrue(inner < outer)
+
+    def test_retriesStopAtDeadline(self):
+        self.api.failures = [TLConnectionError('reset')] * 5
+        start = time.time()
+        with self.api.deadline(0.2):
+            self.assertRaises(TLConnectionError, self.api.getProjects)
+        # first backoff 0.5 sec would exceed the deadline
+        self.assertEqual(1, len(self.api.calls))
+        self.assertTrue(time.time() - start < 0.2)
+
+    def test_batchSendLimitedByDeadline(self):
+        def a_func(api):
+            with api.deadline(0.05):
+                with api.batch() as batch:
+                    batch.about()
+                    time.sleep(0.06)
+        self.assertRaises(TLTimeoutError, a_func, self.api)
+        self.assertEqual([], self.api.calls)
+
+    def test_streamedCallWithDeadline(self):
+        with self.api.deadline(10) as deadline:
+            items = list(self.api.callServerIterWithPosArgs('getProjects'))
+        self.assertEqual(3, len(items))
+        self.assertEqual([deadline, None], 
+                         self.api.server('transport').deadlines)
+
+    def test_streamedCallRetried(self):
+        self.api.retryPolicy.sleep = lambda delay: None
+        self.api.failures = [TLConnectionError('reset')]
+        items = list(self.api.callServerIterWithPosArgs('getProjects'))
+        self.assertEqual(3, len(items))
+        self.assertEqual(['getProjects', 'getProjects'], self.api.calls)
+
+    def test_streamStopsAtDeadline(self):
+        with self.api.deadline(0.05):
+            items = self.api.callServerIterWithPosArgs('getProjects')
+            items.next()
+            time.sleep(0.06)
+            self.assertRaises(TLTimeoutError, items.next)
+
+    def test_mapKeepsCallerDeadline(self):
+        transport = self.api.server('transport')
+        transport.threadSafe = True
+        with self.api.deadline(10) as deadline:
+            responses = list(self.api.map('about', [{}, {}], workers=2))
+        self.assertEqual(2, len(responses))
+        self.assertEqual([deadline] * 2, 
+                         [x for x in transport.deadlines if x is not None])
+        # outside the block the workers are not limited
+        list(self.api.map('about', [{}, {}], workers=2))
+        self.assertEqual(4, len(transport.deadlines))
+
+    def test_timeoutIsConnectionError(self):
+        self.assertTrue(issubclass(TLTimeoutError, TLConnectionError))
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -22,7 +22,8 @@
 
 import unittest
 from testlink.testlinkerrors import TLResponseError
-from testlink.testlinkargs import registerMethod, getArgsForMethod
+from testlink.testlinkargs import registerMethod, getArgsForMethod, \
+getResponseReplacement
 from testlink.testlinkdecorators import decoApiCallAddAttachment,\
 decoApiCallAddDevKey, decoApiCallWithoutArgs, \
 decoMakerApiCallReplaceTLResponseError, decoMakerApiCallWithArgs 
@@ -163,6 +164,16 @@ class testlinkdecoratorsTestCase(unittest.TestCase):
         response = a_func(self.api)
         self.assertEqual({}, response)
 
+    def test_decoApiCallReplaceTLResponseError_registered(self):
+        " decorator test: replacement should be registered for batched calls"
+        
+        @decoMakerApiCallReplaceTLResponseError(3041, replaceValue={})
+        def replace_funcname(a_api, *argsPositional, **argsOptional):
+            pass
+
+        self.assertEqual((True, {}), 
+                         getResponseReplacement('replace_funcname', 3041))
+
     def test_noWrapperName_decoApiCallReplaceTLResponseError(self):
         " decorator test: original function name should be unchanged "
         
@@ -0,0 +1,200 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest, socket, errno, xmlrpclib
+from testlink import TestlinkAPIGeneric, TestLinkHelper
+from testlink.testlinkfailover import Endpoint, FailoverTransport, \
+splitServerUrls, newFailoverTransport
+
+def refused():
+    return socket.error(errno.ECONNREFUSED, 'Connection refused')
+
+def reset():
+    return socket.error(errno.ECONNRESET, 'Connection reset by peer')
+
+def badGateway():
+    return xmlrpclib.ProtocolError('tl1/x.php', 502, 'Bad Gateway', {})
+
+class DummyTransport(object):
+    """ Dummy for Simulation KeepAliveTransport of one endpoint.
+    Overrides request() to raise the errors defined in .failures and records
+    the called methods in the shared list .calls
+    """
+
+    codec = None
+
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+        self.failures = []
+
+    def request(self, host, handler, request_body, verbose=0):
+        methodName = xmlrpclib.loads(request_body)[1]
+        self.calls.append((self.name, methodName))
+        if self.failures:
+            raise self.failures.pop(0)
+        return ([{'endpoint' : self.name}],)
+
+    def close(self):
+        pass
+
+
+class TestLinkFailoverTransportTestCase(unittest.TestCase):
+    """ TestCases for FailoverTransport - works with DummyTransport """
+
+    def setUp(self):
+        self.calls = []
+        self.transports = [DummyTransport('tl%i' % x, self.calls) 
+                           for x in (1, 2, 3)]
+        self.endpoints = [Endpoint('http://tl%i/x.php' % x, transport) 
+                          for (x, transport) in zip((1, 2, 3), self.transports)]
+        self.transport = FailoverTransport(self.endpoints)
+
+    def call(self, methodName):
+        request = xmlrpclib.dumps(({},), 'tl.%s' % methodName)
+        return self.transport.request('tl1', '/x.php', request)[0][0]['endpoint']
+
+    def test_endpointUrl(self):
+        self.assertEqual(('tl1', '/x.php'), 
+                         (self.endpoints[0].host, self.endpoints[0].handler))
+
+    def test_readsRoundRobin(self):
+        endpoints = [self.call('getProjects') for x in range(6)]
+        self.assertEqual(2, endpoints.count('tl1'))
+        self.assertEqual(2, endpoints.count('tl3'))
+
+    def test_readsLeastLatency(self):
+        self.transport.selection = 'least-latency'
+        self.endpoints[0].latency = 0.5
+        self.endpoints[1].latency = 0.1
+        self.endpoints[2].latency = 0.9
+        self.assertEqual('tl2', self.call('getProjects'))
+
+    def test_writesSticky(self):
+        endpoints = [self.call('reportTCResult') for x in range(3)]
+        self.assertEqual(['tl1'] * 3, endpoints)
+        self.assertEqual(['tl1'], [self.call('system.multicall')])
+
+    def test_readFailover(self):
+        self.transports[0].failures = [reset()]
+        self.assertTrue(self.call('getProjects') in ('tl2', 'tl3'))
+        self.assertFalse(self.endpoints[0].healthy)
+        self.assertEqual(1, self.transport.stats['failovers'])
+        # tl1 is no longer used
+        endpoints = [self.call('getProjects') for x in range(4)]
+        self.assertFalse('tl1' in endpoints)
+
+    def test_readFailoverBadGateway(self):
+        self.transports[0].failures = [badGateway()]
+        self.assertTrue(self.call('getProjects') in ('tl2', 'tl3'))
+
+    def test_writeFailoverOnlyIfNotSent(self):
+        self.transports[0].failures = [refused()]
+        self.assertEqual('tl2', self.call('createBuild'))
+        self.assertEqual('tl2', self.call('createBuild'))
+        self.transports[1].failures = [reset()]
+        self.assertRaises(socket.error, self.call, 'createBuild')
+        self.assertEqual([('tl1', 'tl.createBuild')] + 
+                         [('tl2', 'tl.createBuild')] * 3, self.calls)
+
+    def test_notFailoverErrors(self):
+        self.transports[0].failures = [
+            xmlrpclib.ProtocolError('tl1/x.php', 404, 'Not Found', {})]
+        self.assertRaises(xmlrpclib.ProtocolError, self.call, 'getProjects')
+        self.assertTrue(self.endpoints[0].healthy)
+
+    def test_allEndpointsDown(self):
+        for transport in self.transports:
+            transport.failures = [refused()]
+        self.assertRaises(socket.error, self.call, 'getProjects')
+        self.assertEqual(3, len(self.calls))
+        # marked as down, but still tried
+        self.assertEqual('tl1', self.call('getProjects'))
+
+    def test_recheckWithSayHello(self):
+        self.transport.recheckAfter = 0.0
+        self.transports[1].failures = [reset()]
+        self.call('getProjects')
+        self.call('getProjects')
+        self.assertTrue(('tl2', 'tl.sayHello') in self.calls)
+        self.assertTrue(self.endpoints[1].healthy)
+        self.assertEqual(1, self.transport.stats['healthChecks'])
+
+    def test_checkHealth(self):
+        self.transports[2].failures = [refused()]
+        self.assertEqual({'http://tl1/x.php' : True, 'http://tl2/x.php' : True,
+                          'http://tl3/x.php' : False}, 
+                         self.transport.checkHealth())
+        self.assertEqual([True, True, False], 
+                [x['healthy'] for x in self.transport.endpointStats()])
+
+    def test_codecForAllEndpoints(self):
+        self.transport.codec = 'CODEC'
+        self.assertEqual(['CODEC'] * 3, [x.codec for x in self.transports])
+
+    def test_iterRequestFallback(self):
+        self.transports[0].failures = [reset()]
+        request = xmlrpclib.dumps(({},), 'tl.getProjects')
+        items = list(self.transport.iterRequest('tl1', '/x.php', request))
+        self.assertTrue(items in ([{'endpoint' : 'tl2'}], 
+                                  [{'endpoint' : 'tl3'}]))
+
+    def test_invalidSelection(self):
+        self.assertRaises(ValueError, FailoverTransport, self.endpoints, 
+                          'random')
+
+
+class TestLinkFailoverHelperTestCase(unittest.TestCase):
+    """ TestCases for the failover factory functions """
+
+    def test_splitServerUrls(self):
+        self.assertEqual(['http://tl1/x.php', 'http://tl2/x.php'], 
+                    splitServerUrls('http://tl1/x.php , http://tl2/x.php,'))
+        self.assertEqual(['http://tl1/x.php'], 
+                         splitServerUrls(['http://tl1/x.php']))
+
+    def test_threadSafe(self):
+        from testlink.testlinktransport import newPooledTransport
+        urls = ['http://tl1/x.php', 'https://tl2/x.php']
+        self.assertFalse(newFailoverTransport(urls).threadSafe)
+        transport = newFailoverTransport(urls, 
+                            transportFactory=newPooledTransport, poolSize=2)
+        self.assertTrue(transport.threadSafe)
+        self.assertEqual(2, transport.endpoints[1].transport.poolSize)
+
+    def test_clientWithFailoverTransport(self):
+        calls = []
+        transports = [DummyTransport('tl1', calls), 
+                      DummyTransport('tl2', calls)]
+        transports[0].failures = [refused()]
+        failover = FailoverTransport([Endpoint('http://tl1/x.php', transports[0]),
+                                      Endpoint('http://tl2/x.php', transports[1])])
+        api = TestlinkAPIGeneric('http://tl1/x.php', 'DEVKEY', 
+                                 transport=failover)
+        self.assertEqual([{'endpoint' : 'tl2'}], 
+                         api.reportTCResult('4711', 'p', testcaseid='1'))
+        self.assertEqual(1, api.transportStats()['failovers'])
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -20,8 +20,8 @@
 # this test works WITHOUT an online TestLink Server
 # no calls are send to a TestLink Server
 
-import unittest, os
-from testlink import TestLinkHelper
+import unittest, os, tempfile, shutil
+from testlink import TestLinkHelper, TestlinkAPIGeneric
 
 
 class DummyTestLinkAPI(object):
@@ -37,7 +37,8 @@ class TestLinkHelperTestCase(unittest.TestCase):
     """ TestCases for TestLinkHelper """
     
     CLASSUNDERTEST = TestLinkHelper
-    ENVNAMES = ['TESTLINK_API_PYTHON_SERVER_URL', 'TESTLINK_API_PYTHON_DEVKEY']
+    ENVNAMES = ['TESTLINK_API_PYTHON_SERVER_URL', 'TESTLINK_API_PYTHON_DEVKEY',
+                'TESTLINK_API_PYTHON_CACHE_FILE']
     EXPECTED_DEFAULTS = ['http://localhost/testlink/lib/api/xmlrpc.php', '42']
 
     def setEnviron(self, envname, envvalue ):
@@ -132,6 +133,32 @@ class TestLinkHelperTestCase(unittest.TestCase):
         a_tl_api = a_helper.connect(DummyTestLinkAPI)
         self.assertEqual('SERVER-URL-51', a_tl_api.server)
         self.assertEqual('DEVKEY-51', a_tl_api.devKey)
+
+    def test_connect_severalUrls(self):
+        """ create a TestLink API dummy for comma separated urls """
+        self.setEnviron(self.ENVNAMES[0], 
+                        'http://SERVER-URL-61/x.php, http://SERVER-URL-62/x.php')
+        a_helper = self.CLASSUNDERTEST()
+        a_tl_api = a_helper.connect(TestlinkAPIGeneric)
+        self.assertEqual('http://SERVER-URL-61/x.php', a_tl_api._server_url)
+        transport = a_tl_api.server('transport')
+        self.assertEqual(['http://SERVER-URL-61/x.php', 
+                          'http://SERVER-URL-62/x.php'], 
+                         [x.url for x in transport.endpoints])
+
+    def test_connect_cacheFile(self):
+        """ create a TestLink API with a sqlite response cache """
+        tmpDir = tempfile.mkdtemp()
+        try:
+            cacheFile = os.path.join(tmpDir, 'tl-cache.sqlite')
+            self.setEnviron(self.ENVNAMES[2], cacheFile)
+            a_tl_api = self.CLASSUNDERTEST().connect(TestlinkAPIGeneric)
+            self.assertEqual(cacheFile, a_tl_api.responseCache.path)
+            self.setEnviron(self.ENVNAMES[2], None)
+            a_tl_api = self.CLASSUNDERTEST().connect(TestlinkAPIGeneric)
+            self.assertIsNone(a_tl_api.responseCache)
+        finally:
+            shutil.rmtree(tmpDir)
         
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
@@ -0,0 +1,197 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest, tempfile, shutil, os, time, threading
+from StringIO import StringIO
+from testlink import TestlinkAPIClient, TestLinkHelper
+from testlink.testlinkerrors import TLConnectionError, TLArgError
+from testlink.testlinktransport import PooledTransport
+from testlink.testlinkjournal import ResultJournal, WriteBehindReporter, \
+replayJournal
+
+class DummyJournalClient(TestlinkAPIClient):
+    """ Dummy for Simulation TestLinkAPICLient.
+    Overrides _callServer() Method to record the multicall chunks and to
+    return execution ids - test case 999 does not exist
+    """
+
+    __slots__ = ['chunks', 'down', 'lock']
+
+    def __init__(self, server_url, devKey, **args):
+        super(DummyJournalClient, self).__init__(server_url, devKey, **args)
+        self.chunks = []
+        self.down = False
+        self.lock = threading.Lock()
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        if self.down:
+            raise TLConnectionError('connection refused')
+        with self.lock:
+            self.chunks.append([(x['methodName'], x['params'][0])
+                                for x in argsAPI])
+        # multicall wraps each response into a list
+        return [[self._response(x['methodName'], x['params'][0])]
+                for x in argsAPI]
+
+    def _response(self, methodName, argsAPI):
+        if methodName == 'tl.uploadExecutionAttachment':
+            return {'fk_id' : argsAPI['executionid'], 'id' : 'A1'}
+        if str(argsAPI['testcaseid']) == '999':
+            return [{'code' : 5000, 'message' : 'TC ID 999 does not exist'}]
+        return [{'id' : 'E%s' % argsAPI['testcaseid'], 'status' : True,
+                 'message' : 'Success!', 'operation' : 'reportTCResult'}]
+
+    def sentArgs(self):
+        return [args for chunk in self.chunks for (name, args) in chunk]
+
+
+class TestLinkJournalTestCase(unittest.TestCase):
+    """ TestCases for ResultJournal and WriteBehindReporter - does not
+    interacts with a TestLink Server. works with DummyJournalClient
+    """
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpDir, 'journal.sqlite')
+        self.api = TestLinkHelper().connect(DummyJournalClient, 
+                                            transport=PooledTransport())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def reporter(self, **args):
+        args.setdefault('start', False)
+        return WriteBehindReporter(self.api, self.path, **args)
+
+    def test_reportRecordsAndFlushBatched(self):
+        reporter = self.reporter(batchSize=2)
+        resultIds = [reporter.reportTCResult(x, 31, 'Build 1', 'p', 'ok')
+                     for x in ('1', '2', '3')]
+        self.assertEqual([], self.api.chunks)
+        self.assertEqual(('pending', None), reporter.outcome(resultIds[0]))
+        self.assertEqual(3, reporter.flush())
+        self.assertEqual([2, 1], [len(x) for x in self.api.chunks])
+        self.assertEqual([('done', 'E1'), ('done', 'E2'), ('done', 'E3')],
+                         [reporter.outcome(x) for x in resultIds])
+        sent = self.api.sentArgs()[0]
+        self.assertEqual('p', sent['status'])
+        self.assertEqual(self.api.devKey, sent['devKey'])
+        self.assertEqual(0, reporter.flush())
+
+    def test_duplicateResultIdSendOnce(self):
+        reporter = self.reporter()
+        reporter.reportTCResult(testcaseid='1', testplanid=31, status='p',
+                                resultId='run-1')
+        reporter.reportTCResult(testcaseid='1', testplanid=31, status='p',
+                                resultId='run-1')
+        reporter.flush()
+        reporter.reportTCResult(testcaseid='1', testplanid=31, status='p',
+                                resultId='run-1')
+        reporter.flush()
+        self.assertEqual(1, len(self.api.sentArgs()))
+        self.assertEqual(1, reporter.stats['recorded'])
+        self.assertEqual(2, reporter.stats['duplicates'])
+
+    def test_serverDownKeepsEntries(self):
+        reporter = self.reporter()
+        resultId = reporter.reportTCResult(testcaseid='1', testplanid=31,
+                                           status='p')
+        self.api.down = True
+        self.assertRaises(TLConnectionError, reporter.flush)
+        reporter.stop()
+        self.assertEqual(('pending', None), reporter.outcome(resultId))
+        self.assertEqual(1, reporter.stats['flushErrors'])
+        self.api.down = False
+        self.assertEqual(1, reporter.flush())
+        self.assertEqual('done', reporter.outcome(resultId)[0])
+
+    def test_failedResultNotSendAgain(self):
+        reporter = self.reporter()
+        attachment = StringIO('some log')
+        attachment.name = 'run.log'
+        failedId = reporter.reportTCResult(testcaseid='999', testplanid=31,
+                                           status='p')
+        attachmentId = reporter.uploadExecutionAttachment(
+                                attachment, failedId, 'log', 'test log')
+        reporter.flush()
+        self.assertEqual('failed', reporter.outcome(failedId)[0])
+        self.assertIn('5000', reporter.outcome(failedId)[1])
+        self.assertEqual('failed', reporter.outcome(attachmentId)[0])
+        reporter.flush()
+        self.assertEqual(1, len(self.api.chunks))
+        self.assertEqual({'failed' : 2}, reporter.journal.counts())
+
+    def test_attachmentGetsExecutionId(self):
+        reporter = self.reporter()
+        attachment = StringIO('some log')
+        attachment.name = 'run.log'
+        resultId = reporter.reportTCResult(testcaseid='7', testplanid=31,
+                                           status='f')
+        reporter.uploadExecutionAttachment(attachment, resultId, 'log')
+        reporter.flush()
+        self.assertEqual(['tl.reportTCResult', 'tl.uploadExecutionAttachment'],
+                         [x[0][0] for x in self.api.chunks])
+        upload = self.api.sentArgs()[1]
+        self.assertEqual('E7', upload['executionid'])
+        self.assertEqual('run.log', upload['filename'])
+        self.assertEqual('log', upload['title'])
+
+    def test_replayStaleClaims(self):
+        journal = ResultJournal(self.path)
+        journal.append('r1', 'reportTCResult', {'testcaseid' : '1',
+                                                'testplanid' : 31,
+                                                'status' : 'p'})
+        journal.append('r2', 'reportTCResult', {'testcaseid' : '2',
+                                                'testplanid' : 31,
+                                                'status' : 'p'})
+        # a crashed process on another host has claimed r1
+        with journal._transaction() as db:
+            db.execute("UPDATE journal SET state = 'sending', owner = ?, "
+                       "claimed = ? WHERE resultId = 'r1'",
+                       ('otherhost:1', time.time()))
+        self.assertEqual({'done' : 1, 'sending' : 1},
+                         replayJournal(self.api, self.path))
+        self.assertEqual({'done' : 2},
+                         replayJournal(self.api, self.path, staleAfter=0))
+
+    def test_backgroundThreadRequiresThreadSafeTransport(self):
+        api = TestLinkHelper().connect(DummyJournalClient)
+        self.assertRaises(TLArgError, WriteBehindReporter, api, self.path)
+        reporter = WriteBehindReporter(api, self.path, start=False)
+        self.assertRaises(TLArgError, reporter.start)
+        self.assertIsNone(reporter._thread)
+
+    def test_backgroundFlush(self):
+        with self.reporter(start=True, flushInterval=0.01) as reporter:
+            resultId = reporter.reportTCResult(testcaseid='1', testplanid=31,
+                                               status='p')
+            for x in range(200):
+                if reporter.outcome(resultId)[0] == 'done':
+                    break
+                time.sleep(0.01)
+            self.assertEqual(('done', 'E1'), reporter.outcome(resultId))
+        self.assertIsNone(reporter._thread)
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
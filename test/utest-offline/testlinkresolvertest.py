@@ -0,0 +1,245 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest, warnings
+from testlink import TestlinkAPIClient, TestLinkHelper
+from testlink.testlink import TestLink
+from testlink.testlinkerrors import TestLinkError
+
+SCENARIO = {
+    'getProjects' : [{'id' : '21', 'name' : 'PROJECT A', 'active' : '1'},
+                     {'id' : '22', 'name' : 'PROJECT B', 'active' : '0'}],
+    'getProjectTestPlans' : {
+        '21' : [{'id' : '31', 'name' : 'PLAN A', 'active' : '1',
+                 'is_open' : '1'}],
+        '22' : ''},
+    'getBuildsForTestPlan' : {
+        '31' : [{'id' : '41', 'name' : 'BUILD 1', 'active' : '1',
+                 'is_open' : '1'}]},
+    'getTestPlanPlatforms' : {
+        '31' : [{'id' : '51', 'name' : 'PLATFORM X'}]},
+    'getTestCaseIDByName' : {
+        'TC 1' : {'61' : {'id' : '61', 'name' : 'TC 1'}},
+        'TC 2' : [{'id' : '62', 'name' : 'TC 2'}]},
+    'getFullPath' : {
+        101 : ['PROJECT A', 'S1'], 102 : ['PROJECT A', 'S1', 'S11'],
+        103 : ['PROJECT B']},
+    'getTestProjectByName' : {
+        'PROJECT A' : {'id' : '21', 'name' : 'PROJECT A'},
+        'PROJECT B' : [{'id' : '22', 'name' : 'PROJECT B'}]},
+    'reportTCResult' : [{'id' : '71', 'message' : 'Success!'}],
+    'createBuild' : [{'id' : '42', 'message' : 'Success!'}],
+    'createTestCase' : [{'id' : '63', 'message' : 'Success!'}],
+    'addTestCaseToTestPlan' : {'feature_id' : '81', 'operation' : 
+                               'addTestCaseToTestPlan'}
+            }
+
+class DummyMixin(object):
+    """ overrides _callServer() to return SCENARIO data and to count the
+    calls """
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        self.calls.append(methodAPI)
+        data = SCENARIO[methodAPI]
+        if methodAPI == 'getFullPath':
+            self.calls[-1] = (methodAPI, argsAPI['nodeid'])
+            nodeIds = argsAPI['nodeid']
+            if not isinstance(nodeIds, list):
+                nodeIds = [nodeIds]
+            return dict([(str(x), data[x]) for x in nodeIds])
+        if methodAPI == 'getTestProjectByName':
+            return data[argsAPI['testprojectname']]
+        if methodAPI == 'getProjectTestPlans':
+            return data[argsAPI['testprojectid']]
+        if methodAPI in ['getBuildsForTestPlan', 'getTestPlanPlatforms']:
+            return data[str(argsAPI['testplanid'])]
+        if methodAPI == 'getTestCaseIDByName':
+            return data[argsAPI['testcasename']]
+        return data
+
+
+class DummyAPIClient(DummyMixin, TestlinkAPIClient):
+    """ Dummy for Simulation TestLinkAPICLient """
+
+    __slots__ = ['calls']
+
+    def __init__(self, server_url, devKey, **args):
+        super(DummyAPIClient, self).__init__(server_url, devKey, **args)
+        self.calls = []
+
+
+class DummyTestLink(DummyMixin, TestLink):
+    """ Dummy for Simulation of the deprecated TestLink class """
+
+    __slots__ = ['calls']
+
+    def __init__(self, server_url, devKey, **args):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            super(DummyTestLink, self).__init__(server_url, devKey, **args)
+        self.calls = []
+
+
+class TestLinkResolverTestCase(unittest.TestCase):
+    """ TestCases for NameResolver - does not interacts with a TestLink
+    Server. works with DummyAPIClient
+    """
+
+    def setUp(self):
+        self.api = TestLinkHelper().connect(DummyAPIClient)
+        self.resolver = self.api.resolver
+
+    def test_project(self):
+        self.assertEqual('21', self.resolver.projectId('PROJECT A'))
+        self.assertEqual('0', self.resolver.project('PROJECT B')['active'])
+        self.assertEqual(['getProjects'], self.api.calls)
+        self.assertEqual({'lookups' : 2, 'calls' : 1}, self.resolver.stats)
+
+    def test_unknownNameInFreshMap(self):
+        self.assertIsNone(self.resolver.projectId('PROJECT C'))
+        self.assertIsNone(self.resolver.projectId('PROJECT D'))
+        self.assertIsNone(self.resolver.projectById('29'))
+        self.assertEqual(['getProjects'], self.api.calls)
+
+    def test_unknownNameReloadsOlderMap(self):
+        self.resolver.reloadAfter = 0
+        self.assertIsNone(self.resolver.projectId('PROJECT C'))
+        self.assertIsNone(self.resolver.projectId('PROJECT C'))
+        self.assertEqual(['getProjects', 'getProjects'], self.api.calls)
+
+    def test_planBuildPlatform(self):
+        plan = self.resolver.plan('PROJECT A', 'PLAN A')
+        self.assertEqual('31', plan['id'])
+        self.assertEqual('41', self.resolver.build(31, 'BUILD 1')['id'])
+        self.assertEqual('51',
+                         self.resolver.platform('31', 'PLATFORM X')['id'])
+        self.assertIsNone(self.resolver.plan('PROJECT B', 'PLAN A'))
+        self.assertIsNone(self.resolver.plan('PROJECT C', 'PLAN A'))
+        self.resolver.build('31', 'BUILD 1')
+        self.assertEqual(['getProjects', 'getProjectTestPlans',
+                          'getBuildsForTestPlan', 'getTestPlanPlatforms',
+                          'getProjectTestPlans'],
+                         self.api.calls)
+
+    def test_testCases(self):
+        self.assertEqual([{'id' : '61', 'name' : 'TC 1'}],
+                         self.resolver.testCases('TC 1', 'S1', 'PROJECT A'))
+        self.assertEqual('62', self.resolver.testCases('TC 2', 'S1',
+                                                       'PROJECT A')[0]['id'])
+        self.resolver.testCases('TC 1', 'S1', 'PROJECT A')
+        self.assertEqual(['getTestCaseIDByName'] * 2, self.api.calls)
+
+    def test_writeInvalidates(self):
+        self.resolver.build('31', 'BUILD 1')
+        self.resolver.platform('31', 'PLATFORM X')
+        self.api.createBuild(31, 'BUILD 2', 'new build')
+        self.resolver.build('31', 'BUILD 1')
+        self.resolver.platform('31', 'PLATFORM X')
+        self.assertEqual(['getBuildsForTestPlan', 'getTestPlanPlatforms',
+                          'createBuild', 'getBuildsForTestPlan'],
+                         self.api.calls)
+
+    def test_writeInvalidatesTestCases(self):
+        self.resolver.testCases('TC 1', 'S1', 'PROJECT A')
+        self.resolver.testCases('TC 2', 'S1', 'PROJECT A')
+        self.api.createTestCase('TC 1', 11, 21, 'admin', 'new case')
+        self.resolver.testCases('TC 1', 'S1', 'PROJECT A')
+        self.resolver.testCases('TC 2', 'S1', 'PROJECT A')
+        self.api.addTestCaseToTestPlan(21, 31, 'PA-1', 1)
+        self.resolver.testCases('TC 2', 'S1', 'PROJECT A')
+        self.assertEqual(['getTestCaseIDByName', 'getTestCaseIDByName',
+                          'createTestCase', 'getTestCaseIDByName',
+                          'addTestCaseToTestPlan', 'getTestCaseIDByName'],
+                         self.api.calls)
+
+    def test_refresh(self):
+        self.resolver.projectId('PROJECT A')
+        self.resolver.build('31', 'BUILD 1')
+        self.resolver.refresh('getProjects')
+        self.resolver.projectId('PROJECT A')
+        self.resolver.build('31', 'BUILD 1')
+        self.resolver.refresh()
+        self.resolver.build('31', 'BUILD 1')
+        self.assertEqual(['getProjects', 'getBuildsForTestPlan',
+                          'getProjects', 'getBuildsForTestPlan'],
+                         self.api.calls)
+
+    def test_getProjectIDByName(self):
+        self.assertEqual('22', self.api.getProjectIDByName('PROJECT B'))
+        self.assertEqual(-1, self.api.getProjectIDByName('PROJECT C'))
+
+    def test_fullPathsBatched(self):
+        self.assertEqual(['PROJECT A', 'S1'], self.resolver.fullPath(101))
+        paths = self.resolver.fullPaths(['101', 102, 103])
+        self.assertEqual({'101' : ['PROJECT A', 'S1'], 
+                          '102' : ['PROJECT A', 'S1', 'S11'], 
+                          '103' : ['PROJECT B']}, paths)
+        self.assertEqual([('getFullPath', 101), ('getFullPath', [102, 103])],
+                         self.api.calls)
+
+    def test_fullPathsChunked(self):
+        self.resolver.MAX_NODES_PER_CALL = 2
+        self.resolver.fullPaths([101, 102, 103])
+        self.assertEqual([('getFullPath', [101, 102]), ('getFullPath', 103)],
+                         self.api.calls)
+
+    def test_getProjectIDByNode(self):
+        self.resolver.fullPaths([101, 102, 103])
+        self.assertEqual(['21', '21', '22'], 
+                [self.api.getProjectIDByNode(x) for x in ('101', 102, 103)])
+        self.assertEqual([('getFullPath', [101, 102, 103]), 
+                          'getTestProjectByName', 'getTestProjectByName'],
+                         self.api.calls)
+
+
+class TestLinkReportResultTestCase(unittest.TestCase):
+    """ TestCases for the deprecated TestLink.reportResult with NameResolver
+    """
+
+    def setUp(self):
+        self.api = TestLinkHelper().connect(DummyTestLink)
+        self.names = {'testProjectName' : 'PROJECT A',
+                      'testPlanName' : 'PLAN A', 'buildName' : 'BUILD 1'}
+
+    def test_reportResultByName(self):
+        self.assertEqual('71', self.api.reportResult('p', 'TC 1', 'S1', ' ',
+                                                     **self.names))
+        self.assertEqual(['getProjects', 'getProjectTestPlans',
+                          'getBuildsForTestPlan', 'getTestCaseIDByName',
+                          'reportTCResult'], self.api.calls)
+        self.api.calls = []
+        self.api.reportResult('f', 'TC 1', 'S1', ' ', **self.names)
+        self.assertEqual(['reportTCResult'], self.api.calls)
+
+    def test_reportResultUnknownNames(self):
+        self.names['testProjectName'] = 'PROJECT C'
+        self.assertRaises(TestLinkError, self.api.reportResult, 'p', 'TC 1',
+                          'S1', **self.names)
+        self.names['testProjectName'] = 'PROJECT A'
+        self.names['buildName'] = 'BUILD 9'
+        self.assertRaises(TestLinkError, self.api.reportResult, 'p', 'TC 1',
+                          'S1', **self.names)
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,169 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest
+from testlink import TestlinkAPIGeneric, TestLinkHelper
+from testlink.testlinkerrors import TLConnectionError, TLResponseError
+from testlink.testlinkretry import RetryPolicy, NO_RETRY, isReadOnlyMethod
+
+def badGateway():
+    return TLConnectionError('502 Bad Gateway', 502)
+
+class DummyAPIGeneric(TestlinkAPIGeneric):
+    """ Dummy for Simulation TestLinkAPIGeneric.
+    Overrides _callServer() Method to raise the errors defined in .failures
+    """
+
+    __slots__ = ['failures', 'calls']
+
+    def __init__(self, server_url, devKey, **args):
+        super(DummyAPIGeneric, self).__init__(server_url, devKey, **args)
+        self.failures = []
+        self.calls = 0
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return [{'method' : methodAPI}]
+
+
+class TestLinkRetryPolicyTestCase(unittest.TestCase):
+    """ TestCases for RetryPolicy """
+
+    def setUp(self):
+        self.waits = []
+        self.policy = RetryPolicy(maxAttempts=4, backoff=1.0, jitter=0.0)
+        self.policy.sleep = self.waits.append
+
+    def failingFunc(self, *failures):
+        failures = list(failures)
+        def a_func():
+            if failures:
+                raise failures.pop(0)
+            return 'ok'
+        return a_func
+
+    def test_readOnlyMethods(self):
+        for methodName in ['getTestCase', 'getProjects', 'doesUserExist',
+                           'checkDevKey', 'sayHello', 'about']:
+            self.assertTrue(isReadOnlyMethod(methodName), methodName)
+        for methodName in ['reportTCResult', 'createTestCase',
+                           'uploadAttachment', 'system.multicall']:
+            self.assertFalse(isReadOnlyMethod(methodName), methodName)
+
+    def test_retryWithExponentialBackoff(self):
+        a_func = self.failingFunc(badGateway(), badGateway(), badGateway())
+        self.assertEqual('ok', self.policy.call('getTestCase', a_func))
+        self.assertEqual([1.0, 2.0, 4.0], self.waits)
+        self.assertEqual({'getTestCase' : 3}, self.policy.retries)
+
+    def test_maxAttempts(self):
+        a_func = self.failingFunc(*[badGateway() for x in range(4)])
+        self.assertRaises(TLConnectionError, self.policy.call, 'getTestCase',
+                          a_func)
+        self.assertEqual(3, len(self.waits))
+
+    def test_backoffMaxAndJitter(self):
+        policy = RetryPolicy(backoff=1.0, backoffMax=5.0, jitter=0.5)
+        for x in range(50):
+            delay = policy.backoffDelay(10)
+            self.assertTrue(2.5 <= delay <= 5.0, delay)
+
+    def test_writesNotRetried(self):
+        a_func = self.failingFunc(badGateway())
+        self.assertRaises(TLConnectionError, self.policy.call,
+                          'reportTCResult', a_func)
+        self.assertEqual({}, self.policy.retries)
+
+    def test_writesRetriedOptIn(self):
+        self.policy.retryWrites = True
+        a_func = self.failingFunc(badGateway())
+        self.assertEqual('ok', self.policy.call('reportTCResult', a_func))
+
+    def test_methodOverrides(self):
+        self.policy.methodOverrides = {
+                'reportTCResult' : {'retry' : True, 'maxAttempts' : 2},
+                'getTestCase' : {'retry' : False}}
+        self.assertEqual(2, self.policy.maxAttemptsFor('reportTCResult'))
+        self.assertEqual(1, self.policy.maxAttemptsFor('getTestCase'))
+        self.assertEqual(4, self.policy.maxAttemptsFor('getProjects'))
+
+    def test_notRetryableStatus(self):
+        a_func = self.failingFunc(TLConnectionError('404 Not Found', 404))
+        self.assertRaises(TLConnectionError, self.policy.call, 'getTestCase',
+                          a_func)
+        self.assertEqual([], self.waits)
+
+    def test_networkErrorRetryable(self):
+        a_func = self.failingFunc(TLConnectionError('connection refused'))
+        self.assertEqual('ok', self.policy.call('getTestCase', a_func))
+
+    def test_otherErrorsNotRetried(self):
+        a_func = self.failingFunc(TLResponseError('getTestCase', {}, 'nok', 5000))
+        self.assertRaises(TLResponseError, self.policy.call, 'getTestCase',
+                          a_func)
+        self.assertEqual([], self.waits)
+
+    def test_invalidMaxAttempts(self):
+        self.assertRaises(ValueError, RetryPolicy, 0)
+
+
+class TestLinkAPIRetryTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIGeneric with retryPolicy - does not interacts
+    with a TestLink Server. works with DummyAPIGeneric
+    """
+
+    def setUp(self):
+        self.policy = RetryPolicy(jitter=0.0)
+        self.policy.sleep = lambda delay: None
+        self.api = TestLinkHelper().connect(DummyAPIGeneric,
+                                            retryPolicy=self.policy)
+
+    def test_defaultPolicy(self):
+        api = TestLinkHelper().connect(DummyAPIGeneric)
+        self.assertIsInstance(api.retryPolicy, RetryPolicy)
+        self.assertFalse(api.retryPolicy.retryWrites)
+
+    def test_readRetried(self):
+        self.api.failures = [badGateway()]
+        response = self.api.getTestCase(testcaseid='4711')
+        self.assertEqual('getTestCase', response[0]['method'])
+        self.assertEqual(2, self.api.calls)
+        self.assertEqual({'getTestCase' : 1}, self.api.retryStats())
+
+    def test_writeNotRetried(self):
+        self.api.failures = [badGateway()]
+        self.assertRaises(TLConnectionError, self.api.reportTCResult,
+                          '4711', 'p', testcaseid='1')
+        self.assertEqual(1, self.api.calls)
+
+    def test_noRetry(self):
+        self.api.retryPolicy = NO_RETRY
+        self.api.failures = [badGateway()]
+        self.assertRaises(TLConnectionError, self.api.getTestCase,
+                          testcaseid='4711')
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,380 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest, xmlrpclib, base64
+from StringIO import StringIO
+from testlink import TestlinkAPIGeneric, TestLinkHelper
+from testlink.testlinkerrors import TLResponseError, TLAPIError, \
+TLConnectionError
+from testlink.testlinkstream import IterUnmarshaller, Base64File, \
+StreamedRequest
+from testlink.testlinkcodec import FastCodec
+from testlink.testlinktransport import KeepAliveTransport, PooledTransport
+
+def xmlResponse(value):
+    return xmlrpclib.dumps((value,), methodresponse=True)
+
+# plan with linked test cases, TestLink returns a struct tcid -> tc info
+TC_FOR_PLAN = dict([(str(x), {'tcase_id' : str(x), 'name' : 'TC-%i' % x})
+                    for x in range(1, 201)])
+
+class DummyHTTPResponse(object):
+    """ Dummy for a httplib response, returns BODY """
+
+    def __init__(self, body):
+        self.stream = StringIO(body)
+
+    def getheader(self, name, default=None):
+        return default
+
+    def read(self, size):
+        return self.stream.read(size)
+
+class DummyConnection(object):
+    """ Dummy for a httplib connection, just knows its socket state """
+
+    def __init__(self):
+        self.sock = 'open socket'
+
+    def close(self):
+        self.sock = None
+
+class DummyStreamTransportMixin(object):
+    """ overrides single_request() to return the response body defined in
+        .responses and records the send requests """
+
+    readChunkSize = 64
+
+    def _initDummy(self, responses):
+        self.responses = responses
+        self.requests = []
+        self.connections = []
+
+    def _newConnection(self, chost, x509):
+        connection = DummyConnection()
+        self.connections.append(connection)
+        return connection
+
+    def single_request(self, host, handler, request_body, verbose=0):
+        self.make_connection(host)
+        self.requests.append((host, handler, xmlrpclib.loads(request_body)))
+        return self.parse_response(DummyHTTPResponse(self.responses.pop(0)))
+
+class DummyStreamTransport(DummyStreamTransportMixin, KeepAliveTransport):
+
+    def __init__(self, *responses):
+        KeepAliveTransport.__init__(self)
+        self._initDummy(list(responses))
+
+class DummyPooledStreamTransport(DummyStreamTransportMixin, PooledTransport):
+
+    def __init__(self, *responses):
+        PooledTransport.__init__(self, poolSize=1)
+        self._initDummy(list(responses))
+
+
+class TestLinkIterUnmarshallerTestCase(unittest.TestCase):
+    """ TestCases for IterUnmarshaller """
+
+    def feed(self, body, chunkSize=50):
+        unmarshaller = IterUnmarshaller()
+        parser = xmlrpclib.ExpatParser(unmarshaller)
+        chunks = []
+        for x in range(0, len(body), chunkSize):
+            parser.feed(body[x:x + chunkSize])
+            chunks.append(unmarshaller.popItems())
+            # completed elements do not stay on the stack
+            self.assertTrue(len(unmarshaller._stack) < 10)
+        parser.close()
+        chunks.append(unmarshaller.popItems())
+        return (unmarshaller, chunks)
+
+    def test_arrayItemsIncremental(self):
+        body = xmlResponse([{'id' : str(x)} for x in range(100)])
+        (unmarshaller, chunks) = self.feed(body)
+        items = sum(chunks, [])
+        self.assertEqual([{'id' : str(x)} for x in range(100)], items)
+        self.assertEqual('array', unmarshaller.containerType)
+        # the first elements are available long before the end
+        self.assertTrue(len(sum(chunks[:len(chunks) / 2], [])) > 40)
+        self.assertEqual(([],), unmarshaller.close())
+
+    def test_structItems(self):
+        (unmarshaller, chunks) = self.feed(xmlResponse(TC_FOR_PLAN))
+        self.assertEqual('struct', unmarshaller.containerType)
+        self.assertEqual(TC_FOR_PLAN, dict(sum(chunks, [])))
+
+    def test_scalar(self):
+        (unmarshaller, chunks) = self.feed(xmlResponse('Hello!'))
+        self.assertIsNone(unmarshaller.containerType)
+        self.assertEqual([], sum(chunks, []))
+        self.assertEqual(('Hello!',), unmarshaller.close())
+
+    def test_faultNotStreamed(self):
+        body = xmlrpclib.dumps(xmlrpclib.Fault(-32601, 'unknown method'),
+                               methodresponse=True)
+        (unmarshaller, chunks) = self.feed(body)
+        self.assertEqual([], sum(chunks, []))
+        self.assertRaises(xmlrpclib.Fault, unmarshaller.close)
+
+
+class TestLinkStreamTransportTestCase(unittest.TestCase):
+    """ TestCases for KeepAliveTransport.iterRequest() """
+
+    def test_iterRequest(self):
+        transport = DummyStreamTransport(xmlResponse(range(50)))
+        items = transport.iterRequest('SERVER-1', '/xmlrpc.php',
+                                      xmlrpclib.dumps(({},), 'tl.x'))
+        self.assertEqual(0, items.next())
+        self.assertEqual(range(1, 50), list(items))
+        self.assertEqual('open socket', transport.connections[0].sock)
+
+    def test_iterRequestStoppedClosesConnection(self):
+        transport = DummyStreamTransport(xmlResponse(range(50)))
+        items = transport.iterRequest('SERVER-1', '/xmlrpc.php',
+                                      xmlrpclib.dumps(({},), 'tl.x'))
+        items.next()
+        items.close()
+        self.assertIsNone(transport.connections[0].sock)
+
+    def test_iterRequestPooledHoldsConnection(self):
+        transport = DummyPooledStreamTransport(xmlResponse(range(50)))
+        items = transport.iterRequest('SERVER-1', '/xmlrpc.php',
+                                      xmlrpclib.dumps(({},), 'tl.x'))
+        items.next()
+        self.assertEqual(1, transport._inUse)
+        list(items)
+        self.assertEqual(0, transport._inUse)
+        self.assertEqual(1, len(transport._idleConnections))
+
+
+class TestLinkAPIStreamTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIGeneric.callServerIterWithPosArgs() - does
+    not interacts with a TestLink Server. works with DummyStreamTransport
+    """
+
+    def connect(self, *responses):
+        transport = DummyStreamTransport(*responses)
+        return TestLinkHelper().connect(TestlinkAPIGeneric,
+                                        transport=transport)
+
+    def test_iterTestCasesForTestPlan(self):
+        api = self.connect(xmlResponse(TC_FOR_PLAN))
+        response = api.iterTestCasesForTestPlan('4711', details='simple')
+        self.assertEqual(TC_FOR_PLAN, dict(response))
+        (host, handler, (args, methodName)) = \
+                            api.server('transport').requests[0]
+        self.assertEqual('tl.getTestCasesForTestPlan', methodName)
+        self.assertEqual({'testplanid' : '4711', 'details' : 'simple',
+                          'devKey' : api.devKey}, args[0])
+
+    def test_iterTestCasesForTestSuite(self):
+        api = self.connect(xmlResponse([{'id' : '1'}, {'id' : '2'}]))
+        response = api.iterTestCasesForTestSuite('4712')
+        self.assertEqual([{'id' : '1'}, {'id' : '2'}], list(response))
+
+    def test_iterResponseError(self):
+        api = self.connect(xmlResponse([{'message' : 'TestPlanID(4711) does '
+                    'not exist', 'code' : 3000}]))
+        response = api.iterTestCasesForTestPlan('4711')
+        self.assertRaises(TLResponseError, list, response)
+
+    def test_iterEmptyResponseReplaced(self):
+        api = self.connect(xmlResponse(''))
+        self.assertEqual([], list(api.iterTestCasesForTestPlan('4711')))
+
+    def test_iterEmptyResponseNotReplaced(self):
+        api = self.connect(xmlResponse(''))
+        response = api.callServerIterWithPosArgs('getProjects')
+        self.assertRaises(TLResponseError, list, response)
+
+    def test_iterFault(self):
+        api = self.connect(xmlrpclib.dumps(
+            xmlrpclib.Fault(-32601, 'unknown method'), methodresponse=True))
+        response = api.callServerIterWithPosArgs('newMethod', a=1)
+        self.assertRaises(TLAPIError, list, response)
+
+    def test_iterConnectionError(self):
+        class FailingTransport(DummyStreamTransport):
+            def single_request(self, host, handler, request_body, verbose=0):
+                raise xmlrpclib.ProtocolError(host + handler, 404,
+                                              'Not Found', {})
+        api = TestLinkHelper().connect(TestlinkAPIGeneric,
+                                       transport=FailingTransport())
+        response = api.iterTestCasesForTestPlan('4711')
+        self.assertRaises(TLConnectionError, list, response)
+
+    def test_iterWithoutStreamingTransport(self):
+        class DummyAPIGeneric(TestlinkAPIGeneric):
+            def _callServer(self, methodAPI, argsAPI=None):
+                return TC_FOR_PLAN
+        api = TestLinkHelper().connect(DummyAPIGeneric,
+                                       transport=xmlrpclib.Transport())
+        response = api.iterTestCasesForTestPlan('4711')
+        self.assertEqual(TC_FOR_PLAN, dict(response))
+
+
+def attachment(content, name='crash.dmp'):
+    attachmentfile = StringIO(content)
+    attachmentfile.name = name
+    return attachmentfile
+
+class DummySendConnection(object):
+    """ Dummy for a httplib connection, records headers and send chunks """
+
+    def __init__(self):
+        self.headers = {}
+        self.chunks = []
+
+    def putheader(self, name, value):
+        self.headers[name] = value
+
+    def endheaders(self, body=None):
+        if body is not None:
+            self.chunks.append(body)
+
+    def send(self, data):
+        self.chunks.append(data)
+
+class DummyUploadTransport(KeepAliveTransport):
+    """ overrides single_request() to send the request body to a
+        DummySendConnection and to return an upload response """
+
+    def __init__(self):
+        KeepAliveTransport.__init__(self)
+        self.bodies = []
+        self.connections = []
+
+    def single_request(self, host, handler, request_body, verbose=0):
+        connection = DummySendConnection()
+        self.send_content(connection, request_body)
+        self.connections.append(connection)
+        self.bodies.append(request_body)
+        (args, methodName) = xmlrpclib.loads(''.join(connection.chunks))
+        return ({'fk_id' : args[0]['executionid'], 'id' : '81', 
+                 'content' : args[0]['content']},)
+
+
+class TestLinkStreamedRequestTestCase(unittest.TestCase):
+    """ TestCases for Base64File and StreamedRequest """
+
+    CONTENT = ''.join([chr(x % 256) for x in range(10000)])
+
+    def test_base64FileChunks(self):
+        content = Base64File(attachment(self.CONTENT), chunkSize=999)
+        chunks = list(content.iterChunks())
+        self.assertEqual(11, len(chunks))
+        self.assertEqual(base64.b64encode(self.CONTENT), ''.join(chunks))
+        self.assertEqual(len(''.join(chunks)), content.encodedSize())
+        # a second request reads the file again
+        self.assertEqual(chunks, list(content.iterChunks()))
+        self.assertEqual('<Base64File crash.dmp: 10000 bytes>', 
+                         repr(content))
+
+    def test_base64FileFromPosition(self):
+        attachmentfile = attachment(self.CONTENT)
+        attachmentfile.read(5000)
+        content = Base64File(attachmentfile)
+        self.assertEqual(5000, content.size)
+        self.assertEqual(base64.b64encode(self.CONTENT[5000:]), 
+                         ''.join(content.iterChunks()))
+
+    def test_base64FileChunkSize(self):
+        self.assertRaises(ValueError, Base64File, attachment('x'), 1000)
+
+    def test_streamedRequest(self):
+        args = {'executionid' : 4711, 'filename' : 'crash.dmp', 
+                'content' : Base64File(attachment(self.CONTENT), 300)}
+        body = StreamedRequest.build(
+            lambda x: xmlrpclib.dumps(x, 'tl.uploadExecutionAttachment'), 
+            (args,))
+        request = ''.join(body.iterChunks())
+        self.assertEqual(len(request), len(body))
+        self.assertEqual(((dict(args, content=base64.b64encode(
+                                                        self.CONTENT)),),
+                          'tl.uploadExecutionAttachment'), 
+                         xmlrpclib.loads(request))
+        self.assertTrue(max([len(x) for x in body.iterChunks()]) <= 400)
+
+    def test_transportSendsChunks(self):
+        content = Base64File(attachment(self.CONTENT), 3000)
+        body = StreamedRequest('<prefix>', content, '</suffix>')
+        connection = DummySendConnection()
+        transport = KeepAliveTransport(compress=True, compressThreshold=100)
+        transport.send_content(connection, body)
+        self.assertEqual(str(len(body)), connection.headers['Content-Length'])
+        self.assertNotIn('Content-Encoding', connection.headers)
+        self.assertEqual(6, len(connection.chunks))
+        self.assertEqual(len(body), transport.stats['bytesSent'])
+
+
+class TestLinkAPIStreamedUploadTestCase(unittest.TestCase):
+    """ TestCases for streamed upload*Attachment calls - does not interacts 
+    with a TestLink Server. works with DummyUploadTransport
+    """
+
+    CONTENT = 'core dump ' * 10000
+
+    def setUp(self):
+        self.transport = DummyUploadTransport()
+        self.api = TestLinkHelper().connect(TestlinkAPIGeneric,
+                                            transport=self.transport)
+
+    def test_uploadStreamed(self):
+        response = self.api.uploadExecutionAttachment(
+                        attachment(self.CONTENT), 4711, title='dump', 
+                        description='core dump')
+        self.assertEqual(base64.b64encode(self.CONTENT), response['content'])
+        self.assertIsInstance(self.transport.bodies[0], StreamedRequest)
+        self.assertTrue(len(self.transport.connections[0].chunks) > 2)
+
+    def test_uploadStreamedWithCodec(self):
+        api = TestLinkHelper().connect(TestlinkAPIGeneric, codec=FastCodec(),
+                                       transport=self.transport)
+        response = api.uploadExecutionAttachment(attachment(self.CONTENT), 
+                                                 4711)
+        self.assertEqual(base64.b64encode(self.CONTENT), response['content'])
+
+    def test_userContentNotStreamed(self):
+        response = self.api.uploadExecutionAttachment(
+                        attachment(self.CONTENT), 4711, content='Zm9v')
+        self.assertEqual('Zm9v', response['content'])
+        self.assertIsInstance(self.transport.bodies[0], str)
+
+    def test_notStreamedInBatch(self):
+        with self.api.batch():
+            args = self.api._getAttachmentArgs(attachment(self.CONTENT))
+        self.assertIsInstance(args['content'], str)
+
+    def test_notStreamedWithoutStreamingTransport(self):
+        api = TestLinkHelper().connect(TestlinkAPIGeneric,
+                                       transport=xmlrpclib.Transport())
+        args = api._getAttachmentArgs(attachment(self.CONTENT))
+        self.assertEqual(base64.encodestring(self.CONTENT), args['content'])
+        args = self.api._getAttachmentArgs(attachment(self.CONTENT), 
+                                           streamed=False)
+        self.assertIsInstance(args['content'], str)
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
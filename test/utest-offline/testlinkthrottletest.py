@@ -0,0 +1,201 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest, threading, time, tempfile, shutil, os
+from testlink import TestlinkAPIGeneric, TestLinkHelper
+from testlink.testlinkerrors import TLTimeoutError, TLArgError
+from testlink import testlinkthrottle
+from testlink.testlinkcircuit import CircuitBreaker
+from testlink.testlinkthrottle import Throttle, TokenBucket, \
+ConcurrencyLimit, FileTokenBucket, FileConcurrencyLimit
+from testlink.testlinktransport import PooledTransport
+
+class DummyAPIGeneric(TestlinkAPIGeneric):
+    """ Dummy for Simulation TestLinkAPIGeneric.
+    Overrides _callServer() Method to wait for .gate and to count the
+    concurrent calls, _callServerIter() streams the response of _callServer()
+    """
+
+    __slots__ = ['gate', 'inFlight', 'maxInFlight', 'lock']
+
+    def __init__(self, server_url, devKey, **args):
+        super(DummyAPIGeneric, self).__init__(server_url, devKey, **args)
+        self.gate = threading.Event()
+        self.gate.set()
+        self.inFlight = 0
+        self.maxInFlight = 0
+        self.lock = threading.Lock()
+
+    def _callServer(self, methodAPI, argsAPI=None):
+        with self.lock:
+            self.inFlight += 1
+            self.maxInFlight = max(self.maxInFlight, self.inFlight)
+        self.gate.wait(5)
+        with self.lock:
+            self.inFlight -= 1
+        return [{'method' : methodAPI}]
+
+    def _callServerIter(self, methodAPI, argsAPI=None):
+        for item in self._callServer(methodAPI, argsAPI):
+            yield item
+
+
+class TestLinkThrottleLimitsTestCase(unittest.TestCase):
+    """ TestCases for TokenBucket and ConcurrencyLimit """
+
+    def test_tokenBucketBurstAndRate(self):
+        bucket = TokenBucket(rate=50, burst=2)
+        self.assertEqual(0, bucket.acquire())
+        self.assertEqual(0, bucket.acquire())
+        start = time.time()
+        self.assertTrue(bucket.acquire() > 0)
+        self.assertTrue(0.01 < time.time() - start < 0.5)
+
+    def test_tokenBucketDeadline(self):
+        bucket = TokenBucket(rate=1)
+        bucket.acquire()
+        self.assertRaises(TLTimeoutError, bucket.acquire, time.time() + 0.1)
+
+    def test_invalidLimits(self):
+        self.assertRaises(ValueError, TokenBucket, 0)
+        self.assertRaises(ValueError, ConcurrencyLimit, 0)
+
+    def test_concurrencyLimitDeadline(self):
+        limit = ConcurrencyLimit(1)
+        self.assertEqual(0, limit.acquire())
+        self.assertRaises(TLTimeoutError, limit.acquire, time.time() + 0.05)
+        limit.release()
+        self.assertEqual(0, limit.acquire())
+
+
+class TestLinkFileThrottleTestCase(unittest.TestCase):
+    """ TestCases for the cross process limits - two instances with the same
+    files simulate two processes
+    """
+
+    def setUp(self):
+        self.lockDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.lockDir)
+
+    def test_fileTokenBucketShared(self):
+        path = os.path.join(self.lockDir, 'bucket')
+        process1 = FileTokenBucket(path, rate=1)
+        process2 = FileTokenBucket(path, rate=1)
+        self.assertEqual(0, process1.acquire())
+        self.assertRaises(TLTimeoutError, process2.acquire, time.time() + 0.1)
+
+    def test_fileConcurrencyLimitShared(self):
+        path = os.path.join(self.lockDir, 'slot')
+        process1 = FileConcurrencyLimit(path, 1)
+        process2 = FileConcurrencyLimit(path, 1)
+        self.assertEqual(0, process1.acquire())
+        self.assertRaises(TLTimeoutError, process2.acquire, time.time() + 0.1)
+        process1.release()
+        self.assertEqual(0, process2.acquire())
+        process2.release()
+
+    def test_throttleWithLockDir(self):
+        lockDir = os.path.join(self.lockDir, 'sub')
+        throttle = Throttle(writeRate=10, maxWrites=2, lockDir=lockDir)
+        self.assertEqual(['FileConcurrencyLimit', 'FileTokenBucket'],
+            [x.__class__.__name__ for x in throttle.limits['write']])
+        self.assertEqual([], throttle.limits['read'])
+        with throttle.limit('reportTCResult'):
+            pass
+        self.assertTrue(os.path.exists(os.path.join(lockDir, 'write.bucket')))
+
+    def test_withoutFileLocks(self):
+        fcntl = testlinkthrottle.fcntl
+        testlinkthrottle.fcntl = None
+        try:
+            self.assertRaises(TLArgError, Throttle, writeRate=10, 
+                              lockDir=self.lockDir)
+            self.assertRaises(TLArgError, FileConcurrencyLimit, 
+                              os.path.join(self.lockDir, 'slot'), 1)
+        finally:
+            testlinkthrottle.fcntl = fcntl
+
+
+class TestLinkAPIThrottleTestCase(unittest.TestCase):
+    """ TestCases for TestlinkAPIGeneric with throttle - does not interacts
+    with a TestLink Server. works with DummyAPIGeneric
+    """
+
+    def connect(self, throttle):
+        return TestLinkHelper().connect(DummyAPIGeneric, throttle=throttle,
+                                        transport=PooledTransport(poolSize=8))
+
+    def test_maxConcurrentReads(self):
+        api = self.connect(Throttle(maxReads=2))
+        api.gate.clear()
+        items = [{'testcaseid' : x} for x in range(6)]
+        results = api.map('getTestCase', items, workers=6)
+        threading.Timer(0.05, api.gate.set).start()
+        self.assertEqual(6, len(list(results)))
+        self.assertEqual(2, api.maxInFlight)
+        self.assertTrue(api.throttle.stats['throttled'] > 0)
+
+    def test_readsAndWritesSeparated(self):
+        throttle = Throttle(maxWrites=1)
+        api = self.connect(throttle)
+        with throttle.limit('reportTCResult'):
+            # writes are blocked, reads not
+            api.getProjects()
+            with api.deadline(0.05):
+                self.assertRaises(TLTimeoutError, api.reportTCResult,
+                                  '4711', 'p', testcaseid='1')
+
+    def test_streamedReadsThrottled(self):
+        api = self.connect(Throttle(readRate=1))
+        self.assertEqual(1, len(list(
+                    api.callServerIterWithPosArgs('getProjects'))))
+        with api.deadline(0.1):
+            self.assertRaises(TLTimeoutError, list, 
+                        api.iterTestCasesForTestSuite(testsuiteid='4711'))
+
+    def test_throttleTimeoutsNotCounted(self):
+        # a healthy server, only the client waits for the throttle
+        api = TestLinkHelper().connect(DummyAPIGeneric, 
+                    throttle=Throttle(writeRate=0.1), 
+                    circuitBreaker=CircuitBreaker(failureThreshold=2),
+                    transport=PooledTransport(poolSize=8))
+        api.reportTCResult('4711', 'p', testcaseid='1')
+        for x in range(3):
+            with api.deadline(0.05):
+                self.assertRaises(TLTimeoutError, api.reportTCResult,
+                                  '4711', 'p', testcaseid='1')
+        self.assertEqual('closed', api.circuitState())
+
+    def test_sharedBetweenClients(self):
+        throttle = Throttle(readRate=1)
+        api1 = self.connect(throttle)
+        api2 = self.connect(throttle)
+        api1.getProjects()
+        with api2.deadline(0.1):
+            self.assertRaises(TLTimeoutError, api2.getProjects)
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,374 @@
+#! /usr/bin/python
+# -*- coding: UTF-8 -*-
+
+#  Copyright 2014 Luiko Czub, TestLink-API-Python-client developers
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+# ------------------------------------------------------------------------
+
+# this test works WITHOUT an online TestLink Server
+# no calls are send to a TestLink Server
+
+import unittest, httplib, socket, errno, threading, time, zlib, xmlrpclib
+from StringIO import StringIO
+from testlink import TestlinkAPIGeneric, TestLinkHelper
+from testlink.testlinkerrors import TLConnectionError, TLPoolTimeoutError
+from testlink.testlinktransport import KeepAliveTransport, \
+SafeKeepAliveTransport, newKeepAliveTransport, PooledTransport, \
+SafePooledTransport, newPooledTransport
+
+
+class DummyConnection(object):
+    """ Dummy for a httplib connection, just knows its socket state """
+
+    def __init__(self, chost):
+        self.chost = chost
+        self.sock = 'open socket'
+
+    def close(self):
+        self.sock = None
+
+
+class DummyKeepAliveTransport(KeepAliveTransport):
+    """ Dummy for Simulation KeepAliveTransport.
+    Overrides
+    - _newConnection() to create dummy connections
+    - single_request() to raise the errors defined in .failures - like the
+      stock single_request(), the connection is closed after an error
+    """
+
+    def __init__(self, failures=None):
+        KeepAliveTransport.__init__(self)
+        self.failures = failures or []
+        self.usedConnections = []
+
+    def _newConnection(self, chost, x509):
+        return DummyConnection(chost)
+
+    def single_request(self, host, handler, request_body, verbose=0):
+        connection = self.make_connection(host)
+        self.usedConnections.append(connection)
+        if self.failures:
+            self.close()
+            raise self.failures.pop(0)
+        return ('response for %s' % request_body,)
+
+
+class DummyPooledTransport(PooledTransport):
+    """ Dummy for Simulation PooledTransport.
+    Overrides
+    - _newConnection() to create dummy connections
+    - single_request() to wait for .gate, before the response is returned
+    """
+
+    def __init__(self, poolSize=2, poolTimeout=None):
+        PooledTransport.__init__(self, poolSize, poolTimeout)
+        self.gate = threading.Event()
+        self.gate.set()
+        self.usedConnections = []
+
+    def _newConnection(self, chost, x509):
+        return DummyConnection(chost)
+
+    def single_request(self, host, handler, request_body, verbose=0):
+        connection = self.make_connection(host)
+        self.usedConnections.append(connection)
+        self.gate.wait(5)
+        return ('response for %s' % request_body,)
+
+
+class TestLinkTransportTestCase(unittest.TestCase):
+    """ TestCases for KeepAliveTransport - does not interacts with a TestLink
+    Server. works with DummyKeepAliveTransport and DummyConnection
+    """
+
+    def test_reuseConnection(self):
+        transport = DummyKeepAliveTransport()
+        transport.request('SERVER-1', '/xmlrpc.php', 'call 1')
+        transport.request('SERVER-1', '/xmlrpc.php', 'call 2')
+        transport.request('SERVER-1', '/xmlrpc.php', 'call 3')
+        self.assertEqual(1, len(set(transport.usedConnections)))
+        self.assertEqual((3, 1, 2, 0), 
+                         (transport.stats['requests'], 
+                          transport.stats['connects'],
+                          transport.stats['reuses'], 
+                          transport.stats['reconnects']))
+
+    def test_newConnectionForOtherHost(self):
+        transport = DummyKeepAliveTransport()
+        transport.request('SERVER-1', '/xmlrpc.php', 'call 1')
+        transport.request('SERVER-2', '/xmlrpc.php', 'call 2')
+        self.assertEqual(2, len(set(transport.usedConnections)))
+        self.assertEqual(2, transport.stats['connects'])
+
+    def test_serverClosedSocket(self):
+        transport = DummyKeepAliveTransport()
+        transport.request('SERVER-1', '/xmlrpc.php', 'call 1')
+        transport.usedConnections[0].close()
+        transport.request('SERVER-1', '/xmlrpc.php', 'call 2')
+        self.assertEqual(2, transport.stats['connects'])
+        self.assertEqual(0, transport.stats['reuses'])
+
+    def test_reconnectStaleConnection(self):
+        transport = DummyKeepAliveTransport([httplib.BadStatusLine('')])
+        response = transport.request('SERVER-1', '/xmlrpc.php', 'call 1')
+        self.assertEqual(('response for call 1',), response)
+        self.assertEqual(2, len(set(transport.usedConnections)))
+        self.assertEqual(1, transport.stats['reconnects'])
+
+    def test_reconnectResetConnection(self):
+        reset = socket.error(errno.ECONNRESET, 'Connection reset by peer')
+        transport = DummyKeepAliveTransport([reset])
+        transport.request('SERVER-1', '/xmlrpc.php', 'call 1')
+        self.assertEqual(1, transport.stats['reconnects'])
+
+    def test_reconnectOnlyOnce(self):
+        transport = DummyKeepAliveTransport([httplib.BadStatusLine(''),
+                                             httplib.BadStatusLine('')])
+        self.assertRaises(httplib.BadStatusLine, transport.request,
+                          'SERVER-1', '/xmlrpc.php', 'call 1')
+
+    def test_noReconnectOtherSocketErrors(self):
+        refused = socket.error(errno.ECONNREFUSED, 'Connection refused')
+        transport = DummyKeepAliveTransport([refused])
+        self.assertRaises(socket.error, transport.request,
+                          'SERVER-1', '/xmlrpc.php', 'call 1')
+        self.assertEqual(0, transport.stats['reconnects'])
+
+    def test_resetStats(self):
+        transport = DummyKeepAliveTransport()
+        transport.request('SERVER-1', '/xmlrpc.php', 'call 1')
+        transport.resetStats()
+        self.assertEqual([0], list(set(transport.stats.values())))
+
+    def test_newKeepAliveTransport(self):
+        transport = newKeepAliveTransport('http://SERVER-1/xmlrpc.php')
+        self.assertIsInstance(transport, KeepAliveTransport)
+        self.assertNotIsInstance(transport, SafeKeepAliveTransport)
+        transport = newKeepAliveTransport('https://SERVER-1/xmlrpc.php')
+        self.assertIsInstance(transport, SafeKeepAliveTransport)
+
+    def test_helperConnectDefaultTransport(self):
+        a_helper = TestLinkHelper('http://SERVER-1/xmlrpc.php', 'DEVKEY-1')
+        client = a_helper.connect(TestlinkAPIGeneric)
+        self.assertIsInstance(client.server('transport'), KeepAliveTransport)
+        self.assertEqual(0, client.transportStats()['requests'])
+
+    def test_helperConnectOwnTransport(self):
+        transport = DummyKeepAliveTransport()
+        a_helper = TestLinkHelper('http://SERVER-1/xmlrpc.php', 'DEVKEY-1')
+        client = a_helper.connect(TestlinkAPIGeneric, transport=transport)
+        self.assertIs(transport, client.server('transport'))
+
+
+class DummyHTTPResponse(object):
+    """ Dummy for a httplib response, returns BODY with ENCODING """
+
+    def __init__(self, body, encoding=''):
+        self.stream = StringIO(body)
+        self.encoding = encoding
+
+    def getheader(self, name, default=None):
+        if name == 'Content-Encoding':
+            return self.encoding
+        return default
+
+    def read(self, size):
+        return self.stream.read(size)
+
+class DummyHTTPRequest(object):
+    """ Dummy for a httplib connection, records request headers and body """
+
+    def __init__(self):
+        self.headers = {}
+        self.body = None
+
+    def putrequest(self, method, handler, skip_accept_encoding=False):
+        self.headers['request'] = (method, handler, skip_accept_encoding)
+
+    def putheader(self, name, value):
+        self.headers[name] = value
+
+    def endheaders(self, body):
+        self.body = body
+
+def gzipCompress(data):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class TestLinkTransportCompressionTestCase(unittest.TestCase):
+    """ TestCases for KeepAliveTransport compression mode """
+
+    RESPONSE = xmlrpclib.dumps(([{'id' : str(x), 'name' : 'TC-%i' % x} 
+                                 for x in range(500)],), methodresponse=True)
+
+    def test_parseResponsePlain(self):
+        transport = KeepAliveTransport()
+        response = transport.parse_response(DummyHTTPResponse(self.RESPONSE))
+        self.assertEqual(500, len(response[0]))
+        self.assertEqual(len(self.RESPONSE), transport.stats['bytesReceived'])
+        self.assertEqual(1.0, transport.compressionRatio()['received'])
+
+    def test_parseResponseGzip(self):
+        transport = KeepAliveTransport(compress=True)
+        transport.readChunkSize = 256
+        body = gzipCompress(self.RESPONSE)
+        response = transport.parse_response(DummyHTTPResponse(body, 'gzip'))
+        self.assertEqual('TC-499', response[0][499]['name'])
+        self.assertEqual(len(body), transport.stats['bytesReceived'])
+        self.assertEqual(len(self.RESPONSE), 
+                         transport.stats['bytesReceivedRaw'])
+        self.assertTrue(transport.compressionRatio()['received'] > 5)
+
+    def test_parseResponseDeflate(self):
+        transport = KeepAliveTransport(compress=True)
+        body = zlib.compress(self.RESPONSE)
+        response = transport.parse_response(DummyHTTPResponse(body, 'deflate'))
+        self.assertEqual('TC-499', response[0][499]['name'])
+
+    def test_parseResponseRawDeflate(self):
+        transport = KeepAliveTransport(compress=True)
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+        body = compressor.compress(self.RESPONSE) + compressor.flush()
+        response = transport.parse_response(DummyHTTPResponse(body, 'deflate'))
+        self.assertEqual('TC-499', response[0][499]['name'])
+
+    def test_sendRequestAcceptEncoding(self):
+        request = DummyHTTPRequest()
+        KeepAliveTransport(compress=True).send_request(request, '/xmlrpc.php',
+                                                       'body')
+        self.assertEqual('gzip, deflate', request.headers['Accept-Encoding'])
+        self.assertTrue(request.headers['request'][2])
+
+    def test_sendRequestWithoutCompression(self):
+        request = DummyHTTPRequest()
+        KeepAliveTransport().send_request(request, '/xmlrpc.php', 'body')
+        self.assertNotIn('Accept-Encoding', request.headers)
+        self.assertFalse(request.headers['request'][2])
+
+    def test_sendContentCompressed(self):
+        request = DummyHTTPRequest()
+        transport = KeepAliveTransport(compress=True, compressThreshold=100)
+        transport.send_content(request, self.RESPONSE)
+        self.assertEqual('gzip', request.headers['Content-Encoding'])
+        self.assertEqual(self.RESPONSE, zlib.decompress(request.body, 
+                                                    16 + zlib.MAX_WBITS))
+        self.assertEqual(str(len(request.body)), 
+                         request.headers['Content-Length'])
+        self.assertTrue(transport.compressionRatio()['sent'] > 5)
+
+    def test_sendContentBelowThreshold(self):
+        request = DummyHTTPRequest()
+        transport = KeepAliveTransport(compress=True, compressThreshold=100)
+        transport.send_content(request, 'small body')
+        self.assertNotIn('Content-Encoding', request.headers)
+        self.assertEqual('small body', request.body)
+
+    def test_sendContentNotCompressedWithoutThreshold(self):
+        request = DummyHTTPRequest()
+        KeepAliveTransport(compress=True).send_content(request, self.RESPONSE)
+        self.assertNotIn('Content-Encoding', request.headers)
+
+    def test_newTransportsCompress(self):
+        transport = newKeepAliveTransport('https://SERVER-1/xmlrpc.php', 
+                                          compress=True, compressThreshold=10)
+        self.assertEqual((True, 10), (transport.compress, 
+                                      transport.compressThreshold))
+        transport = newPooledTransport('http://SERVER-1/xmlrpc.php', 
+                                       compress=True)
+        self.assertEqual((True, None), (transport.compress, 
+                                        transport.compressThreshold))
+
+
+class TestLinkPooledTransportTestCase(unittest.TestCase):
+    """ TestCases for PooledTransport - does not interacts with a TestLink
+    Server. works with DummyPooledTransport and DummyConnection
+    """
+
+    def startThreads(self, a_func, count):
+        threads = [threading.Thread(target=a_func) for x in range(count)]
+        for a_thread in threads:
+            a_thread.start()
+        return threads
+
+    def test_sequentialCallsReuseConnection(self):
+        transport = DummyPooledTransport()
+        transport.request('SERVER-1', '/xmlrpc.php', 'call 1')
+        transport.request('SERVER-1', '/xmlrpc.php', 'call 2')
+        self.assertEqual(1, len(set(transport.usedConnections)))
+        self.assertEqual(1, transport.stats['maxInUse'])
+
+    def test_concurrentCallsBoundedByPoolSize(self):
+        transport = DummyPooledTransport(poolSize=2)
+        transport.gate.clear()
+        def a_func(): transport.request('SERVER-1', '/xmlrpc.php', 'call')
+        threads = self.startThreads(a_func, 5)
+        time.sleep(0.1)
+        transport.gate.set()
+        for a_thread in threads:
+            a_thread.join()
+        self.assertEqual(5, transport.stats['requests'])
+        self.assertEqual(2, transport.stats['maxInUse'])
+        self.assertEqual(2, transport.stats['connects'])
+        self.assertEqual(3, transport.stats['waits'])
+        self.assertEqual(2, len(set(transport.usedConnections)))
+
+    def test_poolTimeout(self):
+        transport = DummyPooledTransport(poolSize=1, poolTimeout=0.05)
+        transport.gate.clear()
+        def a_func(): transport.request('SERVER-1', '/xmlrpc.php', 'call')
+        threads = self.startThreads(a_func, 1)
+        time.sleep(0.05)
+        self.assertRaises(TLPoolTimeoutError, transport.request, 
+                          'SERVER-1', '/xmlrpc.php', 'call')
+        transport.gate.set()
+        threads[0].join()
+        self.assertEqual(1, transport.stats['timeouts'])
+
+    def test_closeIdleConnections(self):
+        transport = DummyPooledTransport()
+        transport.request('SERVER-1', '/xmlrpc.php', 'call 1')
+        transport.close()
+        self.assertIsNone(transport.usedConnections[0].sock)
+        transport.request('SERVER-1', '/xmlrpc.php', 'call 2')
+        self.assertEqual(2, transport.stats['connects'])
+
+    def test_invalidPoolSize(self):
+        self.assertRaises(ValueError, PooledTransport, 0)
+
+    def test_newPooledTransport(self):
+        transport = newPooledTransport('http://SERVER-1/xmlrpc.php', 8, 3)
+        self.assertIsInstance(transport, PooledTransport)
+        self.assertNotIsInstance(transport, SafePooledTransport)
+        self.assertEqual((8, 3), (transport.poolSize, transport.poolTimeout))
+        transport = newPooledTransport('https://SERVER-1/xmlrpc.php')
+        self.assertIsInstance(transport, SafePooledTransport)
+
+    def test_sharedClient(self):
+        transport = DummyPooledTransport(poolSize=3)
+        a_helper = TestLinkHelper('http://SERVER-1/xmlrpc.php', 'DEVKEY-1')
+        client = a_helper.connect(TestlinkAPIGeneric, transport=transport)
+        responses = []
+        def a_func(): responses.append(client.callServerWithPosArgs('about'))
+        for a_thread in self.startThreads(a_func, 10):
+            a_thread.join()
+        self.assertEqual(10, len(responses))
+        self.assertEqual(10, client.transportStats()['requests'])
+        self.assertTrue(client.transportStats()['maxInUse'] <= 3)
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()